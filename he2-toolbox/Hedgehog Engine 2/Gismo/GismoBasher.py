@@ -5,35 +5,36 @@ __contributors__ = ["Skyth", "Knuxfan24"]
 
 import sys
 import os
-import re
 import json
-import subprocess
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QTreeWidget, QTreeWidgetItem,
+    QApplication, QMainWindow, QTreeView,
     QFileDialog, QToolBar, QWidget, QVBoxLayout,
     QLineEdit, QComboBox, QStyledItemDelegate, QLabel, QPushButton,
-    QHBoxLayout, QDialog, QSpinBox, QTextEdit, QWidgetAction, QSizePolicy
+    QHBoxLayout, QDialog, QSpinBox, QTextEdit, QWidgetAction, QSizePolicy,
+    QProgressBar, QCheckBox, QListWidget, QListWidgetItem, QMessageBox, QSplitter
 )
-from PyQt6.QtGui import QAction, QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QAction, QFont, QKeySequence
+from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
 from PyQt6.QtCore import QSettings
+import time
+import threading
 from pathlib import Path
-import shutil
-
-BASE_DIR       = Path(__file__).resolve().parent
-SETTINGS_FILE  = BASE_DIR / 'settings.json'
-TEMPLATES_DIR  = BASE_DIR / 'templates'
-
-ENUM_MAP = {
-    ('Design', 'Collision', 'Shape'): ['Box', 'Sphere', 'Capsule', 'Cylinder', 'Mesh', 'None'],
-    ('Design', 'Collision', 'BasePoint'): ['Centre', 'ZPlane', 'XPlane', 'YPlane'],
-    ('Design', 'RigidBody', 'Type'): ['None', 'Static', 'Dynamic'],
-    ('Design', 'RigidBody', 'Material'): ['None', 'Wood', 'Iron'],
-    ('ProgramMotion', 'Type'): ['Swing', 'Rotate', 'LinearSwing'],
-    ('Kill', 'Type'): ['None', 'Kill', 'Break', 'Motion'],
-    ('Plan', 'ContactDamageType'): ['None', 'LowSpeed', 'MiddleSpeed', 'HighSpeed'],
-}
-BOOLEAN_ENUM = ['true', 'false']
+
+from gismo import core, pipeline
+from gismo.core import SETTINGS_FILE, TEMPLATES_DIR
+from gismo.jsonmodel import JsonDocumentModel, MergedDocumentModel
+from gismo.manifest import Manifest
+from gismo.multidoc import DocumentSet, BulkEditError
+from gismo.paramindex import find_gismo_files
+from gismo.scan import scan_models
+from gismo.schema import ENUM_MAP, BOOLEAN_ENUM, default_validator
+from gismo.pool import ConverterPool
+from gismo.registry import TEMPLATES, copy_document
+from gismo.search import SearchIndex
+from gismo.trace import Tracer
+from gismo.watch import watch
+
+SEARCH_DEBOUNCE_MS = 200
 
 class EnumDelegate(QStyledItemDelegate):
     def createEditor(self, parent, option, index):
@@ -56,6 +57,216 @@ class EnumDelegate(QStyledItemDelegate):
         else:
             super().setModelData(editor, model, index)
 
+class GenerationWorker(QThread):
+    log_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(int, int, str, bool)
+
+    def __init__(self, template, model_paths, exe_path, force=False, tracer=None, resolve=None, validate=True):
+        super().__init__()
+        self.template = template
+        self.model_paths = model_paths
+        self.exe_path = exe_path
+        self.force = force
+        self.validate = validate
+        self.resolve = resolve
+        self.tracer = tracer or Tracer()
+        self.failures = []
+        # Checked between models, so Cancel works without a converter pool too.
+        self._cancel = threading.Event()
+        exe = Path(exe_path) if exe_path else None
+        self.pool = ConverterPool(exe) if exe is not None and exe.is_file() else None
+
+    def run(self):
+        try:
+            self.failures = pipeline.generate(
+                self.template, self.model_paths, self.exe_path,
+                log=self.log_signal.emit,
+                progress=self.progress_signal.emit,
+                pool=self.pool,
+                force=self.force,
+                tracer=self.tracer,
+                resolve=self.resolve,
+                validator=default_validator() if self.validate else None,
+                cancel=self._cancel,
+            )
+        except Exception as e:
+            self.log_signal.emit(f"ERROR: Generation failed: {e}")
+
+    def cancel(self):
+        self._cancel.set()
+        if self.pool is not None:
+            self.pool.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+class WatchThread(QThread):
+    batch_signal = pyqtSignal(list)
+    log_signal = pyqtSignal(str)
+
+    def __init__(self, roots):
+        super().__init__()
+        self.roots = list(roots)
+        self._stop = threading.Event()
+
+    def run(self):
+        try:
+            watch(self.roots, lambda paths: self.batch_signal.emit([str(p) for p in paths]),
+                  stop=self._stop, log=self.log_signal.emit)
+        except Exception as e:
+            self.log_signal.emit(f"ERROR: Watching stopped: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+class BulkEditDialog(QDialog):
+    """Edit many gismo JSON files at once through a merged view of the checked files."""
+
+    def __init__(self, parent=None, log=print, validator=default_validator):
+        super().__init__(parent)
+        self.setWindowTitle("Bulk Edit")
+        self.resize(1000, 600)
+        self.log = log
+        # Called at save time, so the main window's Validate toggle applies.
+        self.validator = validator
+        self.documents = DocumentSet()
+        self.model = MergedDocumentModel(self.documents, ENUM_MAP, BOOLEAN_ENUM, self)
+        self.model.historyChanged.connect(self.update_actions)
+
+        buttons = QHBoxLayout()
+        for name, handler in [
+            ("Add Files", self.add_files),
+            ("Add Folder", self.add_folder),
+            ("Check All", lambda: self.set_all_checked(True)),
+            ("Check None", lambda: self.set_all_checked(False))
+        ]:
+            button = QPushButton(name)
+            button.clicked.connect(handler)
+            buttons.addWidget(button)
+        self.differing_checkbox = QCheckBox("Differing fields only")
+        self.differing_checkbox.setChecked(True)
+        self.differing_checkbox.toggled.connect(self.refresh_view)
+        buttons.addWidget(self.differing_checkbox)
+        buttons.addStretch()
+        self.undo_button = QPushButton("Undo")
+        self.undo_button.setShortcut(QKeySequence.StandardKey.Undo)
+        self.undo_button.clicked.connect(self.model.undo)
+        buttons.addWidget(self.undo_button)
+        self.redo_button = QPushButton("Redo")
+        self.redo_button.setShortcut(QKeySequence.StandardKey.Redo)
+        self.redo_button.clicked.connect(self.model.redo)
+        buttons.addWidget(self.redo_button)
+        self.save_button = QPushButton("Save Changed")
+        self.save_button.clicked.connect(self.save_changed)
+        buttons.addWidget(self.save_button)
+
+        self.file_list = QListWidget()
+        self.file_list.itemChanged.connect(lambda item: self.selection_timer.start())
+        # Checking many files in a row refreshes the view once.
+        self.selection_timer = QTimer(self)
+        self.selection_timer.setSingleShot(True)
+        self.selection_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.selection_timer.timeout.connect(self.refresh_view)
+
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
+        self.tree.header().setSectionResizeMode(0, self.tree.header().ResizeMode.Stretch)
+        self.tree.header().setSectionResizeMode(1, self.tree.header().ResizeMode.Stretch)
+        self.tree.setAlternatingRowColors(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setItemDelegateForColumn(1, EnumDelegate())
+
+        splitter = QSplitter()
+        splitter.addWidget(self.file_list)
+        splitter.addWidget(self.tree)
+        splitter.setStretchFactor(1, 3)
+        self.status = QLabel("")
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(buttons)
+        layout.addWidget(splitter, 1)
+        layout.addWidget(self.status)
+        self.update_actions()
+
+    def add_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Add gismo JSON Files", "",
+                                                "Gismo JSON (*.hedgehog.gismo_rangers.json);;JSON Files (*.json)")
+        if paths:
+            self.load(paths)
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Add every gismo JSON under a folder (honours .gismoignore)")
+        if folder:
+            self.load([Path(folder) / rel for rel in sorted(find_gismo_files(folder))])
+
+    def load(self, paths):
+        start = time.perf_counter()
+        before = len(self.documents)
+        errors = self.documents.load(paths)
+        for path, message in errors:
+            self.log(f"Skipped {Path(path).name}: {message}")
+        self.file_list.blockSignals(True)
+        for path in self.documents.paths[before:]:
+            item = QListWidgetItem(path.name)
+            item.setToolTip(str(path))
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            self.file_list.addItem(item)
+        self.file_list.blockSignals(False)
+        stats = self.documents.stats()
+        self.log(f"Bulk edit: loaded {len(self.documents) - before} file(s) in {time.perf_counter() - start:.2f}s "
+                 f"({stats['interned']} distinct values and objects across {stats['documents']} file(s))")
+        self.refresh_view()
+
+    def set_all_checked(self, checked):
+        state = Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked
+        self.file_list.blockSignals(True)
+        for row in range(self.file_list.count()):
+            self.file_list.item(row).setCheckState(state)
+        self.file_list.blockSignals(False)
+        self.refresh_view()
+
+    def refresh_view(self):
+        self.model.selection = [row for row in range(self.file_list.count())
+                                if self.file_list.item(row).checkState() == Qt.CheckState.Checked]
+        self.model.only_differing = self.differing_checkbox.isChecked()
+        self.model.refresh()
+        for row in range(self.model.rowCount()):
+            self.tree.expand(self.model.index(row, 0))
+
+    def update_actions(self):
+        history = self.documents.history
+        self.undo_button.setEnabled(history.can_undo())
+        self.redo_button.setEnabled(history.can_redo())
+        self.undo_button.setToolTip(f"Undo {history.undo_label()}" if history.can_undo() else "Undo")
+        self.redo_button.setToolTip(f"Redo {history.redo_label()}" if history.can_redo() else "Redo")
+        changed = len(self.documents.changed())
+        self.save_button.setEnabled(bool(changed))
+        self.status.setText(f"{len(self.model.selection)} of {len(self.documents)} file(s) checked, "
+                            f"{changed} changed")
+
+    def save_changed(self):
+        try:
+            written = self.documents.save(self.validator(), log=self.log)
+        except BulkEditError as e:
+            self.log(f"ERROR: {e}")
+            return
+        except Exception as e:
+            self.log(f"ERROR: Failed to save: {e}")
+            return
+        for path in written:
+            self.log(f"Saved: {path}")
+        self.log(f"Bulk edit: wrote {len(written)} file(s); the edits are pinned in their build manifests, so a rebuild keeps them")
+        self.update_actions()
+
+    def reject(self):
+        changed = len(self.documents.changed())
+        if changed and QMessageBox.question(
+                self, "Bulk Edit", f"Discard unsaved changes to {changed} file(s)?") != QMessageBox.StandardButton.Yes:
+            return
+        super().reject()
+
 class JsonEditor(QMainWindow):
     def __init__(self):
 
@@ -68,6 +279,13 @@ class JsonEditor(QMainWindow):
         self.resize(800, 600)
 
         self.current_file = None
+        self.worker = None
+        self.batch_started = None
+        self.last_trace = None
+        self.watch_roots = []
+        self.watch_thread = None
+        self.pending_watch = set()
+        self.bulk_dialog = None
 
         toolbar = QToolBar()
         toolbar.setMovable(False)
@@ -80,10 +298,65 @@ class JsonEditor(QMainWindow):
             act.triggered.connect(handler)
             toolbar.addAction(act)
 
+        bulk_edit_action = QAction("Bulk Edit", self)
+        bulk_edit_action.setToolTip("Edit many gismo JSON files at once; only the files that change are saved")
+        bulk_edit_action.triggered.connect(self.open_bulk_edit)
+        toolbar.addAction(bulk_edit_action)
+
+        self.undo_action = QAction("Undo", self)
+        self.undo_action.setShortcut(QKeySequence.StandardKey.Undo)
+        self.undo_action.setEnabled(False)
+        self.undo_action.triggered.connect(self.undo)
+        toolbar.addAction(self.undo_action)
+
+        self.redo_action = QAction("Redo", self)
+        self.redo_action.setShortcut(QKeySequence.StandardKey.Redo)
+        self.redo_action.setEnabled(False)
+        self.redo_action.triggered.connect(self.redo)
+        toolbar.addAction(self.redo_action)
+
         select_model_action = QAction("Select .model", self)
         select_model_action.triggered.connect(self.select_model_file)
         toolbar.addAction(select_model_action)
 
+        self.force_rebuild_action = QAction("Force rebuild", self)
+        self.force_rebuild_action.setCheckable(True)
+        self.force_rebuild_action.setToolTip("Regenerate every model even if its build manifest says it is up to date")
+        toolbar.addAction(self.force_rebuild_action)
+
+        self.validate_action = QAction("Validate", self)
+        self.validate_action.setCheckable(True)
+        self.validate_action.setChecked(True)
+        self.validate_action.setToolTip("Check templates and bulk edits against the schema before anything is written")
+        toolbar.addAction(self.validate_action)
+
+        scan_action = QAction("Scan Folder", self)
+        scan_action.setToolTip("Generate for every .model under a folder (honours .gismoignore)")
+        scan_action.triggered.connect(self.scan_model_folder)
+        toolbar.addAction(scan_action)
+
+        manifest_action = QAction("Select .model with Manifest", self)
+        manifest_action.setToolTip("Generate with per-model templates and overrides from a CSV/JSON manifest; "
+                                   "models no rule covers use the tree's document")
+        manifest_action.triggered.connect(self.select_models_with_manifest)
+        toolbar.addAction(manifest_action)
+
+        watch_action = QAction("Watch Folder", self)
+        watch_action.setToolTip("Regenerate gismos whenever .model files under a folder change")
+        watch_action.triggered.connect(self.add_watch_folder)
+        toolbar.addAction(watch_action)
+
+        self.stop_watch_action = QAction("Stop Watching", self)
+        self.stop_watch_action.setEnabled(False)
+        self.stop_watch_action.triggered.connect(self.stop_watching)
+        toolbar.addAction(self.stop_watch_action)
+
+        self.save_trace_action = QAction("Save Trace", self)
+        self.save_trace_action.setToolTip("Write the last batch or template load as a Chrome/Perfetto trace")
+        self.save_trace_action.setEnabled(False)
+        self.save_trace_action.triggered.connect(self.save_trace)
+        toolbar.addAction(self.save_trace_action)
+
         generate_template_action = QAction("Load Template:", self)
         generate_template_action.triggered.connect(self.generate_template)
         toolbar.addAction(generate_template_action)
@@ -137,12 +410,24 @@ class JsonEditor(QMainWindow):
             button.setMinimumSize(text_width, text_height)
 
         self.search_bar = QLineEdit()
-        self.search_bar.setPlaceholderText("Search keys or values...")
+        self.search_bar.setPlaceholderText("Search keys or values, or Path.To.Key=value...")
         self.search_bar.textChanged.connect(self.filter_items)
-
-        self.tree = QTreeWidget()
-        self.tree.setColumnCount(2)
-        self.tree.setHeaderLabels(["Key", "Value"])
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_filter)
+        self.search_index = SearchIndex()
+        self.hidden_paths = set()
+        self.visible_paths = None
+
+        self.model = JsonDocumentModel(ENUM_MAP, BOOLEAN_ENUM, self)
+        self.model.rowsInserted.connect(self.on_rows_inserted)
+        self.model.dataChanged.connect(self.on_data_changed)
+        self.model.keyRenamed.connect(self.on_key_renamed)
+        self.model.pathChanged.connect(self.on_path_changed)
+        self.model.historyChanged.connect(self.update_undo_actions)
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
         self.tree.header().setSectionResizeMode(0, self.tree.header().ResizeMode.Stretch)
         self.tree.header().setSectionResizeMode(1, self.tree.header().ResizeMode.Stretch)
         self.tree.setAlternatingRowColors(True)
@@ -160,6 +445,18 @@ class JsonEditor(QMainWindow):
         bottom_layout.addWidget(self.tree, 4)
         bottom_layout.addWidget(QLabel("Output:"))
         bottom_layout.addWidget(self.log_output, 1)
+        progress_row = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("%v / %m")
+        self.progress_bar.setValue(0)
+        progress_row.addWidget(self.progress_bar, 1)
+        self.progress_label = QLabel("")
+        progress_row.addWidget(self.progress_label)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_generation)
+        progress_row.addWidget(self.cancel_button)
+        bottom_layout.addLayout(progress_row)
         main_layout.addWidget(bottom_panel, 1)
         self.setCentralWidget(central)
 
@@ -182,10 +479,9 @@ class JsonEditor(QMainWindow):
     def refresh_template_list(self):
         self.template_selector.clear()
         TEMPLATES_DIR.mkdir(exist_ok=True)
-        for fn in TEMPLATES_DIR.iterdir():
-            if fn.suffix == '.json' and fn.name != 'template_brk.hedgehog.bulletskeleton.json':
-                display = fn.stem.replace('.hedgehog.gismo_rangers','')
-                self.template_selector.addItem(display, fn)
+        for fn in TEMPLATES.list_templates(TEMPLATES_DIR):
+            display = fn.stem.replace('.hedgehog.gismo_rangers','')
+            self.template_selector.addItem(display, fn)
         if self.template_selector.count():
             self.template_selector.setCurrentIndex(0)
 
@@ -195,7 +491,7 @@ class JsonEditor(QMainWindow):
             return
         self.current_file = path
         try:
-            data = json.load(open(path))
+            data = TEMPLATES.get(path)
             self.populate_tree(data)
             self.log(f"Loaded {path}")
         except Exception as e:
@@ -208,7 +504,7 @@ class JsonEditor(QMainWindow):
             return
         if not path.lower().endswith('.hedgehog.gismo_rangers.json'):
             path += '.hedgehog.gismo_rangers.json'
-        data = self.tree_to_data(self.tree.invisibleRootItem())
+        data = self.tree_to_data()
         try:
             with open(path, 'w') as f:
                 json.dump(data, f, indent=2)
@@ -217,101 +513,89 @@ class JsonEditor(QMainWindow):
         except Exception as e:
             self.log(f"ERROR: Failed to Save As: {e}")
 
+    def validator(self):
+        return default_validator() if self.validate_action.isChecked() else None
+
+    def open_bulk_edit(self):
+        if self.bulk_dialog is None:
+            self.bulk_dialog = BulkEditDialog(self, log=self.log, validator=self.validator)
+        self.bulk_dialog.show()
+        self.bulk_dialog.raise_()
+
     def populate_tree(self, data):
-        self.tree.clear()
-        def walk(parent, value, path=()):
-            parent.setFlags(parent.flags() | Qt.ItemFlag.ItemIsEditable)
-            if isinstance(value, dict):
-                parent.setData(0, Qt.ItemDataRole.UserRole, 'dict')
-                for k, v in value.items():
-                    child = QTreeWidgetItem(parent)
-                    child.setText(0, k)
-                    walk(child, v, path + (k,))
-            elif isinstance(value, list):
-                parent.setData(0, Qt.ItemDataRole.UserRole, 'list')
-                for i, v in enumerate(value):
-                    child = QTreeWidgetItem(parent)
-                    child.setText(0, str(i))
-                    walk(child, v, path + (str(i),))
-            else:
-                parent.setData(0, Qt.ItemDataRole.UserRole, 'value')
-                if isinstance(value, bool):
-                    txt = 'true' if value else 'false'
-                elif value is None:
-                    txt = ''
-                else:
-                    txt = str(value)
-                parent.setText(1, txt)
-                # enum choices
-                for kp, opts in ENUM_MAP.items():
-                    if len(kp) == len(path) and path[-len(kp):] == kp:
-                        parent.setData(1, Qt.ItemDataRole.UserRole+1, opts)
-                # boolean enum
-                if txt in BOOLEAN_ENUM:
-                    parent.setData(1, Qt.ItemDataRole.UserRole+1, BOOLEAN_ENUM)
-
-        walk(self.tree.invisibleRootItem(), data)
+        self.hidden_paths = set()
+        self.visible_paths = None
+        # The model never edits a document in place, so the registry's shared
+        # copy can be used as is.
+        self.model.set_document(data)
+        self.search_index.build(self.model.document())
         self.tree.collapseAll()
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            self.tree.expandItem(root.child(i))
+        for row in range(self.model.rowCount()):
+            self.tree.expand(self.model.index(row, 0))
+        if self.search_bar.text():
+            self.apply_filter()
         self.log("Template loaded.")
 
     def filter_items(self, text):
-        txt = text.lower()
-        def recurse(item):
-            ok = txt in item.text(0).lower() or txt in item.text(1).lower()
-            vis = ok
-            for i in range(item.childCount()):
-                if recurse(item.child(i)):
-                    vis = True
-            item.setHidden(not vis)
-            return vis
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            recurse(root.child(i))
-
-    def tree_to_data(self, item):
-        t = item.data(0, Qt.ItemDataRole)
-        if t == 'dict':
-            data = {}
-            for i in range(item.childCount()):
-                child = item.child(i)
-                data[child.text(0)] = self.tree_to_data(child)
-            return data
-        if t == 'list':
-            elems = []
-            for i in range(item.childCount()):
-                child = item.child(i)
-                key = int(child.text(0))
-                elems.append((key, self.tree_to_data(child)))
-            elems.sort(key=lambda x: x[0])
-            return [v for _, v in elems]
-        txt = item.text(1)
-        if txt == '':
-            return None
-        try:
-            return json.loads(txt)
-        except:
-            return txt
+        self.search_timer.start()
 
-    def model_name_generator(self, obj, name):
-        if isinstance(obj, dict):
-            new_dict = {}
-            for k, v in obj.items():
-                if k == "Mesh" and isinstance(v, str) and v == "{model_name}":
-                    new_dict[k] = f"{name}_col"
-                else:
-                    new_dict[k] = self.model_name_generator(v, name)
-            return new_dict
+    def apply_filter(self):
+        text = self.search_bar.text()
+        if text:
+            visible = self.search_index.visible(text)
+            hidden = {p for p in self.model.loaded_paths() if p not in visible}
+        else:
+            visible = None
+            hidden = set()
+        for path in hidden ^ self.hidden_paths:
+            self.set_path_hidden(path, path in hidden)
+        self.hidden_paths = hidden
+        self.visible_paths = visible
+
+    def set_path_hidden(self, path, hide):
+        index = self.model.loaded_index(path)
+        if index.isValid():
+            self.tree.setRowHidden(index.row(), index.parent(), hide)
+
+    def on_rows_inserted(self, parent, first, last):
+        if self.visible_paths is None:
+            return
+        for row in range(first, last + 1):
+            path = self.model.node(self.model.index(row, 0, parent)).path
+            if path not in self.visible_paths:
+                self.tree.setRowHidden(row, parent, True)
+                self.hidden_paths.add(path)
+
+    def on_data_changed(self, top_left, bottom_right):
+        if self.visible_paths is not None:
+            self.search_timer.start()
+
+    def on_path_changed(self, path):
+        self.search_index.update(path, self.model.value_at(path))
+
+    def on_key_renamed(self, old_path, new_path):
+        n = len(old_path)
+        self.search_index.remove(old_path)
+        self.hidden_paths = {new_path + p[n:] if p[:n] == old_path else p for p in self.hidden_paths}
 
-        if isinstance(obj, list):
-            return [self.model_name_generator(v, name) for v in obj]
+    def undo(self):
+        self.model.undo()
 
-        if isinstance(obj, str) and "{model_name}" in obj:
-            return obj.replace("{model_name}", name)
+    def redo(self):
+        self.model.redo()
 
-        return obj
+    def update_undo_actions(self):
+        history = self.model.history
+        self.undo_action.setEnabled(history.can_undo())
+        self.redo_action.setEnabled(history.can_redo())
+        self.undo_action.setToolTip(f"Undo {history.undo_label()}" if history.can_undo() else "Undo")
+        self.redo_action.setToolTip(f"Redo {history.redo_label()}" if history.can_redo() else "Redo")
+
+    def tree_to_data(self):
+        return copy_document(self.model.document())
+
+    def model_name_generator(self, obj, name):
+        return core.model_name_generator(obj, name)
 
     def generate_template(self):
         idx = self.template_selector.currentIndex()
@@ -323,13 +607,20 @@ class JsonEditor(QMainWindow):
         if not path.is_file():
             self.log(f"Missing template: {real}")
             return
+        tracer = Tracer()
         try:
-            data = json.load(open(path))
-            self.populate_tree(data)
+            with tracer.span('template', template=path.name):
+                data = TEMPLATES.get(path)
+            with tracer.span('tree', template=path.name):
+                self.populate_tree(data)
             self.current_file = None
             self.log(f"Loaded template “{self.template_selector.currentText()}”")
+            self.log(TEMPLATES.describe())
         except Exception as e:
             self.log(f"ERROR: Failed to load template: {e}")
+        self.log(tracer.describe())
+        self.last_trace = tracer
+        self.save_trace_action.setEnabled(True)
 
     def select_model_file(self):
         mpaths, _ = QFileDialog.getOpenFileNames(
@@ -337,121 +628,155 @@ class JsonEditor(QMainWindow):
         )
         if not mpaths:
             return
-        brk_groups = {}
-        normal_models = []
-        for mpath in mpaths:
-            model_path = Path(mpath)
-            name = model_path.stem
-            m = re.match(r'^(.+)_brk([A-Z])$', name)
-            if m:
-                prefix = m.group(1)
-                letter = m.group(2)
-                brk_groups.setdefault(prefix, set()).add(letter)
-            else:
-                normal_models.append(model_path)
-        brk_template_path = TEMPLATES_DIR / "template_brk.hedgehog.bulletskeleton.json"
-        if brk_groups and not brk_template_path.is_file():
-            self.log("Missing template_brk.hedgehog.bulletskeleton.json in templates directory")
-
-        for prefix, letters in brk_groups.items():
-            try:
-                full_list = json.load(open(brk_template_path))
-            except Exception as e:
-                self.log(f"ERROR loading bulletskeleton template: {e}")
-                continue
-            filtered = []
-            for node in full_list:
-                node_name = node.get("NodeName", "")
-                if re.fullmatch(r'\{model_name\}_brk', node_name):
-                    filtered.append(node)
-                    continue
-                m2 = re.fullmatch(r'\{model_name\}_brk([A-Z])__01', node_name)
-                if m2 and m2.group(1) in letters:
-                    filtered.append(node)
-                    continue
-            replaced_list = [self.model_name_generator(node, prefix) for node in filtered]
-            sample_model = next(mp for mp in mpaths if Path(mp).stem.startswith(prefix + "_brk"))
-            model_dir = Path(sample_model).parent
-            out_brk_json = model_dir / f"{prefix}_brk.hedgehog.bulletskeleton.json"
-
-            try:
-                with open(out_brk_json, 'w') as bf:
-                    json.dump(replaced_list, bf, indent=2)
-                self.log(f"Wrote bulletskeleton: {out_brk_json.name}")
-            except Exception as e:
-                self.log(f"ERROR writing bulletskeleton JSON for {prefix}_brk: {e}")
-                continue
-
-            exe_path = Path(self.exe_path)
-            exe_dir  = exe_path.parent
-            if not exe_path.is_file():
-                self.log("Executable path not set or invalid (for bulletskeleton).")
-                continue
-            try:
-                result = subprocess.run(
-                    [str(exe_path), str(out_brk_json)],
-                    cwd=str(exe_dir),
-                    capture_output=True,
-                    text=True
-                )
-                self.log(f"[bulletskel EXE stdout]\n{result.stdout.strip()}")
-                if result.stderr:
-                    self.log(f"[bulletskel EXE stderr]\n{result.stderr.strip()}")
-            except Exception as e:
-                self.log(f"ERROR running EXE on {out_brk_json.name}: {e}")
-                continue
-            for f in exe_dir.iterdir():
-                if f.stem == f"{prefix}_brk" and f.suffix.lower() != '.json':
-                    try:
-                        dest = model_dir / f.name
-                        shutil.move(str(f), str(dest))
-                        self.log(f"Created (bulletskel): {dest.name}")
-                    except Exception as e:
-                        self.log(f"ERROR moving bulletskeleton output {f.name}: {e}")
-
-        for model_path in normal_models:
-            model_dir  = model_path.parent
-            name       = model_path.stem
-            out_json = model_dir / f"{name}.hedgehog.gismo_rangers.json"
-            data = self.model_name_generator(
-                self.tree_to_data(self.tree.invisibleRootItem()), name
-            )
-            try:
-                with open(out_json, 'w') as f:
-                    json.dump(data, f, indent=2)
-                self.log(f"Wrote {out_json.name}")
-            except Exception as e:
-                self.log(f"ERROR writing gismo_rangers JSON: {e}")
-                continue
-            exe_path = Path(self.exe_path)
-            exe_dir  = exe_path.parent
-            if not exe_path.is_file():
-                self.log("Executable path not set or invalid.")
-            else:
-                result = subprocess.run(
-                    [str(exe_path), str(out_json)],
-                    cwd=str(exe_dir),
-                    capture_output=True,
-                    text=True
-                )
-                self.log(f"[gismo EXE stdout]\n{result.stdout.strip()}")
-                if result.stderr:
-                    self.log(f"[gismo EXE stderr]\n{result.stderr.strip()}")
-
-            for ext in ('gismod', 'gismop'):
-                dst = model_dir / f"{name}.{ext}"
-                if dst.exists():
-                    self.log(f"Created: {dst.name}")
-                    continue
-                src = exe_dir / f"{name}.{ext}"
-                if src.exists():
-                    try:
-                        shutil.move(str(src), str(dst))
-                        self.log(f"Created: {dst.name}")
-                    except Exception as e:
-                        self.log(f"ERROR moving {name}.{ext}: {e}")
-                else:
-                    self.log(f"Missing output: {name}.{ext}")
+        self.start_generation(mpaths)
+
+    def scan_model_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Mod Folder")
+        if not folder:
+            return
+        scan = scan_models(folder)
+        if not scan.entries:
+            self.log(f"No .model files under {folder}")
+            return
+        self.log(f"Found {len(scan.entries)} .model file(s) under {folder}")
+        self.start_generation(scan.models)
+
+    def select_models_with_manifest(self):
+        manifest_path, _ = QFileDialog.getOpenFileName(
+            self, "Select Batch Manifest", "", "Manifests (*.csv *.json)"
+        )
+        if not manifest_path:
+            return
+        mpaths, _ = QFileDialog.getOpenFileNames(
+            self, "Select .model Files", str(Path(manifest_path).parent), "Model Files (*.model)"
+        )
+        if not mpaths:
+            return
+        try:
+            manifest = Manifest.load(manifest_path, default=self.tree_to_data())
+        except Exception as e:
+            self.log(f"ERROR: Failed to load manifest: {e}")
+            return
+        normal_models, _ = core.split_models(mpaths)
+        self.log(f"Manifest {Path(manifest_path).name}:\n{manifest.describe(normal_models)}")
+        self.start_generation(mpaths, resolve=manifest)
+
+    def start_generation(self, mpaths, force=False, resolve=None):
+        if self.worker is not None and self.worker.isRunning():
+            self.log("A generation batch is already running.")
+            return
+        tracer = Tracer()
+        with tracer.span('snapshot'):
+            template = self.tree_to_data()
+        self.worker = GenerationWorker(template, mpaths, self.exe_path,
+                                       force=force or self.force_rebuild_action.isChecked(), tracer=tracer,
+                                       resolve=resolve, validate=self.validate_action.isChecked())
+        self.worker.log_signal.connect(self.log)
+        self.worker.progress_signal.connect(self.on_generation_progress)
+        self.worker.finished.connect(self.on_generation_finished)
+        self.batch_started = time.monotonic()
+        self.progress_bar.setMaximum(max(1, len(mpaths)))
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("Starting...")
+        self.cancel_button.setEnabled(True)
+        self.worker.start()
+
+    def cancel_generation(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.cancel_button.setEnabled(False)
+            self.progress_label.setText("Cancelling...")
+            self.worker.cancel()
+
+    def on_generation_progress(self, done, total, name, ok):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        elapsed = time.monotonic() - self.batch_started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else 0.0
+        self.progress_label.setText(f"{rate:.1f} models/s, ETA {int(eta // 60)}:{int(eta % 60):02d}")
+
+    def on_generation_finished(self):
+        worker = self.worker
+        elapsed = time.monotonic() - self.batch_started
+        self.cancel_button.setEnabled(False)
+        state = "cancelled" if worker.cancelled else "finished"
+        self.progress_label.setText(f"{state.capitalize()} in {elapsed:.1f}s")
+        if worker.failures:
+            shown = ', '.join(worker.failures[:20]) + (', ...' if len(worker.failures) > 20 else '')
+            self.log(f"Batch {state} in {elapsed:.1f}s: {len(worker.failures)} failed: {shown}")
+        else:
+            self.log(f"Batch {state} in {elapsed:.1f}s.")
+        self.log(TEMPLATES.describe())
+        self.log(worker.tracer.describe())
+        self.last_trace = worker.tracer
+        self.save_trace_action.setEnabled(True)
+        if self.pending_watch:
+            QTimer.singleShot(0, self.run_pending_watch)
+
+    def run_pending_watch(self):
+        paths = sorted(self.pending_watch)
+        self.pending_watch = set()
+        if paths:
+            self.start_generation(paths, force=True)
+
+    def add_watch_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Watch .model Folder")
+        if not folder:
+            return
+        root = Path(folder)
+        if root in self.watch_roots:
+            return
+        self.watch_roots.append(root)
+        self.restart_watch()
+
+    def stop_watching(self):
+        self.watch_roots = []
+        self.restart_watch()
+
+    def restart_watch(self):
+        if self.watch_thread is not None:
+            self.watch_thread.stop()
+            self.watch_thread.wait()
+            self.watch_thread = None
+        self.stop_watch_action.setEnabled(bool(self.watch_roots))
+        if not self.watch_roots:
+            self.log("Stopped watching.")
+            return
+        self.watch_thread = WatchThread(self.watch_roots)
+        self.watch_thread.batch_signal.connect(self.on_watch_batch)
+        self.watch_thread.log_signal.connect(self.log)
+        self.watch_thread.start()
+        self.log(f"Watching: {', '.join(str(r) for r in self.watch_roots)}")
+
+    def on_watch_batch(self, mpaths):
+        # A re-exported model produces the same gismo JSON, so the build
+        # manifest would call it up to date; watched changes always rebuild.
+        self.log(f"Changed: {', '.join(Path(p).name for p in mpaths)}")
+        if self.worker is not None and self.worker.isRunning():
+            self.pending_watch.update(mpaths)
+            return
+        self.start_generation(mpaths, force=True)
+
+    def save_trace(self):
+        if self.last_trace is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save Trace", "gismo_trace.json", "Trace JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.last_trace.write_chrome(path, process_name="GismoBasher")
+            self.log(f"Saved trace: {path}")
+        except Exception as e:
+            self.log(f"ERROR: Failed to save trace: {e}")
+
+    def closeEvent(self, event):
+        if self.watch_thread is not None:
+            self.watch_thread.stop()
+            self.watch_thread.wait()
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
 
     def open_settings(self):
         dlg = SettingsDialog(self)
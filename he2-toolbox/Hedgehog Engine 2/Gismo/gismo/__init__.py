@@ -0,0 +1,22 @@
+"""Qt-free building blocks for GismoBasher and the headless batch CLI"""
+from .core import (
+    BASE_DIR, SETTINGS_FILE, TEMPLATES_DIR,
+    GISMO_SUFFIX, SKELETON_SUFFIX, BRK_TEMPLATE_NAME,
+    load_settings, load_template, resolve_template_path, value_text,
+    model_name_generator, fragment_key, split_models, filter_bulletskeleton,
+    write_json, write_text, converter_command, run_converter,
+)
+from .plan import SubstitutionPlan, SkeletonPlan
+from .transforms import TransformError, load_transforms
+from .pool import ConverterJob, ConverterPool, JobResult
+from .pipeline import generate
+from .registry import TEMPLATES, TemplateRegistry, copy_document
+from .layers import TemplateError, apply_overlay, merge_patch
+from .search import SearchIndex
+from .trace import Tracer, NullTracer
+from .watch import watch, affected_models
+from .manifest import Manifest, ManifestError
+from .scan import scan_models, plan_batch
+from .schema import ENUM_MAP, BOOLEAN_ENUM, Validator, default_validator, validate_files
+from .paramindex import ParamIndex, QueryError
+from .multidoc import DocumentSet, BulkEditError
@@ -0,0 +1,361 @@
+"""Benchmarks for the gismo pipeline: python -m gismo.bench {substitution,pipeline,editor,templates,all}
+
+`pipeline` generates a synthetic set of .model files (plain models plus
+`_brkA`.. or `_brk01`.. breakable groups) and runs the real generation pipeline against
+gismo/stub_converter.py with a configurable per-run latency. `editor` times
+the GismoBasher document operations on documents 1x..100x the bundled
+templates; it needs PyQt6 and runs on the offscreen platform. `templates`
+lists and resolves a folder of overlay variants against the same number of
+full template copies. Results are
+printed as JSON, or written to --output so runs can be compared across
+versions.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from . import core, pipeline
+from .core import BASE_DIR, TEMPLATES_DIR, BRK_TEMPLATE_NAME
+from .plan import SkeletonPlan, SubstitutionPlan
+from .pool import ConverterPool
+from .registry import TEMPLATES, TemplateRegistry
+from .transforms import compute, numpy
+
+STUB_CONVERTER = Path(__file__).resolve().parent / 'stub_converter.py'
+
+
+def per_call(fn, names):
+    start = time.perf_counter()
+    for name in names:
+        fn(name)
+    return (time.perf_counter() - start) / len(names)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def percentiles(values, points=(50, 90, 95, 99)):
+    if not values:
+        return {}
+    ordered = sorted(values)
+    out = {}
+    for p in points:
+        k = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+        out[f"p{p}"] = ordered[k]
+    out["max"] = ordered[-1]
+    return out
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process and of its waited-for children, if the OS reports it."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return {
+            "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+        }
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return {"self": getattr(info, 'peak_wset', info.rss), "children": None}
+
+
+def tool_version():
+    match = re.search(r'__version__\s*=\s*["\'](.*?)["\']', (BASE_DIR / 'GismoBasher.py').read_text(encoding='utf-8'))
+    return match.group(1) if match else None
+
+
+def environment():
+    return {
+        "gismo_basher_version": tool_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def fragment_names(count):
+    """`A`.. for up to 26 fragments, numbered `01`.. beyond that."""
+    count = max(1, count)
+    if count <= 26:
+        return list(string.ascii_uppercase[:count])
+    return [f"{i:02d}" for i in range(1, count + 1)]
+
+
+def make_model_set(root, plain, groups, fragments=4):
+    """Create `plain` models and `groups` breakable groups of `fragments` `_brk` fragment models."""
+    root = Path(root)
+    paths = []
+    for i in range(plain):
+        folder = root / f"area{i % 8:02d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"obj_{i:05d}.model"
+        path.touch()
+        paths.append(path)
+    for g in range(groups):
+        folder = root / f"area{g % 8:02d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        for fragment in fragment_names(fragments):
+            path = folder / f"brk_{g:04d}_brk{fragment}.model"
+            path.touch()
+            paths.append(path)
+    return paths
+
+
+def bench_substitution(template_name='default', count=2000, fragments=200):
+    """Per-model cost of the recursive generator versus compiled plans, in microseconds.
+
+    `fragments` sizes a numbered bulletskeleton that only the generator can
+    produce, rendered with and without a transforms table for every fragment.
+    """
+    template = TEMPLATES.load(core.resolve_template_path(template_name))
+    skeleton = core.load_template(TEMPLATES_DIR / BRK_TEMPLATE_NAME)
+    letters = set(string.ascii_uppercase)
+    names = [f"model_{i:05d}" for i in range(count)]
+    skeleton_names = names[:count // 10 or 1]
+
+    start = time.perf_counter()
+    plan = SubstitutionPlan(template)
+    skeleton_plan = SkeletonPlan(skeleton)
+    compile_s = time.perf_counter() - start
+
+    numbered = fragment_names(max(fragments, 27))
+    columns = {name: [float(i % 7) for i in range(len(numbered))] for name in ('x', 'y', 'z', 'rx', 'ry', 'rz')}
+    columns['s'] = [1.0 + (i % 3) for i in range(len(numbered))]
+
+    def with_transforms(name):
+        table = dict(zip(numbered, compute(numbered, columns, [skeleton_plan.default_transform(f) for f in numbered])))
+        return skeleton_plan.render(name, numbered, table)
+
+    return {
+        "template": template_name,
+        "models": count,
+        "compile_us": compile_s * 1e6,
+        "gismo": {
+            "recursive_dump_us": per_call(
+                lambda n: json.dumps(core.model_name_generator(template, n), indent=2), names) * 1e6,
+            "plan_render_us": per_call(plan.render, names) * 1e6,
+            "recursive_dict_us": per_call(lambda n: core.model_name_generator(template, n), names) * 1e6,
+            "plan_apply_us": per_call(plan.apply, names) * 1e6,
+        },
+        "bulletskeleton": {
+            "recursive_dump_us": per_call(
+                lambda n: json.dumps([core.model_name_generator(node, n)
+                                      for node in core.filter_bulletskeleton(skeleton, letters)], indent=2),
+                skeleton_names) * 1e6,
+            "plan_render_us": per_call(lambda n: skeleton_plan.render(n, letters), skeleton_names) * 1e6,
+            "numbered_fragments": len(numbered),
+            "numbered_render_us": per_call(lambda n: skeleton_plan.render(n, numbered), skeleton_names) * 1e6,
+            "numbered_transforms_render_us": per_call(with_transforms, skeleton_names) * 1e6,
+            "transforms_backend": "numpy" if numpy is not None else "math",
+        },
+    }
+
+
+class RecordingPool(ConverterPool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.results = []
+
+    def run_job(self, job):
+        result = super().run_job(job)
+        self.results.append(result)
+        return result
+
+
+def bench_pipeline(plain=200, groups=10, fragments=4, latency=0.0, workers=None,
+                   template_name='default', force=True):
+    """Run the generation pipeline on a synthetic model set against the stub converter."""
+    template = TEMPLATES.load(core.resolve_template_path(template_name))
+    work = Path(tempfile.mkdtemp(prefix='gismo-bench-'))
+    old_latency = os.environ.get('GISMO_STUB_LATENCY')
+    os.environ['GISMO_STUB_LATENCY'] = str(latency)
+    try:
+        model_paths = make_model_set(work / 'models', plain, groups, fragments)
+        pool = RecordingPool(STUB_CONVERTER, workers=workers)
+        completions = []
+        batch_start = time.perf_counter()
+
+        def progress(done, total, name, ok):
+            completions.append(time.perf_counter() - batch_start)
+
+        failures = pipeline.generate(template, model_paths, STUB_CONVERTER, pool=pool,
+                                     log=lambda message: None, progress=progress, force=force)
+        wall = time.perf_counter() - batch_start
+        items = plain + groups
+        latencies = [r.elapsed for r in pool.results]
+        return {
+            "plain_models": plain,
+            "breakable_groups": groups,
+            "fragments_per_group": fragments,
+            "stub_latency_s": latency,
+            "workers": pool.workers,
+            "items": items,
+            "failures": len(failures),
+            "wall_s": wall,
+            "items_per_s": items / wall if wall > 0 else None,
+            "job_latency_s": percentiles(latencies),
+            "completion_time_s": percentiles(completions),
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+    finally:
+        if old_latency is None:
+            os.environ.pop('GISMO_STUB_LATENCY', None)
+        else:
+            os.environ['GISMO_STUB_LATENCY'] = old_latency
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def scaled_documents(scale, template_name='default'):
+    """Documents `scale` times the bundled templates: a merged multi-gismo dict and a long skeleton."""
+    template = TEMPLATES.load(core.resolve_template_path(template_name))
+    skeleton = core.load_template(TEMPLATES_DIR / BRK_TEMPLATE_NAME)
+    gismo_doc = {f"gismo_{i:03d}": core.model_name_generator(template, f"obj_{i:03d}") for i in range(scale)}
+    skeleton_doc = [node for i in range(scale) for node in core.model_name_generator(skeleton, f"brk_{i:03d}")]
+    return {"gismo": gismo_doc, "bulletskeleton": skeleton_doc}
+
+
+def bench_editor(scales=(1, 10, 100), query='mass', template_name='default'):
+    """Time populate_tree, filtering, tree_to_data and substitution at each document scale."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt6.QtWidgets import QApplication
+    except ImportError as e:
+        return {"skipped": f"PyQt6 unavailable: {e}"}
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    import GismoBasher
+
+    app = QApplication.instance() or QApplication([])
+    editor = GismoBasher.JsonEditor()
+    editor.log = lambda message: None
+    results = []
+    for scale in scales:
+        for kind, doc in scaled_documents(scale, template_name).items():
+            row = {"scale": scale, "document": kind}
+            row["populate_tree_s"], _ = timed(editor.populate_tree, doc)
+            row["fetch_all_s"], _ = timed(fetch_all, editor.model)
+            editor.search_bar.blockSignals(True)
+            editor.search_bar.setText(query)
+            row["filter_items_s"], _ = timed(editor.apply_filter)
+            editor.search_bar.setText(query + 'x')
+            row["filter_refine_s"], _ = timed(editor.apply_filter)
+            editor.search_bar.setText('')
+            row["filter_clear_s"], _ = timed(editor.apply_filter)
+            editor.search_bar.blockSignals(False)
+            row["tree_to_data_s"], data = timed(editor.tree_to_data)
+            row["model_name_generator_s"], _ = timed(core.model_name_generator, data, 'bench')
+            plan_s, plan = timed(SubstitutionPlan, data)
+            row["plan_compile_s"] = plan_s
+            row["plan_render_s"], _ = timed(plan.render, 'bench')
+            results.append(row)
+    editor.close()
+    app.processEvents()
+    return {"query": query, "rows": results}
+
+
+def bench_templates(variants=50, template_name='default'):
+    """List and resolve `variants` overlay templates versus `variants` full copies, cold and warm."""
+    base_path = core.resolve_template_path(template_name)
+    base = TEMPLATES.get(base_path)
+    work = Path(tempfile.mkdtemp(prefix='gismo-bench-'))
+    results = {"variants": variants}
+    try:
+        for kind in ("overlays", "copies"):
+            folder = work / kind
+            folder.mkdir()
+            shutil.copyfile(base_path, folder / base_path.name)
+            for i in range(variants):
+                path = folder / f"variant_{i:03d}{core.GISMO_SUFFIX}"
+                if kind == "overlays":
+                    overlay = {"$base": base_path.name, "$set": {"Plan.ContactDamageType": f"Variant{i}"}}
+                    path.write_text(json.dumps(overlay, indent=2))
+                else:
+                    path.write_text(json.dumps(base, indent=2))
+            registry = TemplateRegistry()
+            row = {"bytes": sum(p.stat().st_size for p in folder.iterdir())}
+            start = time.perf_counter()
+            for path in registry.list_templates(folder):
+                registry.get(path)
+            row["cold_s"] = time.perf_counter() - start
+            start = time.perf_counter()
+            for path in registry.list_templates(folder):
+                registry.get(path)
+            row["warm_s"] = time.perf_counter() - start
+            results[kind] = row
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+def fetch_all(model, parent=None):
+    from PyQt6.QtCore import QModelIndex
+    parent = parent or QModelIndex()
+    while model.canFetchMore(parent):
+        model.fetchMore(parent)
+    for row in range(model.rowCount(parent)):
+        fetch_all(model, model.index(row, 0, parent))
+
+
+def write_results(results, output):
+    text = json.dumps(results, indent=2)
+    if output:
+        Path(output).write_text(text, encoding='utf-8')
+    else:
+        print(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gismo.bench", description="Benchmarks for the gismo pipeline")
+    parser.add_argument("suite", nargs="?", default="all",
+                        choices=("substitution", "pipeline", "editor", "templates", "all"))
+    parser.add_argument("-o", "--output", default=None, help="write the JSON results here")
+    parser.add_argument("--template", default="default")
+    parser.add_argument("-n", "--count", type=int, default=2000, help="models for the substitution benchmark")
+    parser.add_argument("--models", type=int, default=200, help="plain models for the pipeline benchmark")
+    parser.add_argument("--groups", type=int, default=10, help="breakable groups for the pipeline benchmark")
+    parser.add_argument("--fragments", type=int, default=4, help="_brk fragments per group (numbered past 26)")
+    parser.add_argument("--skeleton-fragments", type=int, default=200,
+                        help="fragments in the numbered bulletskeleton of the substitution benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the stub converter sleeps per run")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="converter workers")
+    parser.add_argument("--scales", default="1,10,100", help="editor document sizes, as template multiples")
+    parser.add_argument("--query", default="mass", help="editor filter query")
+    parser.add_argument("--variants", type=int, default=50, help="template variants for the templates benchmark")
+    args = parser.parse_args(argv)
+
+    results = {"environment": environment()}
+    if args.suite in ("substitution", "all"):
+        results["substitution"] = bench_substitution(args.template, args.count, args.skeleton_fragments)
+    if args.suite in ("pipeline", "all"):
+        results["pipeline"] = bench_pipeline(args.models, args.groups, args.fragments, args.latency,
+                                             args.jobs, args.template)
+    if args.suite in ("editor", "all"):
+        scales = tuple(int(s) for s in args.scales.split(',') if s.strip())
+        results["editor"] = bench_editor(scales, args.query, args.template)
+    if args.suite in ("templates", "all"):
+        results["templates"] = bench_templates(args.variants, args.template)
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,190 @@
+"""Content-addressed build manifest used to skip unchanged gismo jobs"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .core import fragment_key
+
+MANIFEST_NAME = '.gismo_build.json'
+MANIFEST_VERSION = 1
+
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def template_hash(template):
+    return sha256_bytes(json.dumps(template, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+
+
+def input_hash(*parts):
+    """Hash of everything a job's JSON is derived from (template hash, name, fragments...)."""
+    return sha256_bytes('\0'.join(str(p) for p in parts).encode('utf-8'))
+
+
+def gismo_inputs(template_digest, name, pinned=None):
+    if pinned:
+        return input_hash(template_digest, 'gismo', name, 'pinned', json.dumps(pinned, sort_keys=True))
+    return input_hash(template_digest, 'gismo', name)
+
+
+def skeleton_inputs(template_digest, prefix, fragments, transforms_digest=None):
+    fragments = sorted(fragments, key=fragment_key)
+    # Single letters keep the key that older manifests were written with.
+    key = ''.join(fragments) if all(len(f) == 1 for f in fragments) else ','.join(fragments)
+    parts = (template_digest, 'bulletskeleton', prefix, key)
+    if transforms_digest is not None:
+        parts += ('transforms', transforms_digest)
+    return input_hash(*parts)
+
+
+def converter_fingerprint(exe_path):
+    exe_path = Path(exe_path)
+    try:
+        st = exe_path.stat()
+    except OSError:
+        return {"path": str(exe_path), "version": None}
+    return {"path": str(exe_path.resolve()), "version": f"{st.st_size}-{st.st_mtime_ns}"}
+
+
+def file_record(path, digest=None):
+    st = os.stat(path)
+    return {
+        "sha256": digest or sha256_file(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+def record_matches(path, record):
+    """True if `path` still has the content in `record`; rehashes only when stat differs."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_size != record.get("size"):
+        return False
+    if st.st_mtime_ns == record.get("mtime_ns"):
+        return True
+    if sha256_file(path) != record.get("sha256"):
+        return False
+    record["mtime_ns"] = st.st_mtime_ns
+    return True
+
+
+class BuildManifest:
+    """Per-output-directory record of what each job was last built from.
+
+    Entries are keyed by job name and hold the input hash, the template hash,
+    the hash of the substituted JSON, the converter fingerprint and the hashes
+    of the produced files.
+
+    An entry may also hold `pinned` overrides: edits made to the generated
+    JSON (`gismo query --set`, the editor's bulk edit) that every rebuild
+    applies on top of the template. They outlive rebuilds and failed jobs
+    until unpinned.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = self.directory / MANIFEST_NAME
+        self.entries = {}
+        self.dirty = False
+        if self.path.is_file():
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def is_current(self, name, inputs, converter):
+        entry = self.entries.get(name)
+        if not entry or entry.get("inputs") != inputs or entry.get("converter") != converter:
+            return False
+        files = [entry["json"]] + list(entry.get("outputs", {}).items())
+        if not entry.get("outputs"):
+            return False
+        for filename, record in files:
+            before = record.get("mtime_ns")
+            if not record_matches(self.directory / filename, record):
+                return False
+            if record.get("mtime_ns") != before:
+                self.dirty = True
+        return True
+
+    def record(self, name, inputs, template, json_path, converter, outputs):
+        json_path = Path(json_path)
+        pinned = self.pinned(name)
+        self.entries[name] = {
+            "inputs": inputs,
+            "template": template,
+            "json": [json_path.name, file_record(json_path)],
+            "converter": converter,
+            "outputs": {Path(p).name: file_record(p) for p in outputs},
+        }
+        if pinned:
+            self.entries[name]["pinned"] = pinned
+        self.dirty = True
+
+    def forget(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            if entry.get("pinned"):
+                self.entries[name] = {"pinned": entry["pinned"]}
+            self.dirty = True
+
+    def pinned(self, name):
+        return dict((self.entries.get(name) or {}).get("pinned") or {})
+
+    def pin(self, name, overrides):
+        entry = self.entries.setdefault(name, {})
+        entry["pinned"] = dict(entry.get("pinned") or {}, **overrides)
+        self.dirty = True
+
+    def unpin(self, name, paths=None):
+        """Drop the pinned overrides in `paths`, or all of them. Returns the paths dropped."""
+        entry = self.entries.get(name) or {}
+        pinned = entry.get("pinned") or {}
+        dropped = [p for p in pinned if paths is None or p in paths]
+        if dropped:
+            entry["pinned"] = {p: v for p, v in pinned.items() if p not in dropped}
+            if not entry["pinned"]:
+                del entry["pinned"]
+            self.dirty = True
+        return dropped
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+class BuildCache:
+    def __init__(self):
+        self.manifests = {}
+
+    def manifest(self, directory):
+        directory = Path(directory)
+        manifest = self.manifests.get(directory)
+        if manifest is None:
+            manifest = self.manifests[directory] = BuildManifest(directory)
+        return manifest
+
+    def save(self):
+        for manifest in self.manifests.values():
+            manifest.save()
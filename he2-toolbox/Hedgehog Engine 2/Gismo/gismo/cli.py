@@ -0,0 +1,368 @@
+"""Headless command-line entry point: python -m gismo {build,batch,watch,validate,index,query} ..."""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from . import core, pipeline
+from .manifest import Manifest
+from .buildcache import MANIFEST_NAME
+from .paramindex import ParamIndex, QueryError, parse_assignment, parse_condition, reconvert
+from .pool import ConverterPool
+from .registry import TEMPLATES
+from .scan import plan_batch, scan_models
+from .schema import default_validator, find_documents, validate_files
+from .trace import Tracer
+from .watch import DEBOUNCE_SECONDS, watch
+
+
+def find_models(models_root, ignore=()):
+    return scan_models(models_root, ignore).models
+
+
+def cmd_build(args):
+    settings = core.load_settings()
+    exe_path = args.exe or settings.get("exe_path")
+    if exe_path:
+        exe_path = os.path.normpath(exe_path)
+    tracer = Tracer()
+    try:
+        with tracer.span('template', template=str(args.template)):
+            template = TEMPLATES.get(core.resolve_template_path(args.template))
+    except Exception as e:
+        print(f"ERROR: Failed to load template: {e}", file=sys.stderr)
+        return 2
+    models_root = Path(args.models_root)
+    with tracer.span('find'):
+        scan = scan_models(models_root, args.ignore)
+    model_paths = scan.models
+    if not model_paths:
+        print(f"No .model files under {models_root}", file=sys.stderr)
+        return 1
+    if args.dry_run:
+        brk_template_path = Path(args.brk_template or core.TEMPLATES_DIR / core.BRK_TEMPLATE_NAME)
+        brk_template = TEMPLATES.get(brk_template_path) if brk_template_path.is_file() else None
+        with tracer.span('plan'):
+            plan = plan_batch(scan, template, brk_template, exe_path,
+                              models_root=models_root, output_dir=args.output_dir)
+        print(plan.describe(verbose=args.verbose))
+        print(tracer.describe())
+        return 0
+    failures = pipeline.generate(
+        template, model_paths, exe_path,
+        brk_template_path=args.brk_template,
+        models_root=models_root,
+        output_dir=args.output_dir,
+        workers=args.jobs,
+        force=args.force,
+        log=print,
+        tracer=tracer,
+        validator=validator_for(args),
+    )
+    print(TEMPLATES.describe())
+    print(tracer.describe())
+    if args.trace:
+        tracer.write_chrome(args.trace)
+        print(f"Wrote trace: {args.trace}")
+    if failures:
+        print(f"{len(failures)} failed: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_batch(args):
+    settings = core.load_settings()
+    exe_path = args.exe or settings.get("exe_path")
+    if exe_path:
+        exe_path = os.path.normpath(exe_path)
+    tracer = Tracer()
+    try:
+        default = TEMPLATES.get(core.resolve_template_path(args.default_template)) if args.default_template else None
+        manifest = Manifest.load(args.manifest, default=default, default_label=args.default_template or 'default')
+    except Exception as e:
+        print(f"ERROR: Failed to load manifest: {e}", file=sys.stderr)
+        return 2
+    models_root = Path(args.models_root)
+    with tracer.span('find'):
+        model_paths = find_models(models_root, args.ignore)
+    if not model_paths:
+        print(f"No .model files under {models_root}", file=sys.stderr)
+        return 1
+    normal_models, brk_groups = core.split_models(model_paths)
+    print(f"{len(normal_models)} model(s) by template, plus {len(brk_groups)} bulletskeleton group(s):")
+    print(manifest.describe(normal_models))
+    if args.list:
+        return 0
+    failures = pipeline.generate(
+        None, model_paths, exe_path,
+        brk_template_path=args.brk_template,
+        models_root=models_root,
+        output_dir=args.output_dir,
+        workers=args.jobs,
+        force=args.force,
+        log=print,
+        tracer=tracer,
+        resolve=manifest,
+        validator=validator_for(args),
+    )
+    print(TEMPLATES.describe())
+    print(tracer.describe())
+    if failures:
+        print(f"{len(failures)} failed: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def validator_for(args):
+    return None if args.no_validate else default_validator()
+
+
+def cmd_validate(args):
+    start = time.perf_counter()
+    paths = find_documents(args.paths)
+    if not paths:
+        print(f"No gismo_rangers or bulletskeleton JSON under {', '.join(args.paths)}", file=sys.stderr)
+        return 1
+    problems = validate_files(paths, workers=args.jobs)
+    for problem in problems:
+        print(problem)
+    errors = [p for p in problems if not p.warning]
+    files = len({p.file for p in errors})
+    print(f"{len(errors)} problem(s) in {files} of {len(paths)} file(s), {len(problems) - len(errors)} warning(s) "
+          f"({time.perf_counter() - start:.2f}s)")
+    return 1 if errors else 0
+
+
+def refresh_index(index, args):
+    start = time.perf_counter()
+    indexed, removed, errors = index.refresh(args.ignore, log=print)
+    print(f"Index: {indexed} file(s) indexed, {removed} removed, {len(errors)} unreadable "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+def cmd_index(args):
+    with ParamIndex(args.root) as index:
+        refresh_index(index, args)
+        stats = index.stats()
+        print(f"{stats['files']} file(s), {stats['params']} value(s) over {stats['paths']} path(s) in {index.path}")
+    return 0
+
+
+def cmd_query(args):
+    try:
+        conditions = [parse_condition(c) for c in args.conditions]
+        assignments = dict(parse_assignment(a) for a in args.set)
+    except QueryError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    with ParamIndex(args.root) as index:
+        refresh_index(index, args)
+        start = time.perf_counter()
+        files = index.query(conditions)
+        elapsed = time.perf_counter() - start
+        shown = [segments for segments, _, _ in conditions] + [parse_condition(f"{p}=0")[0] for p in args.show]
+        values = {}
+        for segments in shown:
+            for file, found in index.values(files, segments).items():
+                values.setdefault(file, {}).update(found)
+        for file in files:
+            found = values.get(file) or {}
+            print(f"{file}  " + '  '.join(f"{p}={v}" for p, v in found.items()))
+        print(f"{len(files)} file(s) match ({elapsed * 1000:.1f} ms)")
+        if args.unpin and files:
+            paths = None if '*' in args.unpin else set(args.unpin)
+            if args.dry_run:
+                pinned = index.pinned(files)
+                print(f"Would unpin edits from {sum(1 for p in pinned.values() if paths is None or set(p) & paths)} file(s)")
+            else:
+                unpinned = index.unpin(files, paths)
+                print(f"Unpinned edits from {len(unpinned)} file(s); the next build regenerates them from their template")
+        if not assignments or not files:
+            return 0
+        if args.dry_run:
+            print(f"Would set {', '.join(f'{k}={v}' for k, v in assignments.items())} on {len(files)} file(s)")
+            return 0
+        try:
+            changed = index.update(files, assignments, validator_for(args), log=print)
+        except QueryError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        print(f"Updated {len(changed)} file(s); {len(files) - len(changed)} already had those values")
+        print(f"NOTE: these files are generated. The edits are pinned in each folder's {MANIFEST_NAME}, so `build` "
+              f"re-applies them when it regenerates the files; --unpin drops them.")
+    if args.reconvert and changed:
+        settings = core.load_settings()
+        exe_path = args.exe or settings.get("exe_path")
+        if not exe_path or not Path(exe_path).is_file():
+            print("Executable path not set or invalid; not reconverting.", file=sys.stderr)
+            return 1
+        failures = reconvert(args.root, changed, os.path.normpath(exe_path),
+                             workers=args.jobs, log=print)
+        if failures:
+            print(f"{len(failures)} failed: {', '.join(failures)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def root_of(path, roots):
+    for root in roots:
+        try:
+            path.relative_to(root)
+            return root
+        except ValueError:
+            continue
+    return None
+
+
+def cmd_watch(args):
+    settings = core.load_settings()
+    exe_path = args.exe or settings.get("exe_path")
+    if exe_path:
+        exe_path = os.path.normpath(exe_path)
+    try:
+        template_path = core.resolve_template_path(args.template)
+        TEMPLATES.get(template_path)
+    except Exception as e:
+        print(f"ERROR: Failed to load template: {e}", file=sys.stderr)
+        return 2
+    roots = [Path(r).resolve() for r in args.roots]
+    missing = [r for r in roots if not r.is_dir()]
+    if missing:
+        print(f"Not a folder: {', '.join(map(str, missing))}", file=sys.stderr)
+        return 1
+    pool = ConverterPool(exe_path, workers=args.jobs) if exe_path and Path(exe_path).is_file() else None
+
+    def on_batch(model_paths):
+        # Re-read through the registry so edits to the template on disk apply to the next burst.
+        try:
+            template = TEMPLATES.get(template_path)
+        except Exception as e:
+            print(f"ERROR: Failed to load template: {e}", file=sys.stderr)
+            return
+        by_root = {}
+        for path in model_paths:
+            by_root.setdefault(root_of(path, roots), []).append(path)
+        print(f"Changed: {', '.join(p.name for p in model_paths)}")
+        for root, paths in by_root.items():
+            failures = pipeline.generate(
+                template, paths, exe_path,
+                brk_template_path=args.brk_template,
+                models_root=root,
+                output_dir=args.output_dir,
+                pool=pool,
+                force=True,
+                log=print,
+                validator=validator_for(args),
+            )
+            if failures:
+                print(f"{len(failures)} failed: {', '.join(failures)}", file=sys.stderr)
+
+    print(f"Watching {', '.join(map(str, roots))} (Ctrl+C to stop)")
+    try:
+        watch(roots, on_batch, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gismo", description="Headless GismoBasher pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="generate gismos for every .model under a root")
+    build.add_argument("template", help="template name from templates/ or a path to a gismo JSON")
+    build.add_argument("models_root", help="folder searched recursively for .model files")
+    build.add_argument("output_dir", nargs="?", default=None,
+                       help="mirror outputs here instead of next to each model")
+    build.add_argument("--exe", default=None, help="path to KnuxTools (defaults to settings.json)")
+    build.add_argument("--brk-template", default=None, help="bulletskeleton template override")
+    build.add_argument("-j", "--jobs", type=int, default=None,
+                       help="concurrent converter runs (defaults to the CPU count)")
+    build.add_argument("--force", action="store_true",
+                       help="rebuild everything, ignoring the build manifests")
+    build.add_argument("--trace", default=None, metavar="FILE",
+                       help="write a Chrome/Perfetto trace-event JSON of the batch")
+    build.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                       help="skip files and folders matching PATTERN (repeatable; also read from .gismoignore)")
+    build.add_argument("--dry-run", action="store_true",
+                       help="print what would be built (missing or stale items) and exit")
+    build.add_argument("-v", "--verbose", action="store_true", help="with --dry-run, list current items too")
+    build.add_argument("--no-validate", action="store_true",
+                       help="skip checking templates against the schema before conversion")
+    build.set_defaults(func=cmd_build)
+
+    batch = sub.add_parser("batch", help="generate with per-model templates and overrides from a manifest")
+    batch.add_argument("manifest", help="CSV or JSON manifest of model globs, templates and dotted-path overrides")
+    batch.add_argument("models_root", help="folder searched recursively for .model files")
+    batch.add_argument("output_dir", nargs="?", default=None,
+                       help="mirror outputs here instead of next to each model")
+    batch.add_argument("--default-template", default=None,
+                       help="template for models no rule assigns one (otherwise they fail)")
+    batch.add_argument("--exe", default=None, help="path to KnuxTools (defaults to settings.json)")
+    batch.add_argument("--brk-template", default=None, help="bulletskeleton template override")
+    batch.add_argument("-j", "--jobs", type=int, default=None,
+                       help="concurrent converter runs (defaults to the CPU count)")
+    batch.add_argument("--force", action="store_true",
+                       help="rebuild everything, ignoring the build manifests")
+    batch.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                       help="skip files and folders matching PATTERN (repeatable; also read from .gismoignore)")
+    batch.add_argument("--list", action="store_true", help="only print how models are grouped")
+    batch.add_argument("--no-validate", action="store_true",
+                       help="skip checking templates against the schema before conversion")
+    batch.set_defaults(func=cmd_batch)
+
+    watch_cmd = sub.add_parser("watch", help="regenerate gismos as .model files under the roots change")
+    watch_cmd.add_argument("template", help="template name from templates/ or a path to a gismo JSON")
+    watch_cmd.add_argument("roots", nargs="+", help="model folders to watch, recursively")
+    watch_cmd.add_argument("--output-dir", default=None,
+                           help="mirror outputs here (relative to each root) instead of next to each model")
+    watch_cmd.add_argument("--exe", default=None, help="path to KnuxTools (defaults to settings.json)")
+    watch_cmd.add_argument("--brk-template", default=None, help="bulletskeleton template override")
+    watch_cmd.add_argument("-j", "--jobs", type=int, default=None,
+                           help="concurrent converter runs (defaults to the CPU count)")
+    watch_cmd.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                           help="seconds of quiet before a burst of changes is processed")
+    watch_cmd.add_argument("--no-validate", action="store_true",
+                           help="skip checking templates against the schema before conversion")
+    watch_cmd.set_defaults(func=cmd_watch)
+
+    validate = sub.add_parser("validate", help="check gismo_rangers and bulletskeleton JSON against the schema")
+    validate.add_argument("paths", nargs="+", help="files, or folders searched recursively")
+    validate.add_argument("-j", "--jobs", type=int, default=None,
+                          help="worker processes (defaults to the CPU count)")
+    validate.set_defaults(func=cmd_validate)
+
+    index = sub.add_parser("index", help="index the parameters of every gismo_rangers JSON under a root")
+    index.add_argument("root", help="mod folder searched recursively")
+    index.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                       help="skip files and folders matching PATTERN (repeatable; also read from .gismoignore)")
+    index.set_defaults(func=cmd_index)
+
+    query = sub.add_parser("query", help="find gismo_rangers JSON by parameter values, optionally bulk-edit them")
+    query.add_argument("root", help="mod folder searched recursively (the index is refreshed first)")
+    query.add_argument("conditions", nargs="*",
+                       help="PATH OP VALUE, all of which must hold, e.g. RigidBody.Type=Dynamic 'Mass>50'")
+    query.add_argument("--show", action="append", default=[], metavar="PATH",
+                       help="also print the values at PATH (repeatable)")
+    query.add_argument("--set", action="append", default=[], metavar="PATH=VALUE",
+                       help="set PATH on every matching file (repeatable); written as one batch")
+    query.add_argument("--unpin", action="append", nargs="?", const="*", default=[], metavar="PATH",
+                       help="drop the edits pinned on the matching files by earlier --set runs "
+                            "(all of them, or only PATH; repeatable)")
+    query.add_argument("--dry-run", action="store_true", help="with --set or --unpin, only report what would change")
+    query.add_argument("--no-validate", action="store_true",
+                       help="write edits even if they do not pass the schema")
+    query.add_argument("--reconvert", action="store_true", help="run the converter on the files that changed")
+    query.add_argument("--exe", default=None, help="path to KnuxTools (defaults to settings.json)")
+    query.add_argument("-j", "--jobs", type=int, default=None,
+                       help="concurrent converter runs (defaults to the CPU count)")
+    query.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                       help="skip files and folders matching PATTERN (repeatable; also read from .gismoignore)")
+    query.set_defaults(func=cmd_query)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,151 @@
+"""Qt-free building blocks of the gismo pipeline: templates, substitution and converter calls"""
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR       = Path(__file__).resolve().parent.parent
+SETTINGS_FILE  = BASE_DIR / 'settings.json'
+TEMPLATES_DIR  = BASE_DIR / 'templates'
+
+GISMO_SUFFIX       = '.hedgehog.gismo_rangers.json'
+SKELETON_SUFFIX    = '.hedgehog.bulletskeleton.json'
+BRK_TEMPLATE_NAME  = 'template_brk' + SKELETON_SUFFIX
+MODEL_PLACEHOLDER  = '{model_name}'
+GISMO_OUTPUT_EXTS  = ('gismod', 'gismop')
+
+# Fragment suffixes are capital letters (A, B, ..., AA) or numbers (1, 02, 117).
+BRK_FRAGMENT_RE  = re.compile(r'[A-Z]+|\d+')
+BRK_MODEL_RE     = re.compile(r'^(.+)_brk([A-Z]+|\d+)$')
+BRK_ROOT_NODE_RE = re.compile(r'\{model_name\}_brk')
+BRK_NODE_RE      = re.compile(r'\{model_name\}_brk([A-Z]+|\d+)__01')
+
+
+def load_settings(path=SETTINGS_FILE):
+    path = Path(path)
+    if not path.is_file():
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def load_template(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def resolve_template_path(name):
+    path = Path(name)
+    if path.is_file():
+        return path
+    for candidate in (TEMPLATES_DIR / name, TEMPLATES_DIR / f"{name}{GISMO_SUFFIX}"):
+        if candidate.is_file():
+            return candidate
+    raise FileNotFoundError(f"Missing template: {name}")
+
+
+def value_text(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return ''
+    return str(value)
+
+
+def model_name_generator(obj, name):
+    if isinstance(obj, dict):
+        new_dict = {}
+        for k, v in obj.items():
+            if k == "Mesh" and isinstance(v, str) and v == MODEL_PLACEHOLDER:
+                new_dict[k] = f"{name}_col"
+            else:
+                new_dict[k] = model_name_generator(v, name)
+        return new_dict
+
+    if isinstance(obj, list):
+        return [model_name_generator(v, name) for v in obj]
+
+    if isinstance(obj, str) and MODEL_PLACEHOLDER in obj:
+        return obj.replace(MODEL_PLACEHOLDER, name)
+
+    return obj
+
+
+def fragment_key(fragment):
+    """Sort key for fragment suffixes: A..Z, AA.., then numbers by value."""
+    if fragment.isdigit():
+        return (1, int(fragment), fragment)
+    return (0, len(fragment), fragment)
+
+
+def split_models(model_paths):
+    """Split .model paths into plain models and `_brk` groups keyed by (folder, prefix).
+
+    Fragments only group with fragments from the same folder, so same-named
+    breakables in different folders each get their own bulletskeleton. Each
+    group records the fragment suffixes and its folder, which is where the
+    bulletskeleton is written.
+    """
+    normal_models = []
+    brk_groups = {}
+    for mpath in model_paths:
+        model_path = Path(mpath)
+        m = BRK_MODEL_RE.match(model_path.stem)
+        if m:
+            group = brk_groups.setdefault((model_path.parent, m.group(1)),
+                                          {'fragments': set(), 'dir': model_path.parent})
+            group['fragments'].add(m.group(2))
+        else:
+            normal_models.append(model_path)
+    return normal_models, brk_groups
+
+
+def filter_bulletskeleton(nodes, fragments):
+    """Root and fragment nodes of a bulletskeleton template, keeping only `fragments`."""
+    filtered = []
+    for node in nodes:
+        node_name = node.get("NodeName", "")
+        if BRK_ROOT_NODE_RE.fullmatch(node_name):
+            filtered.append(node)
+            continue
+        m = BRK_NODE_RE.fullmatch(node_name)
+        if m and m.group(1) in fragments:
+            filtered.append(node)
+    return filtered
+
+
+def write_json(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def write_text(text, path):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def converter_command(exe_path, json_path):
+    exe_path = Path(exe_path)
+    # Python scripts (such as gismo/stub_converter.py) stand in for KnuxTools in tests.
+    if exe_path.suffix.lower() == '.py':
+        return [sys.executable, str(exe_path), str(json_path)]
+    return [str(exe_path), str(json_path)]
+
+
+def run_converter(exe_path, json_path, cwd=None):
+    exe_path = Path(exe_path)
+    return subprocess.run(
+        converter_command(exe_path, json_path),
+        cwd=str(cwd or exe_path.parent),
+        capture_output=True,
+        text=True
+    )
+
+
+def output_dir_for(model_dir, models_root=None, output_dir=None):
+    if output_dir is None:
+        return Path(model_dir)
+    if models_root is None:
+        return Path(output_dir)
+    return Path(output_dir) / Path(model_dir).relative_to(models_root)
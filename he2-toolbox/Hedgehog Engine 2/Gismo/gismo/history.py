@@ -0,0 +1,91 @@
+"""Undo history over persistent JSON documents.
+
+Documents are never edited in place. An edit builds a new root that copies
+only the containers on the path to the change and shares everything else
+with the previous version, so keeping every version costs one path per
+edit, not a copy of the document. A history entry is just the roots before
+and after plus the list of changes, which tells the tree which rows to
+refresh.
+"""
+
+
+def get_in(root, path):
+    value = root
+    for key in path:
+        value = value[key]
+    return value
+
+
+def assoc_in(root, path, value):
+    """New root with `value` at `path`; containers off the path are shared with `root`."""
+    if not path:
+        return value
+    key = path[0]
+    new = dict(root) if isinstance(root, dict) else list(root)
+    new[key] = assoc_in(root[key], path[1:], value)
+    return new
+
+
+def update_in(root, path, fn):
+    return assoc_in(root, path, fn(get_in(root, path)))
+
+
+def rename_in(root, parent_path, old_key, new_key):
+    """New root with `old_key` renamed to `new_key` in the dict at `parent_path`, keeping its position."""
+    return update_in(root, parent_path,
+                     lambda d: {(new_key if k == old_key else k): v for k, v in d.items()})
+
+
+class Edit:
+    """One undoable step. `changes` holds ('set', path) and ('rename', parent_path, old_key, new_key)."""
+
+    __slots__ = ('label', 'before', 'after', 'changes')
+
+    def __init__(self, label, before, after, changes):
+        self.label = label
+        self.before = before
+        self.after = after
+        self.changes = changes
+
+
+class History:
+    def __init__(self, limit=1000):
+        self.limit = limit
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def push(self, edit):
+        self.undo_stack.append(edit)
+        self.redo_stack.clear()
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0]
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        self.redo_stack.append(edit)
+        return edit
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        self.undo_stack.append(edit)
+        return edit
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo_label(self):
+        return self.undo_stack[-1].label if self.undo_stack else None
+
+    def redo_label(self):
+        return self.redo_stack[-1].label if self.redo_stack else None
@@ -0,0 +1,472 @@
+"""Lazy QAbstractItemModel over a parsed JSON document.
+
+Unlike the rest of the package this module needs PyQt6, so it is not imported
+by `gismo/__init__.py`. Rows are only created when a view expands a node
+(canFetchMore/fetchMore). The backing document is never edited in place:
+every edit swaps in a new root that shares all untouched containers with
+the old one (gismo.history), which makes undo a pointer swap followed by a
+refresh of just the rows that changed.
+"""
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, Qt, pyqtSignal
+
+from .core import value_text
+from .history import Edit, History, assoc_in, get_in, rename_in
+from .multidoc import Mixed, coerce
+
+KIND_ROLE = Qt.ItemDataRole.UserRole
+OPTIONS_ROLE = Qt.ItemDataRole.UserRole + 1
+PATH_ROLE = Qt.ItemDataRole.UserRole + 2
+
+FETCH_BATCH = 256
+
+
+def kind_of(value):
+    if isinstance(value, dict):
+        return 'dict'
+    if isinstance(value, list):
+        return 'list'
+    return 'value'
+
+
+def parse_value_text(txt):
+    if txt == '':
+        return None
+    try:
+        value = json.loads(txt)
+    except ValueError:
+        return txt
+    # A value cell stays a value; container literals are kept as text.
+    return txt if isinstance(value, (dict, list)) else value
+
+
+class JsonNode:
+    __slots__ = ('key', 'path', 'parent', 'row', 'kind', 'children', 'options')
+
+    def __init__(self, key, path, parent, row, kind, options=None):
+        self.key = key
+        self.path = path
+        self.parent = parent
+        self.row = row
+        self.kind = kind
+        self.children = [] if kind != 'value' else None
+        self.options = options
+
+
+class JsonDocumentModel(QAbstractItemModel):
+    keyRenamed = pyqtSignal(object, object)
+    # Emitted with the path of every changed value or renamed key, loaded or not.
+    pathChanged = pyqtSignal(object)
+    historyChanged = pyqtSignal()
+
+    def __init__(self, enum_map=None, boolean_enum=None, parent=None):
+        super().__init__(parent)
+        # Enum options are looked up by path suffix: one dict probe per
+        # distinct key length instead of a scan over the whole map.
+        self.enum_map = {tuple(k): v for k, v in (enum_map or {}).items()}
+        self.enum_lengths = sorted({len(k) for k in self.enum_map}, reverse=True)
+        self.boolean_enum = boolean_enum or []
+        self._doc = None
+        self._root = JsonNode(None, (), None, 0, 'value')
+        self.history = History()
+        self._group = None
+
+    # -- document access -------------------------------------------------
+
+    def set_document(self, data):
+        self.beginResetModel()
+        self._doc = data
+        self._root = JsonNode(None, (), None, 0, kind_of(data))
+        self.endResetModel()
+        self.history.clear()
+        self._group = None
+        self.historyChanged.emit()
+
+    def document(self):
+        return self._doc
+
+    def value_at(self, path):
+        return get_in(self._doc, path)
+
+    def has_path(self, path):
+        try:
+            get_in(self._doc, path)
+        except (KeyError, IndexError, TypeError):
+            return False
+        return True
+
+    def enum_options(self, path):
+        str_path = tuple(str(p) for p in path)
+        for n in self.enum_lengths:
+            if n <= len(str_path):
+                opts = self.enum_map.get(str_path[-n:])
+                if opts is not None:
+                    return opts
+        return None
+
+    def node(self, index):
+        if not index.isValid():
+            return self._root
+        return index.internalPointer()
+
+    def index_for_node(self, node, column=0):
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+    def index_for_path(self, path, column=0):
+        """Index of the row at `path`, fetching the rows on the way if needed."""
+        node = self._root
+        for key in path:
+            parent_index = self.index_for_node(node)
+            target = self._child_row(node, key)
+            while target >= len(node.children) and self.canFetchMore(parent_index):
+                self.fetchMore(parent_index)
+            if target >= len(node.children):
+                return QModelIndex()
+            node = node.children[target]
+        return self.index_for_node(node, column)
+
+    def _child_row(self, node, key):
+        if node.kind == 'list':
+            return key if isinstance(key, int) else int(key)
+        container = self.value_at(node.path)
+        for row, k in enumerate(container):
+            if k == key:
+                return row
+        return len(container)
+
+    # -- edits and history -----------------------------------------------
+
+    @contextmanager
+    def edit_group(self, label):
+        """Record every edit made inside the block as a single undo step."""
+        if self._group is not None:
+            yield
+            return
+        self._group = Edit(label, self._doc, None, [])
+        try:
+            yield
+        finally:
+            edit, self._group = self._group, None
+            if edit.changes:
+                edit.after = self._doc
+                self.history.push(edit)
+                self.historyChanged.emit()
+
+    def _record(self, label, before, change):
+        if self._group is not None:
+            self._group.changes.append(change)
+            return
+        self.history.push(Edit(label, before, self._doc, [change]))
+        self.historyChanged.emit()
+
+    def set_value(self, path, value, label=None):
+        """Replace the scalar at `path` and refresh its row if it is loaded."""
+        path = tuple(path)
+        before = self._doc
+        old = get_in(before, path)
+        if old == value and type(old) is type(value):
+            return
+        self._doc = assoc_in(before, path, value)
+        self._record(label or f"Edit {'.'.join(map(str, path))}", before, ('set', path))
+        self._refresh(path)
+        self.pathChanged.emit(path)
+
+    def set_values(self, items, label):
+        """Set many `(path, value)` pairs as one undo step."""
+        with self.edit_group(label):
+            for path, value in items:
+                self.set_value(path, value)
+
+    def _refresh(self, path):
+        index = self.loaded_index(path, 1)
+        if index.isValid():
+            self.dataChanged.emit(index.siblingAtColumn(0), index)
+
+    def undo(self):
+        edit = self.history.undo()
+        if edit is None:
+            return False
+        self._doc = edit.before
+        self._replay(edit.changes[::-1], undo=True)
+        return True
+
+    def redo(self):
+        edit = self.history.redo()
+        if edit is None:
+            return False
+        self._doc = edit.after
+        self._replay(edit.changes, undo=False)
+        return True
+
+    def _replay(self, changes, undo):
+        # The document is already swapped; bring loaded rows in line with it.
+        # Renames reshape the row tree, so they go first and values after.
+        touched = []
+        for change in changes:
+            if change[0] != 'rename':
+                continue
+            _, parent_path, old_key, new_key = change
+            if undo:
+                old_key, new_key = new_key, old_key
+            node = self._loaded_node(parent_path + (old_key,))
+            if node is not None:
+                self._rename_node(node, new_key)
+            else:
+                self.keyRenamed.emit(parent_path + (old_key,), parent_path + (new_key,))
+            touched.append(parent_path + (new_key,))
+        for change in changes:
+            if change[0] == 'set' and self.has_path(change[1]):
+                self._refresh(change[1])
+                touched.append(change[1])
+        for path in touched:
+            if self.has_path(path):
+                self.pathChanged.emit(path)
+        self.historyChanged.emit()
+
+    def _loaded_node(self, path):
+        """Loaded row at `path`, found through the row tree rather than the document."""
+        node = self._root
+        for key in path:
+            if not node.children:
+                return None
+            if node.kind == 'list':
+                node = node.children[key] if isinstance(key, int) and key < len(node.children) else None
+            else:
+                node = next((c for c in node.children if c.key == key), None)
+            if node is None:
+                return None
+        return node
+
+    def loaded_index(self, path, column=0):
+        """Index of the row at `path` if it has been fetched, without fetching anything."""
+        node = self._root
+        for key in path:
+            if node.children is None:
+                return QModelIndex()
+            row = self._child_row(node, key)
+            if row >= len(node.children):
+                return QModelIndex()
+            node = node.children[row]
+        return self.index_for_node(node, column)
+
+    def loaded_paths(self):
+        stack = list(self._root.children or ())
+        while stack:
+            node = stack.pop()
+            yield node.path
+            if node.children:
+                stack.extend(node.children)
+
+    # -- QAbstractItemModel ---------------------------------------------
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node(parent)
+        if node.children is None or not 0 <= row < len(node.children) or not 0 <= column < 2:
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer().parent
+        if node is None or node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self.node(parent)
+        return len(node.children) if node.children is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 2
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        if node.kind == 'value' or parent.column() > 0:
+            return False
+        if self._doc is None:
+            return False
+        return len(self.value_at(node.path)) > 0
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        if node.kind == 'value' or self._doc is None:
+            return False
+        return len(node.children) < len(self.value_at(node.path))
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        container = self.value_at(node.path)
+        start = len(node.children)
+        if node.kind == 'dict':
+            items = list(islice(container.items(), start, start + FETCH_BATCH))
+        else:
+            items = list(enumerate(container[start:start + FETCH_BATCH], start))
+        if not items:
+            return
+        self.beginInsertRows(parent, start, start + len(items) - 1)
+        for offset, (key, value) in enumerate(items):
+            path = node.path + (key,)
+            kind = kind_of(value)
+            options = self.enum_options(path) if kind == 'value' else None
+            node.children.append(JsonNode(key, path, node, start + offset, kind, options))
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return ("Key", "Value")[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        node = index.internalPointer()
+        if index.column() == 1 and node.kind == 'value':
+            flags |= Qt.ItemFlag.ItemIsEditable
+        elif index.column() == 0 and node.parent is not None and node.parent.kind == 'dict':
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if column == 0:
+                return str(node.key)
+            if node.kind == 'value':
+                return value_text(self.value_at(node.path))
+            return ''
+        if role == KIND_ROLE and column == 0:
+            return node.kind
+        if role == PATH_ROLE:
+            return node.path
+        if role == OPTIONS_ROLE and column == 1 and node.kind == 'value':
+            if node.options is not None:
+                return node.options
+            if value_text(self.value_at(node.path)) in self.boolean_enum:
+                return self.boolean_enum
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        node = index.internalPointer()
+        if index.column() == 1 and node.kind == 'value':
+            self.set_value(node.path, parse_value_text(value))
+            return True
+        if index.column() == 0 and node.parent is not None and node.parent.kind == 'dict':
+            return self.rename_key(node, str(value))
+        return False
+
+    def rename_key(self, node, new_key):
+        old_key = node.key
+        if new_key == old_key:
+            return True
+        parent_path = node.parent.path
+        if new_key in self.value_at(parent_path):
+            return False
+        before = self._doc
+        self._doc = rename_in(before, parent_path, old_key, new_key)
+        self._record(f"Rename {old_key} to {new_key}", before, ('rename', parent_path, old_key, new_key))
+        self._rename_node(node, new_key)
+        self.pathChanged.emit(node.path)
+        return True
+
+    def _rename_node(self, node, new_key):
+        old_path = node.path
+        self._repath(node, node.parent.path + (new_key,))
+        node.key = new_key
+        self.keyRenamed.emit(old_path, node.path)
+        index = self.index_for_node(node)
+        self.dataChanged.emit(index, index)
+
+    def _repath(self, node, path):
+        node.path = path
+        if node.kind == 'value':
+            node.options = self.enum_options(path)
+            return
+        for child in node.children:
+            self._repath(child, path + (child.key,))
+
+
+class MergedDocumentModel(JsonDocumentModel):
+    """Merged view of a gismo.multidoc.DocumentSet; editing a value sets it in every selected document.
+
+    Keys cannot be renamed here. Undo and redo step through the set's own
+    history, and since they change many documents at once the view is
+    rebuilt from the set rather than replayed row by row.
+    """
+
+    def __init__(self, documents, enum_map=None, boolean_enum=None, parent=None):
+        super().__init__(enum_map, boolean_enum, parent)
+        self.documents = documents
+        self.history = documents.history
+        self.selection = []
+        self.only_differing = True
+
+    def refresh(self):
+        self.beginResetModel()
+        self._doc = self.documents.merged(self.selection, self.only_differing)
+        self._root = JsonNode(None, (), None, 0, kind_of(self._doc))
+        self.endResetModel()
+        self.historyChanged.emit()
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == 0:
+            flags &= ~Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        # A mixed cell opens empty rather than with its summary text.
+        if role == Qt.ItemDataRole.EditRole and index.isValid() and index.column() == 1:
+            node = index.internalPointer()
+            if node.kind == 'value' and isinstance(self.value_at(node.path), Mixed):
+                return ''
+        return super().data(index, role)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or index.column() != 1:
+            return False
+        node = index.internalPointer()
+        if node.kind != 'value':
+            return False
+        if value == '' and isinstance(self.value_at(node.path), Mixed):
+            return False
+        self.set_value(node.path, parse_value_text(value))
+        return True
+
+    def set_value(self, path, value, label=None):
+        path = tuple(path)
+        old = get_in(self._doc, path)
+        if not isinstance(old, Mixed) and old == value and type(old) is type(value):
+            return
+        changed, _ = self.documents.set_value(path, value, self.selection, label)
+        if not changed:
+            return
+        self._doc = assoc_in(self._doc, path, coerce(old, value))
+        self._refresh(path)
+        self.pathChanged.emit(path)
+        self.historyChanged.emit()
+
+    def undo(self):
+        if not self.documents.undo():
+            return False
+        self.refresh()
+        return True
+
+    def redo(self):
+        if not self.documents.redo():
+            return False
+        self.refresh()
+        return True
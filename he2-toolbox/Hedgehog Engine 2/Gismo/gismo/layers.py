@@ -0,0 +1,125 @@
+"""Layered templates: a base template plus small overlay patches.
+
+An overlay is a template file that names its base and lists only what
+differs:
+
+    {"$base": "default",
+     "$set": {"Design.BasicParameters.SkeletonName": "{model_name}_brk",
+              "Plan.ContactDamageType": "HighSpeed"}}
+
+`$base` is a template name or a path, looked up next to the overlay first
+and then like any other template, and may itself be an overlay. `$set`
+takes full dotted paths from the document root (list items by index),
+unlike manifest overrides, which match path suffixes. `$patch` is a JSON
+merge patch (RFC 7386) applied before `$set`, for adding or removing keys.
+Anything else in an overlay is an error, so a typo fails loudly instead of
+silently producing the base template.
+"""
+from pathlib import Path
+
+from .core import GISMO_SUFFIX, resolve_template_path
+
+BASE_KEY   = '$base'
+SET_KEY    = '$set'
+PATCH_KEY  = '$patch'
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def is_overlay(data):
+    return isinstance(data, dict) and BASE_KEY in data
+
+
+def base_path(overlay, path):
+    """Resolved path of the layer `overlay` (read from `path`) is built on."""
+    name = overlay[BASE_KEY]
+    if not isinstance(name, str) or not name:
+        raise TemplateError(f"{Path(path).name}: '{BASE_KEY}' must be a template name")
+    folder = Path(path).parent
+    for candidate in (folder / name, folder / f"{name}{GISMO_SUFFIX}"):
+        if candidate.is_file():
+            return candidate.resolve()
+    try:
+        return resolve_template_path(name).resolve()
+    except FileNotFoundError:
+        raise TemplateError(f"{Path(path).name}: base template '{name}' not found") from None
+
+
+def merge_patch(target, patch):
+    """RFC 7386 merge patch; returns a new document and leaves `target` alone."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def set_path(document, dotted, value):
+    """Set the value at a full dotted path in place; the path must already exist."""
+    parent = document
+    keys = dotted.split('.')
+    try:
+        for key in keys[:-1]:
+            parent = parent[int(key)] if isinstance(parent, list) else parent[key]
+        last = int(keys[-1]) if isinstance(parent, list) else keys[-1]
+        old = parent[last]
+    except (KeyError, IndexError, ValueError, TypeError):
+        raise TemplateError(f"'{dotted}' is not a path in the base template") from None
+    # Keep float fields floats when an overlay says 300 rather than 300.0.
+    if isinstance(old, float) and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    parent[last] = value
+
+
+def apply_overlay(base, overlay, name='overlay'):
+    """New document: `base` with the overlay's merge patch and dotted sets applied.
+
+    Containers the overlay does not touch are shared with `base`, which is
+    never modified.
+    """
+    unknown = set(overlay) - {BASE_KEY, SET_KEY, PATCH_KEY}
+    if unknown:
+        raise TemplateError(f"{name}: unknown overlay key(s) {', '.join(sorted(unknown))}")
+    document = base
+    if overlay.get(PATCH_KEY):
+        document = merge_patch(document, overlay[PATCH_KEY])
+    for dotted, value in (overlay.get(SET_KEY) or {}).items():
+        document = copy_path(document, dotted)
+        try:
+            set_path(document, dotted, value)
+        except TemplateError as e:
+            raise TemplateError(f"{name}: {e}") from None
+    return document
+
+
+def copy_path(document, dotted):
+    """Copy of `document` with fresh containers along `dotted`, so set_path can write there."""
+    root = document = copy_container(document)
+    for key in dotted.split('.')[:-1]:
+        if isinstance(document, list):
+            try:
+                key = int(key)
+            except ValueError:
+                return root
+        try:
+            child = document[key]
+        except (KeyError, IndexError, TypeError):
+            return root
+        if not isinstance(child, (dict, list)):
+            return root
+        document[key] = document = copy_container(child)
+    return root
+
+
+def copy_container(value):
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
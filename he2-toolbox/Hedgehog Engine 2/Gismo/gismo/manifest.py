@@ -0,0 +1,195 @@
+"""Batch manifests: which template and parameter overrides each model gets.
+
+A manifest is a list of rules. Each rule has a `match` glob, an optional
+`template` name and optional overrides keyed by dotted path. JSON form:
+
+    {"rules": [
+        {"match": "*.model", "template": "default"},
+        {"match": "stage01/*_door*.model", "template": "animated",
+         "set": {"RangeIn": 300, "PhysicsParam.Mass": 5}}
+    ]}
+
+CSV form: a `match` column, an optional `template` column, and one column
+per dotted path; empty cells set nothing.
+
+Globs are matched against the model path relative to the manifest's folder
+(`*` also crosses folders), or against the file name for models outside it.
+Every matching rule applies in order: the last template wins and overrides
+are merged. A dotted path is a suffix, like the tree's path queries, and
+sets every matching key in the template (`PhysicsParam.Mass` sets
+Design.RigidBody.PhysicsParam.Mass).
+"""
+import csv
+import json
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from .core import resolve_template_path
+from .registry import TEMPLATES, copy_document
+
+
+class ManifestError(ValueError):
+    pass
+
+
+class Rule:
+    def __init__(self, match, template=None, overrides=None):
+        self.match = match.replace('\\', '/')
+        self.template = template or None
+        self.overrides = dict(overrides or {})
+
+    def matches(self, rel_path):
+        return fnmatchcase(rel_path, self.match) or fnmatchcase(rel_path.rsplit('/', 1)[-1], self.match)
+
+
+def parse_cell(text):
+    text = text.strip()
+    if text == '':
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def load_rules(path):
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or 'match' not in reader.fieldnames:
+                raise ManifestError(f"{path.name}: CSV manifests need a 'match' column")
+            rules = []
+            for row in reader:
+                if not (row.get('match') or '').strip():
+                    continue
+                overrides = {k: parse_cell(v) for k, v in row.items()
+                             if k not in ('match', 'template') and k and v is not None and v.strip() != ''}
+                rules.append(Rule(row['match'].strip(), (row.get('template') or '').strip(), overrides))
+            return rules
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('rules', [])
+    rules = []
+    for i, entry in enumerate(data):
+        if not isinstance(entry, dict) or 'match' not in entry:
+            raise ManifestError(f"{path.name}: rule {i + 1} has no 'match'")
+        rules.append(Rule(entry['match'], entry.get('template'), entry.get('set')))
+    return rules
+
+
+def override_paths(document, dotted):
+    """Paths in `document` whose tail equals the dotted path."""
+    segments = tuple(dotted.split('.'))
+    found = []
+    stack = [(document, ())]
+    while stack:
+        value, path = stack.pop()
+        if len(path) >= len(segments) and tuple(str(p) for p in path[-len(segments):]) == segments:
+            found.append(path)
+        if isinstance(value, dict):
+            stack.extend((v, path + (k,)) for k, v in value.items())
+        elif isinstance(value, list):
+            stack.extend((v, path + (i,)) for i, v in enumerate(value))
+    return found
+
+
+def apply_overrides(document, overrides):
+    """Copy of `document` with every override set; the shared document is not touched."""
+    if not overrides:
+        return document
+    document = copy_document(document)
+    for dotted, value in overrides.items():
+        paths = override_paths(document, dotted)
+        if not paths:
+            raise ManifestError(f"Override '{dotted}' matches nothing in the template")
+        for path in paths:
+            parent = document
+            for key in path[:-1]:
+                parent = parent[key]
+            old = parent[path[-1]]
+            # Keep float fields floats when a manifest says 300 rather than 300.0.
+            if isinstance(old, float) and isinstance(value, int) and not isinstance(value, bool):
+                parent[path[-1]] = float(value)
+            else:
+                parent[path[-1]] = value
+    return document
+
+
+class Manifest:
+    """Resolves each model to its (template, overrides) group, compiling each group's document once.
+
+    Called with a model path it returns `(key, document)`, or None when no
+    rule gives the model a template and there is no default. Models with
+    the same key share the same document object, so the pipeline compiles
+    one plan per group.
+    """
+
+    def __init__(self, rules, base_dir, default=None, default_label='current'):
+        self.rules = list(rules)
+        self.base_dir = Path(base_dir).resolve()
+        self.default = default
+        self.default_label = default_label
+        self._documents = {}
+
+    @classmethod
+    def load(cls, path, default=None, default_label='current'):
+        path = Path(path)
+        return cls(load_rules(path), path.parent, default, default_label)
+
+    def relative(self, model_path):
+        path = Path(model_path).resolve()
+        try:
+            return path.relative_to(self.base_dir).as_posix()
+        except ValueError:
+            return path.name
+
+    def key_for(self, model_path):
+        rel = self.relative(model_path)
+        template = None
+        overrides = {}
+        for rule in self.rules:
+            if rule.matches(rel):
+                template = rule.template or template
+                overrides.update(rule.overrides)
+        if template is None and self.default is None:
+            return None
+        # Values go into the key as JSON so lists and dicts stay hashable.
+        return template, tuple((k, json.dumps(v, sort_keys=True)) for k, v in sorted(overrides.items()))
+
+    def document(self, key):
+        doc = self._documents.get(key)
+        if doc is None:
+            template, overrides = key
+            base = TEMPLATES.get(resolve_template_path(template)) if template else self.default
+            overrides = {k: json.loads(v) for k, v in overrides}
+            doc = self._documents[key] = apply_overrides(base, overrides)
+        return doc
+
+    def __call__(self, model_path):
+        key = self.key_for(model_path)
+        if key is None:
+            return None
+        return key, self.document(key)
+
+    def label(self, key):
+        template, overrides = key
+        text = template or self.default_label
+        if overrides:
+            text += ' ' + ', '.join(f"{k}={v}" for k, v in overrides)
+        return text
+
+    def group(self, model_paths):
+        """Models by resolved group, in first-seen order; unmatched models under None."""
+        groups = {}
+        for path in model_paths:
+            groups.setdefault(self.key_for(path), []).append(path)
+        return groups
+
+    def describe(self, model_paths):
+        lines = []
+        for key, paths in self.group(model_paths).items():
+            label = "no template" if key is None else self.label(key)
+            lines.append(f"  {len(paths):>6}  {label}")
+        return "\n".join(lines)
@@ -0,0 +1,342 @@
+"""Many gismo documents held at once, for bulk edits.
+
+Documents are parsed into interned storage: every string, number and
+container goes through one table shared by the whole set, so a subtree that
+several files have in common (most of a template, for gismos made from the
+same one) is stored once and compared by identity. Memory grows with the
+number of distinct subtrees rather than with files times template size, and
+merging the documents into one view only descends where they diverge.
+
+Edits are persistent, as in gismo.history: new roots share everything off
+the edited path. An undo step keeps the previous roots of every document,
+which is one pointer per file, so loading more files keeps the history.
+Saving writes only the files whose document is no longer the one loaded,
+and only if their text changes. Since gismos are generated, the edited
+values are also pinned in the build manifest (see gismo.buildcache) so a
+rebuild keeps them.
+"""
+import json
+from collections import Counter
+from pathlib import Path
+
+from .buildcache import BuildCache
+from .core import GISMO_SUFFIX, value_text
+from .history import Edit, History, get_in
+from .layers import is_overlay
+from .output import write_bytes_atomic, write_if_changed
+from .schema import GISMO, document_kind, dotted
+
+MIXED_SHOWN = 4   # distinct values listed in a mixed cell before "..."
+
+
+class BulkEditError(ValueError):
+    pass
+
+
+class Missing:
+    """Stands in for a path a document does not have."""
+
+    def __repr__(self):
+        return '(missing)'
+
+
+MISSING = Missing()
+
+
+def same_value(a, b):
+    # 1, 1.0 and True are equal in Python but not in the file.
+    return a is b or (type(a) is type(b) and a == b)
+
+
+def changed_leaves(before, after, path=()):
+    """(path, value) for every scalar of `after` that differs from `before`; shared subtrees are skipped."""
+    if before is after:
+        return []
+    if isinstance(before, dict) and isinstance(after, dict):
+        return [leaf for k, v in after.items() for leaf in changed_leaves(before.get(k, MISSING), v, path + (k,))]
+    if isinstance(before, list) and isinstance(after, list) and len(before) == len(after):
+        return [leaf for i, (b, a) in enumerate(zip(before, after)) for leaf in changed_leaves(b, a, path + (i,))]
+    return [] if same_value(before, after) else [(path, after)]
+
+
+def coerce(old, value):
+    """Keep float fields floats when the edit says 300 rather than 300.0."""
+    if isinstance(old, float) and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+class Mixed:
+    """A leaf whose value differs across the merged documents."""
+
+    __slots__ = ('counts',)
+
+    def __init__(self, values):
+        self.counts = Counter(self.label(v) for v in values)
+
+    @staticmethod
+    def label(value):
+        if value is MISSING:
+            return repr(value)
+        if isinstance(value, (dict, list)):
+            return '(object)' if isinstance(value, dict) else '(list)'
+        return json.dumps(value) if isinstance(value, str) else value_text(value)
+
+    def __str__(self):
+        common = self.counts.most_common()
+        shown = ', '.join(f"{label} ×{n}" for label, n in common[:MIXED_SHOWN])
+        more = ', ...' if len(common) > MIXED_SHOWN else ''
+        return f"<mixed: {shown}{more}>"
+
+
+class Interner:
+    """One shared copy of every distinct scalar and container."""
+
+    def __init__(self):
+        self.table = {}
+
+    def __len__(self):
+        return len(self.table)
+
+    def scalar(self, value):
+        t = type(value)
+        if t is str:
+            key = value
+        elif t is float:
+            # repr keeps 0.0 and -0.0 (and 1.0 and 1) apart.
+            key = ('f', repr(value))
+        elif t is int:
+            key = ('i', value)
+        else:
+            return value
+        return self.table.setdefault(key, value)
+
+    def container(self, value):
+        """The shared container equal to `value`, whose children must already be interned."""
+        if isinstance(value, dict):
+            key = ('d', *(x for k, v in value.items() for x in (k, id(v))))
+        else:
+            key = ('l',) + tuple(id(v) for v in value)
+        return self.table.setdefault(key, value)
+
+    def value(self, value):
+        if isinstance(value, dict):
+            return self.container({self.scalar(k): self.value(v) for k, v in value.items()})
+        if isinstance(value, list):
+            return self.container([self.value(v) for v in value])
+        return self.scalar(value)
+
+    def _pairs(self, pairs):
+        # json calls this bottom-up, so nested objects are interned already;
+        # an object seen before is returned without building a new dict.
+        # Inlined scalar(): this runs once per object in every file.
+        table = self.table
+        items = []
+        ids = []
+        for k, v in pairs:
+            t = type(v)
+            if t is str:
+                v = table.setdefault(v, v)
+            elif t is float:
+                v = table.setdefault(('f', repr(v)), v)
+            elif t is int:
+                v = table.setdefault(('i', v), v)
+            elif t is list:
+                v = self.value(v)
+            items.append((k, v))
+            ids.append(k)
+            ids.append(id(v))
+        key = ('d', *ids)
+        obj = table.get(key)
+        if obj is None:
+            obj = table[key] = dict(items)
+        return obj
+
+    def loads(self, text):
+        document = json.loads(text, object_pairs_hook=self._pairs)
+        return self.value(document) if isinstance(document, list) else self.scalar(document)
+
+
+class DocumentSet:
+    """Gismo JSON files loaded for bulk editing; selections are lists of document indices."""
+
+    def __init__(self):
+        self.interner = Interner()
+        self.paths = []
+        self.loaded = []
+        self.documents = []
+        self.history = History()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def load(self, paths):
+        """Add the files at `paths`; returns (path, message) for the ones that could not be loaded."""
+        known = set(self.paths)
+        errors = []
+        for path in paths:
+            path = Path(path)
+            if path in known:
+                continue
+            try:
+                document = self.interner.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                errors.append((path, str(e)))
+                continue
+            if is_overlay(document):
+                # Saving the resolved document would flatten the overlay into a full copy.
+                errors.append((path, "layered template; edit its base or its $set instead"))
+                continue
+            known.add(path)
+            self.paths.append(path)
+            self.loaded.append(document)
+            self.documents.append(document)
+        return errors
+
+    def changed(self):
+        return [i for i, (doc, loaded) in enumerate(zip(self.documents, self.loaded)) if doc is not loaded]
+
+    def merged(self, indices, only_differing=True):
+        """One document over the selected ones; leaves that differ hold a Mixed.
+
+        With `only_differing`, branches that are the same in every document
+        are left out; a list that differs anywhere is kept whole, so its
+        items keep their indices.
+        """
+        documents = [self.documents[i] for i in indices]
+        if not documents:
+            return {}
+        merged, differs = self._merge(documents, only_differing)
+        if only_differing and not differs:
+            return {}
+        return merged
+
+    def _merge(self, values, only_differing):
+        first = values[0]
+        if all(v is first for v in values):
+            return first, False
+        if all(isinstance(v, dict) for v in values):
+            keys = dict.fromkeys(k for v in values for k in v)
+            merged = {}
+            differs = False
+            for k in keys:
+                child, child_differs = self._merge([v.get(k, MISSING) for v in values], only_differing)
+                if child_differs or not only_differing:
+                    merged[k] = child
+                differs = differs or child_differs
+            return merged, differs
+        if all(isinstance(v, list) and len(v) == len(first) for v in values):
+            items = [self._merge([v[i] for v in values], False) for i in range(len(first))]
+            return [item for item, _ in items], any(d for _, d in items)
+        if all(same_value(v, first) for v in values):
+            return first, False
+        return Mixed(values), True
+
+    def set_value(self, path, value, indices, label=None):
+        """Set the scalar at `path` in the selected documents, as one undo step.
+
+        Documents without that scalar are left alone. Returns (changed, skipped)
+        document counts.
+        """
+        path = tuple(path)
+        before = tuple(self.documents)
+        changed = skipped = 0
+        for i in indices:
+            document = self.documents[i]
+            try:
+                old = get_in(document, path)
+            except (KeyError, IndexError, TypeError):
+                skipped += 1
+                continue
+            if isinstance(old, (dict, list)):
+                skipped += 1
+                continue
+            new = coerce(old, value)
+            if same_value(old, new):
+                continue
+            self.documents[i] = self._assoc(document, path, self.interner.scalar(new))
+            changed += 1
+        if changed:
+            label = label or f"Set {dotted(path)} in {changed} file(s)"
+            self.history.push(Edit(label, before, tuple(self.documents), [('set', path)]))
+        return changed, skipped
+
+    def _assoc(self, root, path, value):
+        # history.assoc_in, with each new container interned so equal edits share storage.
+        if not path:
+            return value
+        key = path[0]
+        new = dict(root) if isinstance(root, dict) else list(root)
+        new[key] = self._assoc(root[key], path[1:], value)
+        return self.interner.container(new)
+
+    def undo(self):
+        edit = self.history.undo()
+        if edit is None:
+            return False
+        self._restore(edit.before)
+        return True
+
+    def redo(self):
+        edit = self.history.redo()
+        if edit is None:
+            return False
+        self._restore(edit.after)
+        return True
+
+    def _restore(self, snapshot):
+        # Files are only ever appended, so a snapshot covers a prefix of the
+        # set; files loaded after the edit keep their current document.
+        self.documents[:len(snapshot)] = snapshot
+
+    def save(self, validator=None, log=print):
+        """Write every changed document back to its file. Returns the paths actually written.
+
+        With a `validator` (gismo.schema.Validator) nothing is written if any
+        changed document has problems. If a write fails, files already
+        replaced get their old bytes back before the error is raised. The
+        values changed in gismo files are then pinned in their build manifest.
+        """
+        targets = self.changed()
+        problems = []
+        if validator is not None:
+            for i in targets:
+                kind = document_kind(self.paths[i])
+                if kind is not None:
+                    warnings = []
+                    problems += [f"{self.paths[i].name}: {dotted(p)}: {m}"
+                                 for p, m in validator.check(self.documents[i], kind, warnings=warnings)]
+                    for p, m in warnings:
+                        log(f"{self.paths[i].name}: {dotted(p)}: warning: {m}")
+        if problems:
+            for problem in problems:
+                log(problem)
+            raise BulkEditError(f"{len(problems)} problem(s); no files were changed")
+
+        written = []
+        try:
+            for i in targets:
+                path = self.paths[i]
+                original = path.read_bytes()
+                if write_if_changed(json.dumps(self.documents[i], indent=2), path):
+                    written.append((path, original))
+        except BaseException:
+            for path, original in written:
+                write_bytes_atomic(original, path)
+            raise
+        cache = BuildCache()
+        for i in targets:
+            path = self.paths[i]
+            if document_kind(path) != GISMO:
+                log(f"{path.name}: not a gismo, so the edits are not pinned; a rebuild overwrites them")
+                continue
+            edits = {dotted(p): v for p, v in changed_leaves(self.loaded[i], self.documents[i])}
+            if edits:
+                cache.manifest(path.parent).pin(path.name[:-len(GISMO_SUFFIX)], edits)
+        cache.save()
+        for i in targets:
+            self.loaded[i] = self.documents[i]
+        return [path for path, _ in written]
+
+    def stats(self):
+        return {'documents': len(self.documents), 'interned': len(self.interner)}
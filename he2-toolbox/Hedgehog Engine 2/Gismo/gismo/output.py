@@ -0,0 +1,90 @@
+"""Atomic, write-if-changed output for generated files.
+
+A file whose content would not change is left alone, so its mtime stays put
+and packers and VCS scans downstream see nothing new. Content is compared by
+size first and only hashed when the sizes match. Real writes go to a temp
+file in the target folder and are renamed over the target, so an interrupted
+run never leaves a truncated file behind.
+"""
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from .buildcache import sha256_bytes, sha256_file
+
+
+def same_content(path, data):
+    """True if the file at `path` holds exactly `data`."""
+    try:
+        size = os.stat(path).st_size
+    except OSError:
+        return False
+    return size == len(data) and sha256_file(path) == sha256_bytes(data)
+
+
+def same_file_content(path, other):
+    try:
+        size, other_size = os.stat(path).st_size, os.stat(other).st_size
+    except OSError:
+        return False
+    return size == other_size and sha256_file(path) == sha256_file(other)
+
+
+def temp_path(path):
+    # Not mkstemp: its 0600 mode would survive the rename; this file gets the
+    # usual permissions from the umask.
+    return path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def write_bytes_atomic(data, path):
+    path = Path(path)
+    tmp = temp_path(path)
+    try:
+        with open(tmp, 'xb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def encode_text(text):
+    # Same bytes as the text-mode writes this replaces: platform newlines.
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode('utf-8')
+
+
+def write_if_changed(data, path):
+    """Write `data` (str or bytes) to `path` unless it already holds it. Returns True if written."""
+    if isinstance(data, str):
+        data = encode_text(data)
+    if same_content(path, data):
+        return False
+    write_bytes_atomic(data, path)
+    return True
+
+
+def move_if_changed(src, dst):
+    """Move `src` over `dst` unless `dst` already has the same content, in which case `src` is dropped.
+
+    Returns True if `dst` was replaced. A move across filesystems is copied
+    to a temp file next to `dst` first so the replace is still atomic.
+    """
+    src, dst = Path(src), Path(dst)
+    if same_file_content(dst, src):
+        src.unlink(missing_ok=True)
+        return False
+    try:
+        os.replace(src, dst)
+    except OSError:
+        tmp = temp_path(dst)
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        src.unlink(missing_ok=True)
+    return True
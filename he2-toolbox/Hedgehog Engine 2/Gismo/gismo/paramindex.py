@@ -0,0 +1,345 @@
+"""SQLite index of the parameters in every gismo_rangers JSON under a mod root.
+
+Each file is flattened into one row per non-null scalar: (file, dotted path,
+value), with the value stored typed so numbers compare as numbers. Dotted paths are
+kept once in their own table. The index lives in the per-user cache folder,
+one file per root, so nothing is added to the mod, and is refreshed
+incrementally: only files whose mtime or size changed are re-read, and
+deleted files are dropped.
+
+Queries use the tree filter's path syntax with a comparison, all of which
+must hold for a file to match:
+
+    RigidBody.Type=Dynamic  PhysicsParam.Mass>50  Design.*.Shape!=box
+
+The path is a dotted suffix (`*` is any one segment) and string compares
+ignore case; a number only matches numbers. `update` then sets dotted-path
+overrides, like a manifest's `set`, on every matching file: all documents
+are rebuilt and validated before the first write, and a failed write
+restores the files already replaced, so a batch lands whole or not at all.
+
+These are generated files, so the overrides are also pinned in each file's
+build manifest entry: a later `build` regenerates the file from its template
+with the edits applied, until `unpin` drops them.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+from .buildcache import BuildCache
+from .core import GISMO_SUFFIX, GISMO_OUTPUT_EXTS, value_text
+from .manifest import apply_overrides, parse_cell
+from .output import write_bytes_atomic, write_if_changed
+from .pipeline import log_result
+from .pool import ConverterJob, ConverterPool
+from .scan import root_ignore
+from .schema import GISMO, dotted
+from .search import path_matches
+
+INDEX_DIR      = Path(os.environ.get("LOCALAPPDATA") or Path.home() / ".cache") / "he2-toolbox" / "gismo_params"
+INDEX_VERSION  = 1
+
+CONDITION_RE = re.compile(r'^\s*([^<>=!]+?)\s*(<=|>=|!=|=|<|>)\s*(.*?)\s*$')
+SQL_OPS = {'=': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL,
+                                  mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS paths (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS params (file_id INTEGER NOT NULL, path_id INTEGER NOT NULL, value);
+"""
+INDEXES = {
+    'params_by_path': "CREATE INDEX IF NOT EXISTS params_by_path ON params (path_id, value)",
+    'params_by_file': "CREATE INDEX IF NOT EXISTS params_by_file ON params (file_id)",
+}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def flatten(value, path='', out=None):
+    """(dotted path, value) for every non-null scalar; booleans become 'true'/'false' so they are not numbers."""
+    out = [] if out is None else out
+    if isinstance(value, dict):
+        prefix = f"{path}." if path else ''
+        for k, v in value.items():
+            flatten(v, prefix + k, out)
+    elif isinstance(value, list):
+        prefix = f"{path}." if path else ''
+        for i, v in enumerate(value):
+            flatten(v, prefix + str(i), out)
+    elif isinstance(value, bool):
+        out.append((path, value_text(value)))
+    elif value is not None:
+        out.append((path, value))
+    return out
+
+
+def parse_condition(text):
+    m = CONDITION_RE.match(text)
+    if not m:
+        raise QueryError(f"Not a condition: '{text}' (expected PATH=VALUE, PATH>VALUE, ...)")
+    path, op, value = m.groups()
+    segments = tuple(s for s in path.lower().split('.') if s)
+    if not segments:
+        raise QueryError(f"No path in '{text}'")
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if op not in ('=', '!=') and number is None:
+        raise QueryError(f"'{op}' needs a number: '{text}'")
+    return segments, op, value if number is None else number
+
+
+def parse_assignment(text):
+    path, sep, value = text.partition('=')
+    if not sep or not path.strip():
+        raise QueryError(f"Not an assignment: '{text}' (expected PATH=VALUE)")
+    return path.strip(), parse_cell(value)
+
+
+def index_path(root):
+    """Index file for `root`, named after its resolved path."""
+    key = hashlib.sha256(str(Path(root).resolve()).encode('utf-8')).hexdigest()[:16]
+    return INDEX_DIR / f"{Path(root).resolve().name or 'root'}-{key}.sqlite"
+
+
+def job_name(rel):
+    return Path(rel).name[:-len(GISMO_SUFFIX)]
+
+
+def find_gismo_files(root, ignore=()):
+    """Relative POSIX paths of every gismo_rangers JSON under `root`, honouring .gismoignore."""
+    root = str(root)
+    ignored = root_ignore(root, ignore)
+    found = {}
+    stack = [(root, '')]
+    while stack:
+        directory, rel_dir = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            rel = rel_dir + entry.name
+            if ignored(entry.name, rel):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((entry.path, rel + '/'))
+            elif entry.name.endswith(GISMO_SUFFIX):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                found[rel] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+class ParamIndex:
+    def __init__(self, root, path=None):
+        self.root = Path(root)
+        self.path = Path(path) if path else index_path(root)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self.db.executescript("DROP TABLE IF EXISTS params; DROP TABLE IF EXISTS paths; DROP TABLE IF EXISTS files;")
+            self.db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self.db.executescript(SCHEMA)
+        self._create_indexes()
+        self._path_ids = dict(self.db.execute("SELECT path, id FROM paths"))
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _create_indexes(self):
+        for sql in INDEXES.values():
+            self.db.execute(sql)
+
+    def _path_id(self, path):
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            path_id = self.db.execute("INSERT INTO paths (path) VALUES (?)", (path,)).lastrowid
+            self._path_ids[path] = path_id
+        return path_id
+
+    def refresh(self, ignore=(), log=None):
+        """Re-index new and changed files and drop deleted ones. Returns (indexed, removed, errors)."""
+        on_disk = find_gismo_files(self.root, ignore)
+        known = {path: (file_id, (mtime, size))
+                 for file_id, path, mtime, size in self.db.execute("SELECT id, path, mtime_ns, size FROM files")}
+        changed = [rel for rel, stamp in on_disk.items() if rel not in known or known[rel][1] != stamp]
+        removed = [known[rel][0] for rel in known if rel not in on_disk]
+        errors = []
+        # Rebuilding most of the index is much faster without the indexes,
+        # which are recreated in one sort at the end.
+        bulk = len(changed) > max(1000, len(known) // 2)
+        with self.db:
+            self.db.executemany("DELETE FROM params WHERE file_id = ?", ((i,) for i in removed))
+            self.db.executemany("DELETE FROM files WHERE id = ?", ((i,) for i in removed))
+            if bulk:
+                for name in INDEXES:
+                    self.db.execute(f"DROP INDEX IF EXISTS {name}")
+            for rel in changed:
+                try:
+                    with open(self.root / rel, 'r', encoding='utf-8') as f:
+                        document = json.load(f)
+                except (OSError, ValueError) as e:
+                    errors.append((rel, str(e)))
+                    if log:
+                        log(f"Skipped {rel}: {e}")
+                    continue
+                self._store(rel, on_disk[rel], document)
+            if bulk:
+                self._create_indexes()
+        return len(changed) - len(errors), len(removed), errors
+
+    def _store(self, rel, stamp, document):
+        row = self.db.execute("SELECT id FROM files WHERE path = ?", (rel,)).fetchone()
+        if row is None:
+            file_id = self.db.execute("INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                                      (rel,) + tuple(stamp)).lastrowid
+        else:
+            file_id = row[0]
+            self.db.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", tuple(stamp) + (file_id,))
+            self.db.execute("DELETE FROM params WHERE file_id = ?", (file_id,))
+        path_id = self._path_id
+        self.db.executemany("INSERT INTO params (file_id, path_id, value) VALUES (?, ?, ?)",
+                            [(file_id, path_id(p), v) for p, v in flatten(document)])
+
+    def stats(self):
+        files = self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        params = self.db.execute("SELECT COUNT(*) FROM params").fetchone()[0]
+        return {'files': files, 'params': params, 'paths': len(self._path_ids)}
+
+    def matching_paths(self, segments):
+        """Ids and dotted paths matching a path query, resolved against the few hundred distinct paths."""
+        return {path_id: path for path, path_id in self._path_ids.items()
+                if path_matches(segments, path.lower().split('.'))}
+
+    def query(self, conditions):
+        """Relative paths of files meeting every condition, sorted."""
+        parts, args = [], []
+        for condition in conditions:
+            segments, op, value = parse_condition(condition) if isinstance(condition, str) else condition
+            ids = list(self.matching_paths(segments))
+            if not ids:
+                return []
+            marks = ','.join('?' * len(ids))
+            if isinstance(value, str):
+                test = f"value {SQL_OPS[op]} ? COLLATE NOCASE"
+            else:
+                # SQLite orders every string above every number, so without
+                # this 'Mass>50' would match string values too.
+                test = f"typeof(value) IN ('integer', 'real') AND value {SQL_OPS[op]} ?"
+            parts.append(f"SELECT file_id FROM params WHERE path_id IN ({marks}) AND {test}")
+            args += ids + [value]
+        if not parts:
+            sql, args = "SELECT id FROM files", []
+        else:
+            sql = ' INTERSECT '.join(parts)
+        sql = f"SELECT path FROM files WHERE id IN ({sql}) ORDER BY path"
+        return [row[0] for row in self.db.execute(sql, args)]
+
+    def values(self, files, segments):
+        """{file: {dotted path: value}} for the paths matching `segments` in `files`."""
+        paths = self.matching_paths(segments)
+        out = {f: {} for f in files}
+        if not paths or not files:
+            return out
+        marks = ','.join('?' * len(paths))
+        sql = (f"SELECT files.path, params.path_id, params.value FROM params JOIN files ON files.id = params.file_id "
+               f"WHERE params.path_id IN ({marks})")
+        for file, path_id, value in self.db.execute(sql, list(paths)):
+            if file in out:
+                out[file][paths[path_id]] = value
+        return out
+
+    def update(self, files, assignments, validator=None, log=print):
+        """Apply `{dotted path: value}` to every file as one batch. Returns the files actually changed.
+
+        Nothing is written if any file fails to load, take the overrides or
+        validate. If a write fails, files already replaced get their old
+        bytes back before the error is raised. Once written, the assignments
+        are pinned for every file in `files` (see `pin`).
+        """
+        staged = []
+        problems = []
+        for rel in files:
+            path = self.root / rel
+            try:
+                original = path.read_bytes()
+                document = apply_overrides(json.loads(original), assignments)
+            except (OSError, ValueError) as e:
+                problems.append(f"{rel}: {e}")
+                continue
+            if validator is not None:
+                warnings = []
+                problems += [f"{rel}: {dotted(p)}: {m}"
+                             for p, m in validator.check(document, GISMO, placeholders=False, warnings=warnings)]
+                for p, m in warnings:
+                    log(f"{rel}: {dotted(p)}: warning: {m}")
+            staged.append((rel, path, original, document))
+        if problems:
+            for problem in problems:
+                log(problem)
+            raise QueryError(f"{len(problems)} problem(s); no files were changed")
+
+        written = []
+        try:
+            for rel, path, original, document in staged:
+                if write_if_changed(json.dumps(document, indent=2), path):
+                    written.append((rel, path, original))
+        except BaseException:
+            for rel, path, original in written:
+                write_bytes_atomic(original, path)
+            raise
+        with self.db:
+            for rel, path, _ in written:
+                st = os.stat(path)
+                self._store(rel, (st.st_mtime_ns, st.st_size), json.loads(path.read_bytes()))
+        self.pin(files, assignments)
+        return [rel for rel, _, _ in written]
+
+    def pin(self, files, assignments):
+        """Record `assignments` in the build manifest of each file so rebuilds keep them."""
+        cache = BuildCache()
+        for rel in files:
+            cache.manifest((self.root / rel).parent).pin(job_name(rel), assignments)
+        cache.save()
+
+    def unpin(self, files, paths=None):
+        """Drop pinned overrides (those in `paths`, or all) from `files`. Returns the files that had any."""
+        cache = BuildCache()
+        unpinned = [rel for rel in files
+                    if cache.manifest((self.root / rel).parent).unpin(job_name(rel), paths)]
+        cache.save()
+        return unpinned
+
+    def pinned(self, files):
+        """{file: pinned overrides} for the files in `files` that have any."""
+        cache = BuildCache()
+        found = {rel: cache.manifest((self.root / rel).parent).pinned(job_name(rel)) for rel in files}
+        return {rel: pinned for rel, pinned in found.items() if pinned}
+
+
+def reconvert(root, files, exe_path, workers=None, log=print):
+    """Run the converter on `files` (relative to `root`), next to each JSON. Returns the failed names."""
+    jobs = []
+    for rel in files:
+        path = Path(root) / rel
+        jobs.append(ConverterJob(job_name(rel), path, path.parent, expected=GISMO_OUTPUT_EXTS))
+    failures = []
+    for result in ConverterPool(exe_path, workers=workers).run(jobs):
+        failures += log_result(result, log)
+    return sorted(failures)
@@ -0,0 +1,298 @@
+"""Batch generation of gismos and bulletskeletons, shared by GismoBasher and the CLI"""
+import json
+import time
+from pathlib import Path
+
+from . import core
+from .buildcache import BuildCache, converter_fingerprint, gismo_inputs, sha256_file, skeleton_inputs, template_hash
+from .core import GISMO_SUFFIX, SKELETON_SUFFIX, GISMO_OUTPUT_EXTS, TEMPLATES_DIR, BRK_TEMPLATE_NAME
+from .manifest import ManifestError, apply_overrides
+from .output import write_if_changed
+from .plan import SubstitutionPlan
+from .pool import ConverterJob, ConverterPool
+from .registry import TEMPLATES
+from .schema import GISMO, SKELETON, dotted
+from .trace import NULL_TRACER
+from .transforms import TransformError, load_transforms, transforms_path
+
+
+def check_skeleton_plan(plan, warnings=None):
+    if plan.fragment is None:
+        return [((), "no {model_name}_brk<fragment>__01 node to generate fragments from")]
+    return []
+
+
+def generate(template, model_paths, exe_path, brk_template_path=None,
+             models_root=None, output_dir=None, workers=None, log=print, pool=None,
+             force=False, use_cache=True, progress=None, tracer=None,
+             resolve=None, validator=None, cancel=None):
+    """Generate gismos and bulletskeletons for `model_paths`.
+
+    `template` is the already-parsed gismo document. It is compiled once into
+    a SubstitutionPlan and each model only renders the placeholder slots. All
+    JSON is written first, then the converter runs concurrently on a
+    ConverterPool. JSON and converter outputs are only replaced when their
+    content changes (see gismo.output). Jobs whose inputs match the build
+    manifest in their output folder are skipped unless `force` is set.
+
+    Edits pinned in a model's build manifest entry (see
+    gismo.buildcache.BuildManifest) are applied on top of its template.
+
+    `resolve(model_path)`, if given, picks the document per model and
+    returns `(key, document)`, or None to fail the model; `template` is then
+    unused. Models with the same key share one compiled plan (see
+    gismo.manifest).
+
+    With a `validator` (gismo.schema.Validator), each template document is
+    checked once before anything is written; models whose document has
+    problems fail without a converter launch, and every problem is logged
+    with its path. Warnings (missing or unknown keys) are logged only. A
+    `_brk` group whose transforms table (see gismo.transforms) cannot be
+    read fails the same way, validator or not.
+
+    `progress(done, total, name, ok)` is called as each model or `_brk` group
+    completes. Setting `cancel` (a threading.Event) stops the batch before
+    the next model, converter or not; cancelling `pool` also stops queued
+    work and kills running converters. Returns the names of failed jobs.
+
+    Each stage is recorded as a span on `tracer` (a gismo.trace.Tracer),
+    tagged with the model name or `_brk` prefix.
+    """
+    tracer = tracer or NULL_TRACER
+    batch_start = time.perf_counter()
+    failures = []
+    with tracer.span('scan'):
+        normal_models, brk_groups = core.split_models(model_paths)
+    exe_path = Path(exe_path) if exe_path else None
+    exe_ok = exe_path is not None and exe_path.is_file()
+    jobs = []
+    pending = {}
+    skipped = 0
+    cache = BuildCache() if use_cache and exe_ok else None
+    # Pinned edits apply whether or not the manifests are used to skip work.
+    pins = cache if cache is not None else BuildCache()
+    converter = converter_fingerprint(exe_path) if cache else None
+    if exe_ok and pool is None:
+        pool = ConverterPool(exe_path, workers=workers)
+    total = len(brk_groups) + len(normal_models)
+    done = 0
+
+    def tick(name, ok):
+        nonlocal done
+        done += 1
+        if not ok:
+            failures.append(name)
+        if progress is not None:
+            progress(done, total, name, ok)
+
+    def cancelled():
+        return (cancel is not None and cancel.is_set()) or (pool is not None and pool.cancelled)
+
+    def invalid(label, check, *args, **tags):
+        if validator is None:
+            return False
+        warnings = []
+        with tracer.span('validate', **tags):
+            problems = check(*args, warnings=warnings)
+        for path, message in warnings:
+            log(f"WARNING {label}: {dotted(path)}: {message}")
+        for path, message in problems:
+            log(f"INVALID {label}: {dotted(path)}: {message}")
+        return bool(problems)
+
+    def up_to_date(name, model_dir, inputs, **tags):
+        if cache is None or force:
+            return False
+        with tracer.span('cache', **tags):
+            return cache.manifest(model_dir).is_current(name, inputs, converter)
+
+    brk_template_path = Path(brk_template_path or TEMPLATES_DIR / BRK_TEMPLATE_NAME)
+    brk_template = None
+    if brk_groups:
+        if not brk_template_path.is_file():
+            log(f"Missing {brk_template_path.name} in templates directory")
+        else:
+            try:
+                with tracer.span('template', template=brk_template_path.name):
+                    brk_template = TEMPLATES.get(brk_template_path)
+                    brk_plan = TEMPLATES.skeleton_plan(brk_template_path)
+                    brk_hash = template_hash(brk_template)
+            except Exception as e:
+                brk_template = None
+                log(f"ERROR loading bulletskeleton template: {e}")
+            if brk_template is not None and invalid(brk_template_path.name, validator and validator.check,
+                                                    brk_template, SKELETON):
+                brk_template = None
+            if brk_template is not None and invalid(brk_template_path.name, check_skeleton_plan, brk_plan):
+                brk_template = None
+
+    for (_directory, prefix), group in brk_groups.items():
+        if cancelled():
+            break
+        name = f"{prefix}_brk"
+        if brk_template is None:
+            tick(name, False)
+            continue
+        # Generated node lists are well formed by construction; only the template and table need checks.
+        table = transforms_path(group['dir'], prefix)
+        table_digest = sha256_file(table) if table.is_file() else None
+        model_dir = core.output_dir_for(group['dir'], models_root, output_dir)
+        inputs = skeleton_inputs(brk_hash, prefix, group['fragments'], table_digest)
+        if up_to_date(name, model_dir, inputs, prefix=prefix):
+            skipped += 1
+            tick(name, True)
+            continue
+        transforms = None
+        if table_digest is not None:
+            try:
+                with tracer.span('transforms', prefix=prefix):
+                    transforms = load_transforms(table, group['fragments'], brk_plan.default_transform)
+            except (OSError, TransformError) as e:
+                log(f"INVALID {name}: {e}")
+                tick(name, False)
+                continue
+        out_brk_json = model_dir / f"{name}{SKELETON_SUFFIX}"
+        try:
+            with tracer.span('render', prefix=prefix):
+                text = brk_plan.render(prefix, group['fragments'], transforms)
+            with tracer.span('write', prefix=prefix):
+                model_dir.mkdir(parents=True, exist_ok=True)
+                written = write_if_changed(text, out_brk_json)
+            log(f"{'Wrote' if written else 'Unchanged'} bulletskeleton: {out_brk_json.name}")
+        except Exception as e:
+            log(f"ERROR writing bulletskeleton JSON for {name}: {e}")
+            tick(name, False)
+            continue
+        if not exe_ok:
+            log("Executable path not set or invalid (for bulletskeleton).")
+            tick(name, False)
+            continue
+        job = ConverterJob(name, out_brk_json, model_dir)
+        jobs.append(job)
+        pending[job] = (inputs, brk_hash, {'prefix': prefix})
+
+    plans = {}
+
+    def plan_for(model_path):
+        resolved = resolve(model_path) if resolve is not None else (None, template)
+        if resolved is None:
+            return None
+        key, document = resolved
+        entry = plans.get(key)
+        if entry is None:
+            label = "template"
+            if key is not None:
+                # A Manifest knows how to name its groups.
+                label += f" {resolve.label(key) if hasattr(resolve, 'label') else key}"
+            if invalid(label, validator and validator.check, document, GISMO, template=str(key or 'gismo')):
+                entry = plans[key] = (None, None)
+            else:
+                with tracer.span('template', template=str(key or 'gismo')):
+                    entry = plans[key] = (template_hash(document), SubstitutionPlan(document))
+        return entry
+
+    for model_path in normal_models:
+        if cancelled():
+            break
+        name = model_path.stem
+        try:
+            entry = plan_for(model_path)
+        except Exception as e:
+            log(f"ERROR resolving template for {name}: {e}")
+            tick(name, False)
+            continue
+        if entry is None:
+            log(f"No template for {name}")
+            tick(name, False)
+            continue
+        gismo_hash, gismo_plan = entry
+        if gismo_plan is None:
+            log(f"Skipped {name}: its template failed validation")
+            tick(name, False)
+            continue
+        model_dir = core.output_dir_for(model_path.parent, models_root, output_dir)
+        pinned = pins.manifest(model_dir).pinned(name)
+        inputs = gismo_inputs(gismo_hash, name, pinned)
+        if up_to_date(name, model_dir, inputs, model=name):
+            skipped += 1
+            tick(name, True)
+            continue
+        out_json = model_dir / f"{name}{GISMO_SUFFIX}"
+        try:
+            with tracer.span('render', model=name):
+                if pinned:
+                    text = json.dumps(apply_overrides(gismo_plan.apply(name), pinned), indent=2)
+                else:
+                    text = gismo_plan.render(name)
+            with tracer.span('write', model=name):
+                model_dir.mkdir(parents=True, exist_ok=True)
+                written = write_if_changed(text, out_json)
+            log(f"{'Wrote' if written else 'Unchanged'} {out_json.name}")
+        except ManifestError as e:
+            log(f"ERROR applying pinned edits to {name}: {e} (gismo query --unpin drops them)")
+            tick(name, False)
+            continue
+        except Exception as e:
+            log(f"ERROR writing gismo_rangers JSON: {e}")
+            tick(name, False)
+            continue
+        if not exe_ok:
+            log("Executable path not set or invalid.")
+            ok = True
+            for ext in GISMO_OUTPUT_EXTS:
+                dst = model_dir / f"{name}.{ext}"
+                if dst.exists():
+                    log(f"Created: {dst.name}")
+                else:
+                    log(f"Missing output: {name}.{ext}")
+                    ok = False
+            tick(name, ok)
+            continue
+        job = ConverterJob(name, out_json, model_dir, expected=GISMO_OUTPUT_EXTS)
+        jobs.append(job)
+        pending[job] = (inputs, gismo_hash, {'model': name})
+
+    if jobs and not cancelled():
+        for result in pool.run(jobs):
+            inputs, tmpl, tags = pending[result.job]
+            for stage, start, end in result.spans:
+                tracer.add(stage, start, end, thread=result.thread, **tags)
+            failed = log_result(result, log)
+            tick(result.job.name, not failed)
+            if cache is not None:
+                with tracer.span('manifest', **tags):
+                    manifest = cache.manifest(result.job.dest_dir)
+                    if failed:
+                        manifest.forget(result.job.name)
+                    else:
+                        manifest.record(result.job.name, inputs, tmpl, result.job.json_path,
+                                        converter, result.outputs)
+    if cache is not None:
+        with tracer.span('manifest'):
+            cache.save()
+    if skipped:
+        log(f"Skipped {skipped} up-to-date item(s).")
+    if cancelled() and done < total:
+        log(f"Cancelled: {total - done} item(s) not processed.")
+    tracer.add('batch', batch_start, time.perf_counter())
+
+    return sorted(set(failures))
+
+
+def log_result(result, log):
+    job = result.job
+    label = "gismo" if job.expected else "bulletskel"
+    if result.cancelled:
+        log(f"Cancelled: {job.name}")
+        return [job.name]
+    if result.stdout.strip():
+        log(f"[{label} EXE stdout]\n{result.stdout.strip()}")
+    if result.stderr:
+        log(f"[{label} EXE stderr]\n{result.stderr.strip()}")
+    for dest in result.outputs:
+        log(f"Created{' (bulletskel)' if not job.expected else ''}: {dest.name}")
+    for ext in result.missing:
+        log(f"Missing output: {job.name}.{ext}")
+    if result.error:
+        log(f"ERROR running EXE on {job.json_path.name}: {result.error}")
+    return [] if result.ok else [job.name]
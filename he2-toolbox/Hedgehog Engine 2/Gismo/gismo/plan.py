@@ -0,0 +1,272 @@
+"""Precompiled {model_name} substitution plans for gismo and bulletskeleton templates.
+
+A plan is compiled once per template. It remembers the paths of every string
+that holds the placeholder, together with the rule that applies there, and a
+pre-rendered copy of `json.dumps(template, indent=2)` split around those
+strings. Rendering a model then only formats the slots; the output is
+byte-identical to dumping `core.model_name_generator(template, name)`.
+
+Bulletskeletons are generated rather than filtered: the template's root node
+and one fragment node are pre-rendered the same way, with slots for the
+fragment name, parent index and transform as well.
+"""
+import json
+import re
+
+from .core import MODEL_PLACEHOLDER, BRK_ROOT_NODE_RE, BRK_NODE_RE, fragment_key
+from .transforms import IDENTITY, is_identity_rotation
+
+MESH = 'mesh'
+REPLACE = 'replace'
+
+TRANSFORM_FIELDS = (('Position', 'X'), ('Position', 'Y'), ('Position', 'Z'),
+                    ('Rotation', 'X'), ('Rotation', 'Y'), ('Rotation', 'Z'), ('Rotation', 'W'),
+                    ('Scale', 'X'), ('Scale', 'Y'), ('Scale', 'Z'))
+IDENTITY_FIELD = ('Rotation', 'IsIdentity')
+
+_PREFIX = '__GISMO_SLOT_{}_'
+_MARKER = _PREFIX + '{}__'
+_MARKER_RE = '"__GISMO_SLOT_{}_(\\d+)__"'
+
+
+def slot_value(rule, original, name):
+    if rule == MESH:
+        return f"{name}_col"
+    return original.replace(MODEL_PLACEHOLDER, name)
+
+
+class SubstitutionPlan:
+    def __init__(self, template, indent=2):
+        self.template = template
+        self.slots = []
+        self._trie = self._compile(template, (), None)
+        self._chunks, self._order = self._prerender(indent)
+
+    def _compile(self, obj, path, key):
+        if isinstance(obj, dict):
+            trie = {}
+            for k, v in obj.items():
+                sub = self._compile(v, path + (k,), k)
+                if sub is not None:
+                    trie[k] = sub
+            return trie or None
+        if isinstance(obj, list):
+            trie = {}
+            for i, v in enumerate(obj):
+                sub = self._compile(v, path + (i,), None)
+                if sub is not None:
+                    trie[i] = sub
+            return trie or None
+        if isinstance(obj, str) and MODEL_PLACEHOLDER in obj:
+            rule = MESH if key == "Mesh" and obj == MODEL_PLACEHOLDER else REPLACE
+            slot = (len(self.slots), path, rule, obj)
+            self.slots.append(slot)
+            return slot
+        return None
+
+    def _prerender(self, indent):
+        nonce = 0
+        text = json.dumps(self.template, indent=indent)
+        while _PREFIX.format(nonce) in text:
+            nonce += 1
+
+        def mark(obj, trie):
+            if isinstance(trie, tuple):
+                return _MARKER.format(nonce, trie[0])
+            if trie is None:
+                return obj
+            copy = dict(obj) if isinstance(obj, dict) else list(obj)
+            for k, sub in trie.items():
+                copy[k] = mark(obj[k], sub)
+            return copy
+
+        parts = re.split(_MARKER_RE.format(nonce), json.dumps(mark(self.template, self._trie), indent=indent))
+        return parts[0::2], [int(i) for i in parts[1::2]]
+
+    def render(self, name):
+        """JSON text for `name`, identical to json.dump(model_name_generator(...), indent=2)."""
+        slots = self.slots
+        chunks = self._chunks
+        out = [chunks[0]]
+        for i, slot_id in enumerate(self._order):
+            _, _, rule, original = slots[slot_id]
+            out.append(json.dumps(slot_value(rule, original, name)))
+            out.append(chunks[i + 1])
+        return ''.join(out)
+
+    def apply(self, name):
+        """Substituted document for `name`.
+
+        Only the containers on the way to a slot are copied; everything else is
+        shared with the template, so treat the result as read-only.
+        """
+        def build(obj, trie):
+            if isinstance(trie, tuple):
+                return slot_value(trie[2], trie[3], name)
+            if trie is None:
+                return obj
+            copy = dict(obj) if isinstance(obj, dict) else list(obj)
+            for k, sub in trie.items():
+                copy[k] = build(obj[k], sub)
+            return copy
+
+        return build(self.template, self._trie)
+
+
+def node_transform(node):
+    """The ten transform numbers of a skeleton node; missing fields are the identity."""
+    values = []
+    for (group, axis), default in zip(TRANSFORM_FIELDS, IDENTITY):
+        fields = node.get(group)
+        value = fields.get(axis) if isinstance(fields, dict) else None
+        values.append(value if isinstance(value, (int, float)) and not isinstance(value, bool) else default)
+    return tuple(values)
+
+
+class NodeTemplate:
+    """One skeleton node pre-rendered around slots for its name, parent and transform."""
+
+    def __init__(self, node, indent=2):
+        self.transform = node_transform(node)
+        rotation = node.get('Rotation')
+        self.identity = rotation.get('IsIdentity') if isinstance(rotation, dict) else None
+        node_name = node.get('NodeName', '')
+        m = BRK_NODE_RE.fullmatch(node_name)
+        self.name_parts = (node_name[:m.start(1)], node_name[m.end(1):]) if m else None
+        self.slots = []
+        field_index = {field: i for i, field in enumerate(TRANSFORM_FIELDS)}
+
+        nonce = 0
+        text = json.dumps(node)
+        while _PREFIX.format(nonce) in text:
+            nonce += 1
+
+        def slot(kind, arg=None):
+            self.slots.append((kind, arg))
+            return _MARKER.format(nonce, len(self.slots) - 1)
+
+        def mark(obj, path, key):
+            if isinstance(obj, dict):
+                return {k: mark(v, path + (k,), k) for k, v in obj.items()}
+            if isinstance(obj, list):
+                return [mark(v, path + (i,), None) for i, v in enumerate(obj)]
+            if path == ('NodeName',) and isinstance(obj, str):
+                return slot('name', obj)
+            if path == ('ParentNodeIndex',):
+                return slot('parent', obj)
+            if path == IDENTITY_FIELD and isinstance(obj, bool):
+                return slot('identity')
+            if path in field_index and isinstance(obj, (int, float)) and not isinstance(obj, bool):
+                return slot('transform', field_index[path])
+            if isinstance(obj, str) and MODEL_PLACEHOLDER in obj:
+                return slot(MESH if key == "Mesh" and obj == MODEL_PLACEHOLDER else REPLACE, obj)
+            return obj
+
+        parts = re.split(_MARKER_RE.format(nonce), json.dumps(mark(node, (), None), indent=indent))
+        # Nodes sit one level deep in the list, so every chunk line is re-indented.
+        pad = ' ' * indent
+        self.chunks = [chunk.replace('\n', '\n' + pad) for chunk in parts[0::2]]
+        self.order = [int(i) for i in parts[1::2]]
+
+        self.layout = self.compile_layout()
+
+    def compile_layout(self, transform=None, identity=None):
+        """Chunks with the transform text merged in, and the name/parent/text slots left between them."""
+        transform = transform or self.transform
+        if identity is None:
+            identity = self.identity
+        chunks = []
+        pieces = [self.chunks[0]]
+        dynamic = []
+        for slot_id, chunk in zip(self.order, self.chunks[1:]):
+            kind, arg = self.slots[slot_id]
+            if kind == 'transform':
+                value = transform[arg]
+                pieces.append(repr(value) if type(value) is float else json.dumps(value))
+            elif kind == 'identity':
+                pieces.append('true' if identity else 'false')
+            else:
+                chunks.append(''.join(pieces))
+                pieces = []
+                dynamic.append((kind, arg))
+            pieces.append(chunk)
+        chunks.append(''.join(pieces))
+        return chunks, dynamic
+
+    def render(self, name, fragment=None, parent=None, layout=None):
+        """Node text for model `name`; unset arguments keep the template's values."""
+        chunks, dynamic = layout or self.layout
+        out = [chunks[0]]
+        for i, (kind, arg) in enumerate(dynamic):
+            if kind == 'name':
+                if fragment is not None and self.name_parts is not None:
+                    arg = self.name_parts[0] + fragment + self.name_parts[1]
+                out.append(json.dumps(arg.replace(MODEL_PLACEHOLDER, name)))
+            elif kind == 'parent':
+                value = arg if parent is None else parent
+                out.append(str(value) if type(value) is int else json.dumps(value))
+            else:
+                out.append(json.dumps(slot_value(kind, arg, name)))
+            out.append(chunks[i + 1])
+        return ''.join(out)
+
+
+class SkeletonPlan:
+    """Bulletskeleton generator compiled from the template's root node and a fragment node.
+
+    Any set of fragment suffixes (`A`, `AB`, `12`) is emitted by repeating the
+    pre-rendered fragment node with its name, parent and transform filled in,
+    in `fragment_key` order, so no node is copied as a dict. Fragments the
+    template lists keep that node's transform as their default, which makes
+    `A`..`Z` render exactly as the template has them; others start from the
+    first fragment node. `transforms` ({fragment: transform}, see
+    gismo.transforms) overrides both.
+    """
+
+    def __init__(self, nodes, indent=2):
+        self.indent = indent
+        self.root = None
+        self.fragment = None
+        self.defaults = {}
+        self.layouts = {}
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            node_name = node.get("NodeName", "")
+            if BRK_ROOT_NODE_RE.fullmatch(node_name):
+                if self.root is None:
+                    self.root = NodeTemplate(node, indent)
+                continue
+            m = BRK_NODE_RE.fullmatch(node_name)
+            if m:
+                template = NodeTemplate(node, indent)
+                if self.fragment is None:
+                    self.fragment = template
+                self.defaults[m.group(1)] = template.transform
+                # Each listed fragment's own transform, rendered once into the shared node text.
+                self.layouts[m.group(1)] = self.fragment.compile_layout(template.transform, template.identity)
+
+    def default_transform(self, fragment):
+        if fragment in self.defaults:
+            return self.defaults[fragment]
+        return self.fragment.transform if self.fragment is not None else IDENTITY
+
+    def render(self, name, fragments, transforms=None):
+        parts = [self.root.render(name)] if self.root is not None else []
+        if self.fragment is not None:
+            parent = 0 if self.root is not None else -1
+            layouts = self.layouts
+            for fragment in sorted(fragments, key=fragment_key):
+                transform = transforms.get(fragment) if transforms else None
+                if transform is not None:
+                    layout = self.fragment.compile_layout(transform, is_identity_rotation(transform))
+                else:
+                    layout = layouts.get(fragment)
+                parts.append(self.fragment.render(name, fragment, parent, layout))
+        if not parts:
+            return '[]'
+        pad = ' ' * self.indent
+        return '[\n' + pad + (',\n' + pad).join(parts) + '\n]'
+
+    def apply(self, name, fragments, transforms=None):
+        return json.loads(self.render(name, fragments, transforms))
@@ -0,0 +1,153 @@
+"""Concurrent converter runs, each in its own scratch directory"""
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from .core import converter_command
+from .output import move_if_changed
+
+
+class ConverterJob:
+    def __init__(self, name, json_path, dest_dir, expected=()):
+        self.name = name
+        self.json_path = Path(json_path)
+        self.dest_dir = Path(dest_dir)
+        # Output extensions that must be produced; when empty, any non-JSON file
+        # named after the job counts as output.
+        self.expected = tuple(expected)
+
+
+class JobResult:
+    def __init__(self, job):
+        self.job = job
+        self.ok = False
+        self.outputs = []
+        self.missing = []
+        self.stdout = ""
+        self.stderr = ""
+        self.returncode = None
+        self.error = None
+        self.cancelled = False
+        self.started = None
+        self.elapsed = 0.0
+        # (stage, start, end) perf_counter spans of scratch setup, the
+        # converter run and output collection, and the thread they ran on.
+        self.spans = []
+        self.thread = None
+
+    def __repr__(self):
+        return f"<JobResult {self.job.name} ok={self.ok}>"
+
+
+class ConverterPool:
+    """Runs the converter for many jobs at once.
+
+    Every job copies its JSON into a fresh scratch directory and runs the
+    converter there, so outputs of jobs sharing a name (or KnuxTools' habit of
+    writing into its working directory) never collide. Outputs are moved into
+    the job's `dest_dir` afterwards.
+    """
+
+    def __init__(self, exe_path, workers=None, scratch_root=None):
+        self.exe_path = Path(exe_path).resolve()
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.scratch_root = scratch_root
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._procs = set()
+
+    def cancel(self):
+        self._cancel.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self, jobs):
+        """Yield a JobResult per job, in completion order."""
+        jobs = list(jobs)
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+            futures = [executor.submit(self.run_job, job) for job in jobs]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def run_job(self, job):
+        result = JobResult(job)
+        if self._cancel.is_set():
+            result.cancelled = True
+            result.error = "cancelled"
+            return result
+        result.started = time.perf_counter()
+        result.thread = threading.get_ident()
+        scratch = Path(tempfile.mkdtemp(prefix=f"gismo-{job.name}-", dir=self.scratch_root))
+        try:
+            scratch_json = scratch / job.json_path.name
+            shutil.copyfile(job.json_path, scratch_json)
+            mark = time.perf_counter()
+            result.spans.append(('scratch', result.started, mark))
+            # Started under the lock, so cancel() either stops this job here or
+            # finds its process to kill.
+            with self._lock:
+                if self._cancel.is_set():
+                    result.cancelled = True
+                    result.error = "cancelled"
+                    return result
+                proc = subprocess.Popen(
+                    converter_command(self.exe_path, scratch_json),
+                    cwd=str(scratch),
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True
+                )
+                self._procs.add(proc)
+            try:
+                result.stdout, result.stderr = proc.communicate()
+            finally:
+                with self._lock:
+                    self._procs.discard(proc)
+                result.spans.append(('convert', mark, time.perf_counter()))
+            if self._cancel.is_set():
+                result.cancelled = True
+                result.error = "cancelled"
+                return result
+            result.returncode = proc.returncode
+
+            if proc.returncode:
+                # Whatever a failed run left behind is not trusted over the
+                # outputs already in dest_dir.
+                result.error = f"converter exited with code {proc.returncode}"
+                return result
+
+            mark = time.perf_counter()
+            produced = {f.suffix.lower().lstrip('.'): f for f in scratch.iterdir()
+                        if f.stem == job.name and f.suffix.lower() != '.json'}
+            job.dest_dir.mkdir(parents=True, exist_ok=True)
+            for ext, f in sorted(produced.items()):
+                dest = job.dest_dir / f.name
+                move_if_changed(f, dest)
+                result.outputs.append(dest)
+            result.missing = [ext for ext in job.expected if ext not in produced]
+            if not job.expected and not produced:
+                result.missing = ["*"]
+            result.ok = not result.missing
+            result.spans.append(('collect', mark, time.perf_counter()))
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+            result.elapsed = time.perf_counter() - result.started
+        return result
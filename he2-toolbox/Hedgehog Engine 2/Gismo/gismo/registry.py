@@ -0,0 +1,126 @@
+"""Shared template registry: parse each template once, re-parse when it changes on disk"""
+import os
+import threading
+from pathlib import Path
+
+from .core import load_template, BRK_TEMPLATE_NAME
+from .layers import TemplateError, apply_overlay, base_path, is_overlay
+from .plan import SkeletonPlan, SubstitutionPlan
+
+
+def file_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def copy_document(obj):
+    """Fresh containers for a parsed JSON document; strings and numbers are shared."""
+    if isinstance(obj, dict):
+        return {k: copy_document(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [copy_document(v) for v in obj]
+    return obj
+
+
+class TemplateRegistry:
+    """Cache of parsed templates keyed by resolved path.
+
+    An entry is reused while the file's mtime and size are unchanged. `get`
+    hands out the shared document, which callers must not mutate; `load` hands
+    out a private copy. Compiled plans and directory listings are cached
+    alongside and invalidated the same way.
+
+    Overlay templates (gismo.layers) are cached resolved. Their entry records
+    the stamp of every layer down to the base, so editing any layer
+    invalidates every template built on it, and the base itself is parsed
+    once however many overlays share it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._listings = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, path, chain=()):
+        path = Path(path).resolve()
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and all(file_stamp(p) == stamp for p, stamp in entry['layers']):
+            with self._lock:
+                self.hits += 1
+            return entry
+        with self._lock:
+            self.misses += 1
+        if path in chain:
+            raise TemplateError(f"Template layers loop back to {path.name}")
+        stamp = file_stamp(path)
+        data = load_template(path)
+        layers = [(path, stamp)]
+        if is_overlay(data):
+            base = self._entry(base_path(data, path), chain + (path,))
+            data = apply_overlay(base['data'], data, path.name)
+            layers += base['layers']
+        entry = {'layers': layers, 'data': data}
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def get(self, path):
+        return self._entry(path)['data']
+
+    def load(self, path):
+        return copy_document(self.get(path))
+
+    def plan(self, path):
+        entry = self._entry(path)
+        plan = entry.get('plan')
+        if plan is None:
+            plan = entry['plan'] = SubstitutionPlan(entry['data'])
+        return plan
+
+    def skeleton_plan(self, path):
+        entry = self._entry(path)
+        plan = entry.get('skeleton_plan')
+        if plan is None:
+            plan = entry['skeleton_plan'] = SkeletonPlan(entry['data'])
+        return plan
+
+    def list_templates(self, directory):
+        """Gismo templates in `directory` (the bulletskeleton template excluded), cached by folder mtime."""
+        directory = Path(directory)
+        stamp = file_stamp(directory)
+        with self._lock:
+            listing = self._listings.get(directory)
+            if listing is not None and listing[0] == stamp:
+                self.hits += 1
+                return list(listing[1])
+            self.misses += 1
+        paths = sorted(fn for fn in directory.iterdir()
+                       if fn.suffix == '.json' and fn.name != BRK_TEMPLATE_NAME)
+        with self._lock:
+            self._listings[directory] = (stamp, paths)
+        return list(paths)
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._listings.clear()
+            else:
+                path = Path(path).resolve()
+                # Overlays built on this template go too.
+                for key in [k for k, e in self._entries.items() if any(p == path for p, _ in e['layers'])]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def describe(self):
+        s = self.stats()
+        return f"Template cache: {s['hits']} hits, {s['misses']} misses, {s['entries']} cached"
+
+
+TEMPLATES = TemplateRegistry()
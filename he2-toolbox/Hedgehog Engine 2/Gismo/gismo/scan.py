@@ -0,0 +1,217 @@
+"""Mod-tree scanning and batch planning.
+
+`scan_models` walks a mod root with os.scandir, skipping ignored names, and
+remembers every folder's listing. `plan_batch` then makes one linear pass
+over the models: plain models, `_brk` groups with their fragments, the JSON
+and outputs each item would write, and whether those outputs are missing,
+stale against the build manifest, or current. Output existence is answered
+from the listings, so only existing outputs are ever stat'ed.
+"""
+import fnmatch
+import os
+import re
+from pathlib import Path
+
+from . import core
+from .buildcache import BuildCache, converter_fingerprint, gismo_inputs, sha256_file, skeleton_inputs, template_hash
+from .core import BRK_MODEL_RE, GISMO_SUFFIX, SKELETON_SUFFIX, GISMO_OUTPUT_EXTS, fragment_key
+from .transforms import transforms_path
+
+IGNORE_FILE     = '.gismoignore'
+DEFAULT_IGNORE  = ('.git', '.svn', '.hg', '__pycache__')
+
+
+def load_ignore(root):
+    """Patterns from `root/.gismoignore`, one per line; `#` starts a comment."""
+    path = Path(root) / IGNORE_FILE
+    if not path.is_file():
+        return []
+    patterns = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                patterns.append(line.replace('\\', '/').rstrip('/'))
+    return patterns
+
+
+class Ignore:
+    """Name patterns (`*.bak`, `wip`) match any file or folder name; patterns with `/` match the relative path."""
+
+    def __init__(self, patterns):
+        names = [fnmatch.translate(p) for p in patterns if '/' not in p]
+        paths = [fnmatch.translate(p.lstrip('/')) for p in patterns if '/' in p]
+        # One compiled alternation per kind instead of a fnmatch call per pattern and entry.
+        self.names = re.compile('|'.join(names)).match if names else None
+        self.paths = re.compile('|'.join(paths)).match if paths else None
+
+    def __call__(self, name, rel):
+        return bool((self.names and self.names(name)) or (self.paths and self.paths(rel)))
+
+
+def root_ignore(root, ignore=(), use_ignore_file=True):
+    """The matcher for a mod root: DEFAULT_IGNORE, `ignore`, then the root's .gismoignore."""
+    patterns = list(DEFAULT_IGNORE) + list(ignore)
+    if use_ignore_file:
+        patterns += load_ignore(root)
+    return Ignore(patterns)
+
+
+class ScanResult:
+    """Models found by `scan_models` as (folder, file name) strings, and each folder's file names."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.entries = []
+        self.listings = {}
+
+    @property
+    def models(self):
+        return [Path(directory, name) for directory, name in self.entries]
+
+    def has_file(self, directory, name):
+        listing = self.listings.get(directory)
+        if listing is None:
+            return os.path.isfile(os.path.join(directory, name))
+        return name in listing
+
+
+def scan_models(root, ignore=(), use_ignore_file=True):
+    """Every .model under `root`, plus the file names of each folder visited.
+
+    Works on plain strings; Path objects are only made for the models, on
+    request, since building them dominates the cost of large trees.
+    """
+    root = Path(root)
+    ignored = root_ignore(root, ignore, use_ignore_file)
+    result = ScanResult(root)
+    stack = [(str(root), '')]
+    while stack:
+        directory, rel_dir = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        names = set()
+        for entry in entries:
+            name = entry.name
+            if ignored(name, rel_dir + name):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((entry.path, f"{rel_dir}{name}/"))
+                continue
+            names.add(name)
+            if name[-6:].lower() == '.model':
+                result.entries.append((directory, name))
+        result.listings[directory] = names
+    result.entries.sort()
+    return result
+
+
+class PlanItem:
+    __slots__ = ('kind', 'name', 'fragments', 'dest_dir', 'json_name', 'outputs', 'status')
+
+    def __init__(self, kind, name, dest_dir, json_name, outputs, fragments=None):
+        self.kind = kind
+        self.name = name
+        self.fragments = fragments
+        self.dest_dir = dest_dir
+        self.json_name = json_name
+        self.outputs = outputs
+        self.status = None
+
+
+class BatchPlan:
+    def __init__(self, items):
+        self.items = items
+
+    def counts(self):
+        counts = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return counts
+
+    def pending(self):
+        return [item for item in self.items if item.status != 'current']
+
+    def describe(self, verbose=False):
+        gismos = sum(1 for item in self.items if item.kind == 'gismo')
+        counts = self.counts()
+        lines = [f"{gismos} gismo(s), {len(self.items) - gismos} bulletskeleton group(s): "
+                 + ', '.join(f"{counts[s]} {s}" for s in ('missing', 'stale', 'current') if s in counts)]
+        for item in self.items if verbose else self.pending():
+            fragments = f" [{','.join(sorted(item.fragments, key=fragment_key))}]" if item.fragments else ''
+            lines.append(f"  {item.status:<8} {item.kind:<14} {item.name}{fragments} -> {item.dest_dir}")
+        return "\n".join(lines)
+
+
+def plan_batch(scan, template=None, brk_template=None, exe_path=None, models_root=None, output_dir=None):
+    """Plan every item for the scanned models in one pass.
+
+    Groups `_brk` fragments per folder, the way `split_models` does. An
+    item is 'missing' when any expected output is absent, 'stale' when the
+    outputs exist but the build manifest does not match the template and
+    converter (or there is no template to compare against), and 'current'
+    otherwise.
+    """
+    models_root = Path(models_root) if models_root is not None else scan.root
+    cache = BuildCache()
+    converter = converter_fingerprint(exe_path) if exe_path else None
+    gismo_hash = template_hash(template) if template is not None else None
+    brk_hash = template_hash(brk_template) if brk_template is not None else None
+    dest_dirs = {}
+    items = []
+    brk_groups = {}
+
+    def dest_for(directory):
+        dest = dest_dirs.get(directory)
+        if dest is None:
+            dest = dest_dirs[directory] = str(core.output_dir_for(directory, models_root, output_dir))
+        return dest
+
+    for directory, filename in scan.entries:
+        name = filename[:-6]
+        m = BRK_MODEL_RE.match(name)
+        if m:
+            key = (directory, m.group(1))
+            group = brk_groups.get(key)
+            if group is None:
+                group = brk_groups[key] = {'fragments': set(), 'dir': directory}
+            group['fragments'].add(m.group(2))
+            continue
+        dest = dest_for(directory)
+        item = PlanItem('gismo', name, dest, name + GISMO_SUFFIX, [f"{name}.{ext}" for ext in GISMO_OUTPUT_EXTS])
+        item.status = status_of(scan, cache, item, converter,
+                                gismo_hash and (lambda: gismo_inputs(gismo_hash, item.name,
+                                                                     cache.manifest(dest).pinned(item.name))))
+        items.append(item)
+
+    skeletons = []
+    for (_directory, prefix), group in brk_groups.items():
+        name = f"{prefix}_brk"
+        dest = dest_for(group['dir'])
+        # The skeleton's converter output has no fixed extension; the manifest knows what it was.
+        entry = cache.manifest(dest).entries.get(name) or {}
+        item = PlanItem('bulletskeleton', name, dest, name + SKELETON_SUFFIX,
+                        list(entry.get('outputs', {})), fragments=group['fragments'])
+        item.status = status_of(scan, cache, item, converter,
+                                brk_hash and (lambda: skeleton_inputs(brk_hash, prefix, group['fragments'],
+                                                                      table_digest(scan, group['dir'], prefix))))
+        skeletons.append(item)
+    return BatchPlan(skeletons + items)
+
+
+def table_digest(scan, directory, prefix):
+    table = transforms_path(directory, prefix)
+    return sha256_file(table) if scan.has_file(directory, table.name) else None
+
+
+def status_of(scan, cache, item, converter, inputs):
+    """`inputs` is a callable giving the item's input hash, only hashed once its outputs are known to exist."""
+    if not item.outputs or not all(scan.has_file(item.dest_dir, out) for out in item.outputs):
+        return 'missing'
+    if not inputs or converter is None:
+        return 'stale'
+    if cache.manifest(item.dest_dir).is_current(item.name, inputs(), converter):
+        return 'current'
+    return 'stale'
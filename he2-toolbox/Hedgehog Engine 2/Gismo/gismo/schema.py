@@ -0,0 +1,314 @@
+"""Pre-flight validation of gismo and bulletskeleton JSON.
+
+A Validator is compiled once from ENUM_MAP and from the bundled templates:
+every path the templates have (list items collapsed to `*`) gets the set of
+value kinds seen there, the keys its dict must have, and its enum options,
+resolved from ENUM_MAP's path suffixes at compile time so checking a value
+is a dict lookup. A path that is null in every template accepts any scalar.
+Keys are optional: a key that every template with its dict has is
+reported missing, and a key no template has is reported unknown, both as
+warnings, which do not fail a check.
+
+Bulletskeletons are also checked as a node list: every ParentNodeIndex must
+point at another node (or be -1 for a root), parents must not loop, and
+NodeNames must be unique.
+
+`validate_files` checks many files on disk across processes; the pipeline
+runs the same checks on each template before any converter is launched.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .core import GISMO_SUFFIX, SKELETON_SUFFIX, TEMPLATES_DIR, BRK_TEMPLATE_NAME, MODEL_PLACEHOLDER
+from .layers import is_overlay
+from .registry import TEMPLATES
+
+ENUM_MAP = {
+    ('Design', 'Collision', 'Shape'): ['Box', 'Sphere', 'Capsule', 'Cylinder', 'Mesh', 'None'],
+    ('Design', 'Collision', 'BasePoint'): ['Centre', 'ZPlane', 'XPlane', 'YPlane'],
+    ('Design', 'RigidBody', 'Type'): ['None', 'Static', 'Dynamic'],
+    ('Design', 'RigidBody', 'Material'): ['None', 'Wood', 'Iron'],
+    ('ProgramMotion', 'Type'): ['Swing', 'Rotate', 'LinearSwing'],
+    ('Kill', 'Type'): ['None', 'Kill', 'Break', 'Motion'],
+    ('Plan', 'ContactDamageType'): ['None', 'LowSpeed', 'MiddleSpeed', 'HighSpeed'],
+}
+BOOLEAN_ENUM = ['true', 'false']
+
+GISMO     = 'gismo'
+SKELETON  = 'bulletskeleton'
+SERIAL_FILES = 64   # below this, a process pool costs more than it saves
+
+
+KINDS = {type(None): 'null', bool: 'bool', int: 'number', float: 'number', str: 'string', dict: 'object', list: 'list'}
+
+
+def kind_of(value):
+    return KINDS.get(type(value), 'list')
+
+def dotted(path):
+    return '.'.join(str(p) for p in path) or '(root)'
+
+
+def document_kind(path):
+    name = Path(path).name
+    if name.endswith(SKELETON_SUFFIX):
+        return SKELETON
+    if name.endswith(GISMO_SUFFIX):
+        return GISMO
+    return None
+
+
+class Problem:
+    __slots__ = ('file', 'path', 'message', 'warning')
+
+    def __init__(self, file, path, message, warning=False):
+        self.file = file
+        self.path = path
+        self.message = message
+        self.warning = warning
+
+    def __str__(self):
+        where = f"{self.file}: " if self.file else ''
+        level = 'warning: ' if self.warning else ''
+        return f"{where}{dotted(self.path)}: {level}{self.message}"
+
+
+class SchemaNode:
+    __slots__ = ('kinds', 'enum', 'fields', 'expected', 'items')
+
+    def __init__(self):
+        self.kinds = set()
+        self.enum = None
+        self.fields = {}
+        self.expected = None
+        self.items = None
+
+
+class Schema:
+    """Kinds, expected keys and enum options per path, inferred from example documents.
+
+    Compiled into a tree of SchemaNodes that mirrors the documents, so a
+    check walks document and schema side by side and only builds a path
+    when it reports a problem.
+    """
+
+    def __init__(self, documents, enum_map=ENUM_MAP):
+        self.root = SchemaNode()
+        for document in documents:
+            self._learn(self.root, document)
+        self._compile(self.root, (), enum_map, sorted({len(k) for k in enum_map}, reverse=True))
+
+    def _learn(self, node, value):
+        kind = kind_of(value)
+        node.kinds.add(kind)
+        if kind == 'object':
+            # Expected keys are the ones every example of this dict has.
+            node.expected = set(value) if node.expected is None else node.expected & set(value)
+            for k, v in value.items():
+                child = node.fields.get(k)
+                if child is None:
+                    child = node.fields[k] = SchemaNode()
+                self._learn(child, v)
+        elif kind == 'list':
+            if node.items is None:
+                node.items = SchemaNode()
+            for v in value:
+                self._learn(node.items, v)
+
+    def _compile(self, node, names, enum_map, lengths):
+        if node.kinds == {'null'}:
+            # Null in every example: any scalar will do.
+            node.kinds = {'null', 'bool', 'number', 'string'}
+        node.kinds = frozenset(node.kinds)
+        if 'string' in node.kinds:
+            for n in lengths:
+                options = enum_map.get(names[-n:]) if n <= len(names) else None
+                if options is not None:
+                    node.enum = frozenset(options)
+                    break
+        node.expected = tuple(k for k in node.fields if k in (node.expected or ()))
+        for k, child in node.fields.items():
+            self._compile(child, names + (k,), enum_map, lengths)
+        if node.items is not None:
+            self._compile(node.items, names, enum_map, lengths)
+
+    def check(self, value, placeholders=True, warnings=None):
+        """(path, message) pairs; `placeholders=False` also flags strings still holding {model_name}.
+
+        Missing and unknown keys go to `warnings`, if given, rather than the result.
+        """
+        problems = []
+        self._check(self.root, value, [], problems, placeholders, [] if warnings is None else warnings)
+        return problems
+
+    def _check(self, node, value, path, problems, placeholders, warnings):
+        kind = KINDS.get(type(value), 'list')
+        if kind not in node.kinds:
+            shown = json.dumps(value) if kind not in ('object', 'list') else kind
+            expected = ' or '.join(sorted('true/false' if k == 'bool' else k for k in node.kinds))
+            problems.append((tuple(path), f"expected {expected}, got {shown}"))
+        elif kind == 'string':
+            if node.enum is not None and value not in node.enum:
+                problems.append((tuple(path), f"'{value}' is not one of {', '.join(sorted(node.enum))}"))
+            elif not placeholders and MODEL_PLACEHOLDER in value:
+                problems.append((tuple(path), f"unsubstituted {MODEL_PLACEHOLDER}"))
+        elif kind == 'object':
+            fields = node.fields
+            for k, v in value.items():
+                child = fields.get(k)
+                path.append(k)
+                if child is None:
+                    warnings.append((tuple(path), f"unknown key '{k}'"))
+                else:
+                    self._check(child, v, path, problems, placeholders, warnings)
+                path.pop()
+            for k in node.expected:
+                if k not in value:
+                    warnings.append((tuple(path) + (k,), "missing"))
+        elif kind == 'list' and node.items is not None:
+            items = node.items
+            for i, v in enumerate(value):
+                path.append(i)
+                self._check(items, v, path, problems, placeholders, warnings)
+                path.pop()
+
+def check_skeleton_nodes(nodes):
+    problems = []
+    if not isinstance(nodes, list):
+        return problems
+    count = len(nodes)
+    names = {}
+    parents = []
+    for i, node in enumerate(nodes):
+        if not isinstance(node, dict):
+            parents.append(None)
+            continue
+        parent = node.get('ParentNodeIndex')
+        valid = isinstance(parent, int) and not isinstance(parent, bool) and -1 <= parent < count and parent != i
+        if isinstance(parent, (int, float)) and not isinstance(parent, bool) and not valid:
+            problems.append(((i, 'ParentNodeIndex'), f"{parent} is not -1 or another node's index (0-{count - 1})"))
+        parents.append(parent if valid else None)
+        name = node.get('NodeName')
+        if isinstance(name, str):
+            if name in names:
+                problems.append(((i, 'NodeName'), f"duplicate of node {names[name]} ('{name}')"))
+            else:
+                names[name] = i
+    if count and -1 not in parents:
+        problems.append(((), "no root node (ParentNodeIndex -1)"))
+    for i in range(count):
+        seen = set()
+        j = i
+        while j is not None and j >= 0 and j not in seen:
+            seen.add(j)
+            j = parents[j]
+        if j is not None and j >= 0 and j == i:
+            problems.append(((i, 'ParentNodeIndex'), "parent chain loops back to this node"))
+    return problems
+
+
+class Validator:
+    """Compiled gismo and bulletskeleton schemas; picklable, so process workers get a copy."""
+
+    def __init__(self, gismo_templates, skeleton_templates, enum_map=ENUM_MAP):
+        self.schemas = {GISMO: Schema(gismo_templates, enum_map), SKELETON: Schema(skeleton_templates, enum_map)}
+
+    def check(self, document, kind, placeholders=True, warnings=None):
+        problems = self.schemas[kind].check(document, placeholders, warnings)
+        if kind == SKELETON:
+            problems += check_skeleton_nodes(document)
+        return problems
+
+    def check_file(self, path):
+        """Problems in the file at `path`. Files under templates/ may keep their placeholders."""
+        path = Path(path)
+        kind = document_kind(path)
+        if kind is None:
+            return [Problem(str(path), (), "not a gismo_rangers or bulletskeleton JSON")]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except ValueError as e:
+            return [Problem(str(path), (), f"invalid JSON: {e}")]
+        except OSError as e:
+            return [Problem(str(path), (), f"unreadable: {e.strerror or e}")]
+        if is_overlay(document):
+            document = TEMPLATES.get(path)
+        is_template = path.resolve().parent == TEMPLATES_DIR.resolve()
+        warnings = []
+        problems = self.check(document, kind, placeholders=is_template, warnings=warnings)
+        return ([Problem(str(path), p, m) for p, m in problems]
+                + [Problem(str(path), p, m, warning=True) for p, m in warnings])
+
+
+_default = None
+
+
+def default_validator():
+    """Validator compiled from every template in templates/, rebuilt when TEMPLATES reloads any of them."""
+    global _default
+    gismos = [TEMPLATES.get(p) for p in TEMPLATES.list_templates(TEMPLATES_DIR)]
+    skeleton_path = TEMPLATES_DIR / BRK_TEMPLATE_NAME
+    skeletons = [TEMPLATES.get(skeleton_path)] if skeleton_path.is_file() else []
+    # The registry hands out the same document until the file changes, so
+    # identity tells whether the templates are the ones compiled.
+    documents = tuple(gismos + skeletons)
+    if (_default is None or len(_default[0]) != len(documents)
+            or any(a is not b for a, b in zip(_default[0], documents))):
+        _default = (documents, Validator(gismos, skeletons))
+    return _default[1]
+
+
+def find_documents(roots):
+    """Every gismo_rangers and bulletskeleton JSON under `roots` (files are taken as given)."""
+    found = []
+    for root in roots:
+        if os.path.isfile(root):
+            found.append(str(root))
+            continue
+        stack = [str(root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.') and entry.name != '__pycache__':
+                        stack.append(entry.path)
+                elif document_kind(entry.name):
+                    found.append(entry.path)
+    return sorted(found)
+
+
+_worker_validator = None
+
+
+def _init_worker(validator):
+    global _worker_validator
+    _worker_validator = validator
+
+
+def _check_files(paths):
+    return [problem for path in paths for problem in _worker_validator.check_file(path)]
+
+
+def validate_files(paths, validator=None, workers=None):
+    """Problems in every file of `paths`, in path order, checked across `workers` processes."""
+    validator = validator or default_validator()
+    paths = [str(p) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < SERIAL_FILES:
+        return [problem for path in paths for problem in validator.check_file(path)]
+    # Chunks of files per task keep the pickling overhead per file small.
+    size = max(1, min(256, len(paths) // (workers * 4)))
+    chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+    problems = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(validator,)) as executor:
+        for chunk_problems in executor.map(_check_files, chunks):
+            problems.extend(chunk_problems)
+    return problems
+
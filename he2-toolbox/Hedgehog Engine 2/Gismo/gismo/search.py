@@ -0,0 +1,103 @@
+"""Search index over a JSON document for the GismoBasher tree filter.
+
+Every key and scalar value is lowercased once when the document loads and
+kept next to its path. Plain queries are substring matches on key or value,
+as the old filter did. A query with `=` is a path query: the left side is a
+dotted path suffix (`*` matches any one segment) and the right side must
+equal the value, e.g. `RigidBody.Type=dynamic` or `Design.*.Shape=box`.
+"""
+from fnmatch import fnmatchcase
+
+from .core import value_text
+
+
+def parse_query(query):
+    query = query.lower()
+    if '=' not in query:
+        return None, query
+    path, _, value = query.partition('=')
+    segments = tuple(s for s in path.strip().split('.') if s)
+    return segments, value.strip()
+
+
+def path_matches(segments, lowered_path):
+    if len(segments) > len(lowered_path):
+        return False
+    tail = lowered_path[len(lowered_path) - len(segments):]
+    return all(s == p or (('*' in s or '?' in s) and fnmatchcase(p, s)) for s, p in zip(segments, tail))
+
+
+class SearchIndex:
+    def __init__(self, document=None):
+        self.entries = {}
+        self._last_query = None
+        self._last_matches = None
+        if document is not None:
+            self.build(document)
+
+    def build(self, document):
+        self.entries = {}
+        self._add(document, ())
+        self._reset_cache()
+
+    def _add(self, value, path):
+        if path:
+            key = str(path[-1]).lower()
+            text = '' if isinstance(value, (dict, list)) else value_text(value).lower()
+            self.entries[path] = (key, text, tuple(str(p).lower() for p in path))
+        if isinstance(value, dict):
+            for k, v in value.items():
+                self._add(v, path + (k,))
+        elif isinstance(value, list):
+            for i, v in enumerate(value):
+                self._add(v, path + (i,))
+
+    def _reset_cache(self):
+        self._last_query = None
+        self._last_matches = None
+
+    def update(self, path, value):
+        """Re-index the subtree at `path` after an edit."""
+        self.remove(path)
+        self._add(value, path)
+        self._reset_cache()
+
+    def remove(self, path):
+        n = len(path)
+        for p in [p for p in self.entries if p[:n] == path]:
+            del self.entries[p]
+        self._reset_cache()
+
+    def _match(self, entry, segments, text):
+        key, value, lowered = entry
+        if segments is None:
+            return text in key or text in value
+        return path_matches(segments, lowered) and (not text or value == text)
+
+    def search(self, query):
+        """Paths whose key or value matches `query`.
+
+        A plain query that contains the previous one can only match a subset,
+        so only the previous matches are rescanned.
+        """
+        segments, text = parse_query(query)
+        if segments is None and not text:
+            self._reset_cache()
+            return set(self.entries)
+        candidates = self.entries
+        last = self._last_query
+        if segments is None and last is not None and last[0] is None and last[1] in text:
+            candidates = {p: self.entries[p] for p in self._last_matches if p in self.entries}
+        matches = {p for p, entry in candidates.items() if self._match(entry, segments, text)}
+        self._last_query = (segments, text)
+        self._last_matches = matches
+        return matches
+
+    def visible(self, query):
+        """Matches plus all of their ancestors, i.e. the rows the tree should show."""
+        matches = self.search(query)
+        visible = set(matches)
+        for path in matches:
+            for n in range(1, len(path)):
+                visible.add(path[:n])
+        return visible
@@ -0,0 +1,41 @@
+"""Stand-in for KnuxTools used by tests and benchmarks.
+
+Writes the files KnuxTools would produce for a gismo or bulletskeleton JSON
+into the working directory. GISMO_STUB_LATENCY (seconds) adds a fixed delay
+per run and GISMO_STUB_FAIL makes every run exit non-zero without output.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+GISMO_SUFFIX    = '.hedgehog.gismo_rangers.json'
+SKELETON_SUFFIX = '.hedgehog.bulletskeleton.json'
+
+
+def main(argv):
+    if len(argv) != 2:
+        print("usage: stub_converter.py FILE.json", file=sys.stderr)
+        return 2
+    src = Path(argv[1])
+    time.sleep(float(os.environ.get("GISMO_STUB_LATENCY", "0")))
+    if os.environ.get("GISMO_STUB_FAIL"):
+        print(f"Failed to convert {src.name}", file=sys.stderr)
+        return 1
+    payload = src.read_bytes()
+    if src.name.endswith(GISMO_SUFFIX):
+        name = src.name[:-len(GISMO_SUFFIX)]
+        outputs = [f"{name}.gismod", f"{name}.gismop"]
+    elif src.name.endswith(SKELETON_SUFFIX):
+        outputs = [f"{src.name[:-len(SKELETON_SUFFIX)]}.pxd"]
+    else:
+        print(f"Unsupported file: {src.name}", file=sys.stderr)
+        return 1
+    for out in outputs:
+        Path(out).write_bytes(payload)
+        print(f"Saved {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
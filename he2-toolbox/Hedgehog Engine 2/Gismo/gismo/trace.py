@@ -0,0 +1,108 @@
+"""Timing spans for generation batches, summarised per stage or exported as a Chrome trace.
+
+A span is one stage (`render`, `write`, `convert`, ...) for one model or
+`_brk` prefix on one thread. `Tracer.describe()` gives the per-stage summary
+shown after a batch; `Tracer.write_chrome()` writes trace-event JSON that
+chrome://tracing and ui.perfetto.dev can open, with one track per thread.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+
+class Tracer:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage, **tags):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, start, time.perf_counter(), **tags)
+
+    def add(self, stage, start, end, thread=None, **tags):
+        """Record a span measured elsewhere, e.g. by a worker thread. Times are perf_counter values."""
+        span = (stage, start, end, thread or threading.get_ident(), tags)
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """Per-stage rows in first-seen order: count, total, mean and the slowest span."""
+        with self._lock:
+            spans = list(self.spans)
+        stages = {}
+        for stage, start, end, thread, tags in spans:
+            elapsed = end - start
+            row = stages.get(stage)
+            if row is None:
+                row = stages[stage] = {'stage': stage, 'count': 0, 'total': 0.0, 'max': 0.0, 'slowest': None}
+            row['count'] += 1
+            row['total'] += elapsed
+            if elapsed >= row['max']:
+                row['max'] = elapsed
+                row['slowest'] = tag_label(tags)
+        for row in stages.values():
+            row['mean'] = row['total'] / row['count']
+        return list(stages.values())
+
+    def describe(self):
+        rows = self.summary()
+        if not rows:
+            return "Timing: nothing recorded."
+        lines = ["Timing by stage (count, total, mean, slowest):"]
+        for row in rows:
+            slowest = f" ({row['slowest']})" if row['slowest'] else ""
+            lines.append(f"  {row['stage']:<10} {row['count']:>6}  {row['total'] * 1000:9.1f} ms"
+                         f"  {row['mean'] * 1000:8.2f} ms  {row['max'] * 1000:8.1f} ms{slowest}")
+        return "\n".join(lines)
+
+    def chrome_events(self, process_name="gismo"):
+        with self._lock:
+            spans = list(self.spans)
+        threads = {}
+        events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": process_name}}]
+        for stage, start, end, thread, tags in sorted(spans, key=lambda s: s[1]):
+            tid = threads.get(thread)
+            if tid is None:
+                tid = threads[thread] = len(threads) + 1
+                label = "pipeline" if tid == 1 else f"converter {tid - 1}"
+                events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": label}})
+            label = tag_label(tags)
+            events.append({
+                "name": f"{stage} {label}" if label else stage,
+                "cat": stage,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": 1,
+                "tid": tid,
+                "args": tags,
+            })
+        return events
+
+    def write_chrome(self, path, process_name="gismo"):
+        data = {"traceEvents": self.chrome_events(process_name), "displayTimeUnit": "ms"}
+        Path(path).write_text(json.dumps(data), encoding='utf-8')
+
+
+class NullTracer(Tracer):
+    """Tracer that records nothing, used when a batch is not being timed."""
+
+    def span(self, stage, **tags):
+        return nullcontext()
+
+    def add(self, stage, start, end, thread=None, **tags):
+        pass
+
+
+def tag_label(tags):
+    return ' '.join(str(v) for v in tags.values())
+
+
+NULL_TRACER = NullTracer()
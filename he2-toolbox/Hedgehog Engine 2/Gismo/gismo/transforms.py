@@ -0,0 +1,204 @@
+"""Per-fragment transforms for generated bulletskeletons.
+
+A `_brk` group may keep a table next to its fragments,
+`<prefix>_brk.transforms.csv`, with one row per fragment and only the
+columns it needs:
+
+    fragment,x,y,z,rx,ry,rz,s
+    A,0,1.5,0,0,90,0,
+    12,0.25,0,0,,,,2
+
+Position is x,y,z. Rotation is either a quaternion (qx,qy,qz,qw,
+normalised on load) or Euler angles in degrees (rx,ry,rz, about the fixed
+X, then Y, then Z axes), not both in one row. Scale is sx,sy,sz or a
+uniform s. An empty cell keeps the value the template gives that fragment.
+
+A transform is ten numbers: position X Y Z, rotation X Y Z W, scale X Y Z.
+Rows are converted in one batch, as column arrays when NumPy is installed
+and row by row with `math` otherwise.
+"""
+import csv
+import math
+from pathlib import Path
+
+from .core import BRK_FRAGMENT_RE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+TRANSFORMS_SUFFIX  = '.transforms.csv'
+FRAGMENT_COLUMN    = 'fragment'
+POSITION_COLUMNS   = ('x', 'y', 'z')
+QUATERNION_COLUMNS = ('qx', 'qy', 'qz', 'qw')
+EULER_COLUMNS      = ('rx', 'ry', 'rz')
+SCALE_COLUMNS      = ('sx', 'sy', 'sz')
+UNIFORM_SCALE      = 's'
+COLUMNS = POSITION_COLUMNS + QUATERNION_COLUMNS + EULER_COLUMNS + SCALE_COLUMNS + (UNIFORM_SCALE,)
+
+IDENTITY = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0)
+
+
+class TransformError(ValueError):
+    pass
+
+
+def transforms_path(directory, prefix):
+    return Path(directory) / f"{prefix}_brk{TRANSFORMS_SUFFIX}"
+
+
+def is_identity_rotation(transform):
+    return transform[3:7] == (0.0, 0.0, 0.0, 1.0)
+
+
+def read_table(path):
+    """Fragment names and {column: [float or None per row]} from a transforms table."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(line for line in f if line.strip() and not line.lstrip().startswith('#'))
+        header = [h.strip().lower() for h in next(reader, [])]
+        if FRAGMENT_COLUMN not in header:
+            raise TransformError(f"{path.name}: no '{FRAGMENT_COLUMN}' column")
+        unknown = [h for h in header if h != FRAGMENT_COLUMN and h not in COLUMNS]
+        if unknown:
+            raise TransformError(f"{path.name}: unknown column(s) {', '.join(unknown)}")
+        fragments = []
+        columns = {h: [] for h in header if h != FRAGMENT_COLUMN}
+        for line, row in enumerate(reader, 2):
+            cells = dict(zip(header, (cell.strip() for cell in row)))
+            fragment = cells.get(FRAGMENT_COLUMN, '')
+            if not BRK_FRAGMENT_RE.fullmatch(fragment):
+                raise TransformError(f"{path.name}:{line}: '{fragment}' is not a fragment suffix")
+            if fragment in fragments:
+                raise TransformError(f"{path.name}:{line}: fragment {fragment} listed twice")
+            fragments.append(fragment)
+            for name, values in columns.items():
+                cell = cells.get(name, '')
+                try:
+                    value = float(cell) if cell else None
+                except ValueError:
+                    raise TransformError(f"{path.name}:{line}: {name} '{cell}' is not a number") from None
+                if value is not None and not math.isfinite(value):
+                    raise TransformError(f"{path.name}:{line}: {name} must be finite")
+                values.append(value)
+    return fragments, columns
+
+
+def compute(fragments, columns, defaults):
+    """Transforms for each row of `columns`, starting from the per-row `defaults`."""
+    if not defaults:
+        return []
+    if numpy is not None:
+        return _compute_arrays(fragments, columns, defaults)
+    transforms = []
+    for i, default in enumerate(defaults):
+        try:
+            transforms.append(_compute_row({name: values[i] for name, values in columns.items()}, default))
+        except TransformError as e:
+            raise TransformError(f"fragment {fragments[i]}: {e}") from None
+    return transforms
+
+
+def _compute_arrays(fragments, columns, defaults):
+    np = numpy
+    out = np.array(defaults, dtype=float)
+    count = len(out)
+
+    def column(name):
+        values = columns.get(name)
+        if values is None:
+            return np.full(count, np.nan)
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    def fill(index, values):
+        out[:, index] = np.where(np.isnan(values), out[:, index], values)
+
+    for i, name in enumerate(POSITION_COLUMNS):
+        fill(i, column(name))
+
+    quaternion = np.stack([column(name) for name in QUATERNION_COLUMNS], axis=1)
+    euler = np.stack([column(name) for name in EULER_COLUMNS], axis=1)
+    has_quaternion = ~np.isnan(quaternion).all(axis=1)
+    has_euler = ~np.isnan(euler).all(axis=1)
+
+    def fail(rows, message):
+        raise TransformError(f"fragment {fragments[int(np.argmax(rows))]}: {message}")
+
+    if (has_quaternion & has_euler).any():
+        fail(has_quaternion & has_euler, "give a quaternion or Euler angles, not both")
+    quaternion = np.nan_to_num(quaternion)
+    norm = np.linalg.norm(quaternion, axis=1)
+    if (has_quaternion & (norm == 0)).any():
+        fail(has_quaternion & (norm == 0), "zero-length quaternion")
+    quaternion[has_quaternion] /= norm[has_quaternion, None]
+    half = np.radians(np.nan_to_num(euler)) / 2
+    (cx, cy, cz), (sx, sy, sz) = np.cos(half).T, np.sin(half).T
+    from_euler = np.stack([sx * cy * cz - cx * sy * sz,
+                           cx * sy * cz + sx * cy * sz,
+                           cx * cy * sz - sx * sy * cz,
+                           cx * cy * cz + sx * sy * sz], axis=1)
+    out[has_quaternion, 3:7] = quaternion[has_quaternion]
+    out[has_euler, 3:7] = from_euler[has_euler]
+
+    uniform = column(UNIFORM_SCALE)
+    for i, name in enumerate(SCALE_COLUMNS):
+        values = column(name)
+        fill(7 + i, np.where(np.isnan(values), uniform, values))
+    if (out[:, 7:10] == 0).any():
+        fail((out[:, 7:10] == 0).any(axis=1), "scale of 0")
+    # Adding 0.0 turns -0.0 into 0.0, so the JSON never shows a negative zero.
+    return [tuple(row) for row in (out + 0.0).tolist()]
+
+
+def _compute_row(cells, default):
+    out = list(default)
+    for i, name in enumerate(POSITION_COLUMNS):
+        if cells.get(name) is not None:
+            out[i] = cells[name]
+    quaternion = [cells.get(name) for name in QUATERNION_COLUMNS]
+    euler = [cells.get(name) for name in EULER_COLUMNS]
+    has_quaternion = any(v is not None for v in quaternion)
+    has_euler = any(v is not None for v in euler)
+    if has_quaternion and has_euler:
+        raise TransformError("give a quaternion or Euler angles, not both")
+    if has_quaternion:
+        quaternion = [v or 0.0 for v in quaternion]
+        norm = math.sqrt(sum(v * v for v in quaternion))
+        if norm == 0:
+            raise TransformError("zero-length quaternion")
+        out[3:7] = [v / norm for v in quaternion]
+    elif has_euler:
+        half = [math.radians(v or 0.0) / 2 for v in euler]
+        cx, cy, cz = (math.cos(h) for h in half)
+        sx, sy, sz = (math.sin(h) for h in half)
+        out[3:7] = [sx * cy * cz - cx * sy * sz,
+                    cx * sy * cz + sx * cy * sz,
+                    cx * cy * sz - sx * sy * cz,
+                    cx * cy * cz + sx * sy * sz]
+    for i, name in enumerate(SCALE_COLUMNS):
+        value = cells.get(name)
+        if value is None:
+            value = cells.get(UNIFORM_SCALE)
+        if value is not None:
+            out[7 + i] = value
+    if 0 in out[7:10]:
+        raise TransformError("scale of 0")
+    return tuple(float(v) + 0.0 for v in out)
+
+
+def load_transforms(path, fragments, defaults):
+    """{fragment: transform} for the rows of the table at `path` whose fragment is in `fragments`.
+
+    `defaults(fragment)` gives the transform an empty cell keeps. Rows for
+    fragments that have no model are ignored.
+    """
+    names, columns = read_table(path)
+    keep = [i for i, name in enumerate(names) if name in fragments]
+    names = [names[i] for i in keep]
+    columns = {column: [values[i] for i in keep] for column, values in columns.items()}
+    try:
+        transforms = compute(names, columns, [defaults(name) for name in names])
+    except TransformError as e:
+        raise TransformError(f"{Path(path).name}: {e}") from None
+    return dict(zip(names, transforms))
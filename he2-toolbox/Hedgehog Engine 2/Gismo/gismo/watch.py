@@ -0,0 +1,399 @@
+"""Watch model roots and regenerate only what changed.
+
+On Linux the roots are watched with inotify (through ctypes, no extra
+dependency), one watch per directory, so a re-export costs one event instead
+of a rescan. Elsewhere a polling watcher stats the directories on an
+interval and lists only those whose mtime moved. Both skip what `gismo
+batch` skips: scan.DEFAULT_IGNORE and each root's .gismoignore.
+
+Events are coalesced until the roots have been quiet for the debounce
+window, then the affected models are handed to a callback: a changed plain
+model on its own, a changed `_brk` fragment or transforms table together
+with every fragment of its group from the same folder, as `split_models`
+groups them.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+from .core import BRK_MODEL_RE
+from .scan import root_ignore
+from .transforms import TRANSFORMS_SUFFIX
+
+MODEL_EXT          = '.model'
+DEBOUNCE_SECONDS   = 0.5
+MAX_DELAY_SECONDS  = 5.0
+POLL_SECONDS       = 1.0
+SWEEP_SECONDS      = 15.0
+
+IN_ATTRIB       = 0x00000004
+IN_CLOSE_WRITE  = 0x00000008
+IN_MOVED_FROM   = 0x00000040
+IN_MOVED_TO     = 0x00000080
+IN_CREATE       = 0x00000100
+IN_DELETE       = 0x00000200
+IN_DELETE_SELF  = 0x00000400
+IN_Q_OVERFLOW   = 0x00004000
+IN_IGNORED      = 0x00008000
+IN_ISDIR        = 0x40000000
+WATCH_MASK      = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+TRANSFORMS_RE = re.compile(r'^(.+)_brk' + re.escape(TRANSFORMS_SUFFIX) + '$')
+
+
+def is_model(name):
+    return name.lower().endswith(MODEL_EXT)
+
+
+def is_input(name):
+    """Models and bulletskeleton transforms tables: the files whose changes trigger a rebuild."""
+    return is_model(name) or name.endswith(TRANSFORMS_SUFFIX)
+
+
+def walk(directory, ignored, rel_dir=''):
+    """(folder, relative folder, entries) for `directory` and each folder under it, minus ignores.
+
+    `rel_dir` is `directory` relative to its root with a trailing slash, the
+    form scan.Ignore matches path patterns against.
+    """
+    stack = [(Path(directory), rel_dir)]
+    while stack:
+        current, rel = stack.pop()
+        try:
+            entries = [e for e in os.scandir(current) if not ignored(e.name, rel + e.name)]
+        except OSError:
+            continue
+        yield current, rel, entries
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((Path(entry.path), f"{rel}{entry.name}/"))
+
+
+def iter_models(root):
+    """Every model and transforms table under `root` that is not ignored."""
+    for _current, _rel, entries in walk(root, root_ignore(root)):
+        for entry in entries:
+            if is_input(entry.name) and not entry.is_dir(follow_symlinks=False):
+                yield Path(entry.path)
+
+
+class InotifyWatcher:
+    """inotify watches on every directory under the roots; new directories are picked up as they appear.
+
+    `dirs` maps each watch to its folder, the folder's path relative to its
+    root, and that root's ignore matcher.
+    """
+
+    def __init__(self, roots):
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = [Path(r) for r in roots]
+        self.dirs = {}
+        for root in self.roots:
+            self._add_tree(root, root_ignore(root), '')
+
+    def _add_watch(self, directory, ignored, rel_dir):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+            return
+        self.dirs[wd] = (Path(directory), rel_dir, ignored)
+
+    def _add_tree(self, directory, ignored, rel_dir):
+        """Watch `directory` and its subdirectories; returns the models and tables already inside."""
+        models = []
+        for current, rel, entries in walk(directory, ignored, rel_dir):
+            # The watch goes on after listing, so a file created in between is
+            # missed by both; the window is one scandir long.
+            self._add_watch(current, ignored, rel)
+            for entry in entries:
+                if is_input(entry.name) and not entry.is_dir(follow_symlinks=False):
+                    models.append(Path(entry.path))
+        return models
+
+    def read(self, timeout):
+        """Wait up to `timeout` seconds; returns (changed, removed) model and table paths."""
+        changed, removed = set(), set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed, removed
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed, removed
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped by the kernel; fall back to everything under the roots.
+                for root in self.roots:
+                    changed.update(iter_models(root))
+                continue
+            watched = self.dirs.get(wd)
+            if watched is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF):
+                self.dirs.pop(wd, None)
+                continue
+            directory, rel_dir, ignored = watched
+            if ignored(name, rel_dir + name):
+                continue
+            path = directory / name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self._add_tree(path, ignored, f"{rel_dir}{name}/"))
+                continue
+            if not is_input(name):
+                continue
+            # Writes are taken on close so half-written exports are not picked
+            # up; IN_ATTRIB covers tools that only touch the timestamp.
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_ATTRIB):
+                changed.add(path)
+                removed.discard(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                removed.add(path)
+                changed.discard(path)
+        return changed, removed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PolledDir:
+    __slots__ = ('mtime', 'rel_dir', 'ignored', 'subdirs', 'files')
+
+    def __init__(self, mtime, rel_dir, ignored, subdirs, files):
+        self.mtime = mtime
+        self.rel_dir = rel_dir
+        self.ignored = ignored
+        self.subdirs = subdirs
+        self.files = files
+
+
+class PollingWatcher:
+    """Fallback for platforms without inotify: stats every folder, re-lists the ones that changed.
+
+    Creating, deleting or renaming an entry moves its folder's mtime, which
+    covers exporters that write a temporary file and rename it over the
+    model. Overwriting a file in place leaves the folder alone, so the known
+    models and tables are also re-stat'ed, without listing anything, every
+    `sweep` seconds.
+    """
+
+    def __init__(self, roots, interval=POLL_SECONDS, sweep=SWEEP_SECONDS):
+        self.roots = [Path(r) for r in roots]
+        self.interval = interval
+        self.sweep = sweep
+        self.dirs = {}
+        self.stamps = {}
+        for root in self.roots:
+            self._add_tree(root, root_ignore(root), '', set())
+        now = time.monotonic()
+        self._next = now + interval
+        self._next_sweep = now + sweep
+
+    def _list(self, directory, ignored, rel_dir):
+        """(mtime, {subfolder: relative folder}, {input: stamp}) for `directory`; None once it is gone.
+
+        The folder is stat'ed before it is listed so a change made during the
+        listing still shows up on the next poll.
+        """
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            entries = list(os.scandir(directory))
+        except OSError:
+            return None
+        subdirs, files = {}, {}
+        for entry in entries:
+            name = entry.name
+            if ignored(name, rel_dir + name):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs[Path(entry.path)] = f"{rel_dir}{name}/"
+                elif is_input(name):
+                    # Free on Windows, where scandir already holds the stat.
+                    st = entry.stat()
+                    files[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return mtime, subdirs, files
+
+    def _add_tree(self, directory, ignored, rel_dir, changed):
+        stack = [(Path(directory), rel_dir)]
+        while stack:
+            current, rel = stack.pop()
+            listing = self._list(current, ignored, rel)
+            if listing is None:
+                continue
+            mtime, subdirs, files = listing
+            self.dirs[current] = PolledDir(mtime, rel, ignored, set(subdirs), set(files))
+            self.stamps.update(files)
+            changed.update(files)
+            stack.extend(subdirs.items())
+
+    def _drop_tree(self, directory, removed):
+        stack = [directory]
+        while stack:
+            polled = self.dirs.pop(stack.pop(), None)
+            if polled is None:
+                continue
+            for path in polled.files:
+                self.stamps.pop(path, None)
+            removed.update(polled.files)
+            stack.extend(polled.subdirs)
+
+    def _refresh(self, directory, changed, removed):
+        """Re-list one folder whose mtime moved and diff it against what was there."""
+        polled = self.dirs[directory]
+        listing = self._list(directory, polled.ignored, polled.rel_dir)
+        if listing is None:
+            self._drop_tree(directory, removed)
+            return
+        mtime, subdirs, files = listing
+        for path in polled.files - files.keys():
+            self.stamps.pop(path, None)
+            removed.add(path)
+        for path, stamp in files.items():
+            if self.stamps.get(path) != stamp:
+                self.stamps[path] = stamp
+                changed.add(path)
+        for path in polled.subdirs - subdirs.keys():
+            self._drop_tree(path, removed)
+        for path, rel in subdirs.items():
+            if path not in polled.subdirs:
+                self._add_tree(path, polled.ignored, rel, changed)
+        polled.mtime, polled.subdirs, polled.files = mtime, set(subdirs), set(files)
+
+    def read(self, timeout):
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set(), set()
+        if wait > 0:
+            time.sleep(wait)
+        now = time.monotonic()
+        self._next = now + self.interval
+        changed, removed = set(), set()
+        for directory in list(self.dirs):
+            polled = self.dirs.get(directory)
+            if polled is None:
+                continue
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != polled.mtime:
+                self._refresh(directory, changed, removed)
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep
+            for path, stamp in list(self.stamps.items()):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if (st.st_mtime_ns, st.st_size) != stamp:
+                    self.stamps[path] = (st.st_mtime_ns, st.st_size)
+                    changed.add(path)
+        return changed, removed
+
+    def close(self):
+        pass
+
+
+def open_watcher(roots, log=print):
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            log(f"inotify unavailable ({e}); polling every {POLL_SECONDS:g}s instead.")
+    return PollingWatcher(roots)
+
+
+def affected_models(changed, removed):
+    """Model paths to regenerate for a set of changed and removed .model files and transforms tables.
+
+    A plain model stands alone. A `_brk` fragment or its group's transforms
+    table pulls in every fragment of the group from the same folder (one
+    listing of that folder), so the bulletskeleton is rebuilt with the full
+    set of fragments, including after a fragment was deleted.
+    """
+    models = {Path(p) for p in changed
+              if is_model(Path(p).name) and not BRK_MODEL_RE.match(Path(p).stem) and Path(p).is_file()}
+    groups = {}
+    for p in set(changed) | set(removed):
+        p = Path(p)
+        m = BRK_MODEL_RE.match(p.stem) if is_model(p.name) else TRANSFORMS_RE.match(p.name)
+        if m:
+            groups.setdefault(p.parent, set()).add(m.group(1))
+    for directory, prefixes in groups.items():
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if not is_model(entry.name):
+                continue
+            m = BRK_MODEL_RE.match(Path(entry.name).stem)
+            if m and m.group(1) in prefixes:
+                models.add(Path(entry.path))
+    return sorted(models)
+
+
+def watch(roots, on_batch, stop=None, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DELAY_SECONDS, log=print):
+    """Call `on_batch(model_paths)` for each burst of changes under `roots` until `stop` is set.
+
+    A burst ends once no event has arrived for `debounce` seconds, or
+    `max_delay` seconds after its first event if changes keep coming.
+    `on_batch` runs on the watching thread; changes made meanwhile are
+    queued by the watcher and form the next burst.
+    """
+    stop = stop or threading.Event()
+    watcher = open_watcher(roots, log=log)
+    changed, removed = set(), set()
+    first = last = None
+    try:
+        while not stop.is_set():
+            timeout = 0.25
+            if last is not None:
+                timeout = max(0.0, min(timeout, last + debounce - time.monotonic(),
+                                       first + max_delay - time.monotonic()))
+            new_changed, new_removed = watcher.read(timeout)
+            if new_changed or new_removed:
+                changed = (changed - new_removed) | new_changed
+                removed = (removed - new_changed) | new_removed
+                last = time.monotonic()
+                first = first or last
+            if last is None:
+                continue
+            now = time.monotonic()
+            if now - last >= debounce or now - first >= max_delay:
+                batch = affected_models(changed, removed)
+                changed, removed = set(), set()
+                first = last = None
+                if batch:
+                    on_batch(batch)
+    finally:
+        watcher.close()
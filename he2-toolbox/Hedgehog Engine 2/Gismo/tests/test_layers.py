@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from gismo.core import GISMO_SUFFIX
+from gismo.layers import TemplateError, apply_overlay, merge_patch
+from gismo.registry import TemplateRegistry
+
+BASE = {"Design": {"RangeIn": 1000.0, "Tags": ["a", "b"], "RigidBody": {"Type": "Static", "Mass": 1.0}},
+        "Plan": {"ContactDamageType": "None"}}
+
+
+def write(folder, name, document):
+    path = folder / f"{name}{GISMO_SUFFIX}"
+    path.write_text(json.dumps(document))
+    return path
+
+
+def test_set_and_patch():
+    overlay = {"$base": "base",
+               "$patch": {"Plan": None, "Design": {"Extra": {"On": True}}},
+               "$set": {"Design.RigidBody.Type": "Dynamic", "Design.Tags.1": "c", "Design.RigidBody.Mass": 2}}
+    document = apply_overlay(BASE, overlay)
+    assert document == {"Design": {"RangeIn": 1000.0, "Tags": ["a", "c"], "Extra": {"On": True},
+                                   "RigidBody": {"Type": "Dynamic", "Mass": 2.0}}}
+    assert isinstance(document["Design"]["RigidBody"]["Mass"], float)
+    assert BASE["Design"]["RigidBody"]["Type"] == "Static" and BASE["Design"]["Tags"] == ["a", "b"]
+    assert document["Design"] is not BASE["Design"]
+
+
+def test_merge_patch_leaves_target_alone():
+    target = {"a": {"b": 1, "c": 2}}
+    assert merge_patch(target, {"a": {"b": None, "d": 3}}) == {"a": {"c": 2, "d": 3}}
+    assert target == {"a": {"b": 1, "c": 2}}
+
+
+@pytest.mark.parametrize('overlay, message', [
+    ({"$base": "base", "$sett": {}}, "unknown overlay key"),
+    ({"$base": "base", "$set": {"Design.Missing.Key": 1}}, "Design.Missing"),
+])
+def test_overlay_errors(overlay, message):
+    with pytest.raises(TemplateError, match=message):
+        apply_overlay(BASE, overlay)
+
+
+def test_registry_resolves_layers_next_to_the_overlay(tmp_path):
+    write(tmp_path, 'base', BASE)
+    write(tmp_path, 'heavy', {"$base": "base", "$set": {"Design.RigidBody.Mass": 50.0}})
+    top = write(tmp_path, 'heavy_dynamic', {"$base": "heavy", "$set": {"Design.RigidBody.Type": "Dynamic"}})
+    registry = TemplateRegistry()
+    document = registry.get(top)
+    assert document["Design"]["RigidBody"] == {"Type": "Dynamic", "Mass": 50.0}
+    assert document["Plan"] is registry.get(tmp_path / f"base{GISMO_SUFFIX}")["Plan"]
+    assert registry.plan(top).apply('m')["Design"]["RigidBody"]["Mass"] == 50.0
+
+
+def test_registry_reloads_when_a_lower_layer_changes(tmp_path):
+    base = write(tmp_path, 'base', BASE)
+    top = write(tmp_path, 'top', {"$base": "base", "$set": {"Design.RangeIn": 10.0}})
+    registry = TemplateRegistry()
+    assert registry.get(top)["Plan"]["ContactDamageType"] == "None"
+    changed = json.loads(json.dumps(BASE))
+    changed["Plan"]["ContactDamageType"] = "HighSpeed!"
+    base.write_text(json.dumps(changed))
+    st = os.stat(base)
+    os.utime(base, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    document = registry.get(top)
+    assert document["Plan"]["ContactDamageType"] == "HighSpeed!"
+    assert document["Design"]["RangeIn"] == 10.0
+
+
+def test_registry_rejects_loops_and_missing_bases(tmp_path):
+    a = write(tmp_path, 'a', {"$base": "b"})
+    write(tmp_path, 'b', {"$base": "a"})
+    lonely = write(tmp_path, 'lonely', {"$base": "no_such_template"})
+    registry = TemplateRegistry()
+    with pytest.raises(TemplateError, match="loop"):
+        registry.get(a)
+    with pytest.raises(TemplateError, match="not found"):
+        registry.get(lonely)
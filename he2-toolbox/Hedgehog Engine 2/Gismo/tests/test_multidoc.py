@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from gismo.buildcache import BuildManifest
+from gismo.core import GISMO_SUFFIX
+from gismo.multidoc import BulkEditError, DocumentSet, Mixed
+from gismo.schema import Validator
+
+MASS = ('Design', 'RigidBody', 'PhysicsParam', 'Mass')
+
+
+def gismo(mass, kind="Static"):
+    return {"Design": {"RigidBody": {"Type": kind, "PhysicsParam": {"Mass": mass}}, "Tags": ["a", "b"]}}
+
+
+def write(folder, name, document):
+    path = folder / f"{name}{GISMO_SUFFIX}"
+    path.write_text(json.dumps(document, indent=2))
+    return path
+
+
+@pytest.fixture
+def docs(tmp_path):
+    paths = [write(tmp_path, 'one', gismo(1.0)), write(tmp_path, 'two', gismo(2.0)),
+             write(tmp_path, 'three', gismo(1.0, "Dynamic"))]
+    docs = DocumentSet()
+    assert docs.load(paths) == []
+    return docs
+
+
+def mass(docs):
+    return [d['Design']['RigidBody']['PhysicsParam']['Mass'] for d in docs.documents]
+
+
+def test_merged_shows_only_differences(docs):
+    merged = docs.merged([0, 1, 2])
+    assert set(merged['Design']['RigidBody']) == {'Type', 'PhysicsParam'}
+    assert isinstance(merged['Design']['RigidBody']['Type'], Mixed)
+    assert docs.merged([0, 2], only_differing=False)['Design']['Tags'] == ['a', 'b']
+    assert docs.merged([0]) == {}
+
+
+def test_set_undo_redo(docs):
+    assert docs.set_value(MASS, 5, [0, 2]) == (2, 0)
+    assert mass(docs) == [5.0, 2.0, 5.0]
+    assert isinstance(mass(docs)[0], float)
+    assert docs.changed() == [0, 2]
+    assert docs.undo() and mass(docs) == [1.0, 2.0, 1.0]
+    assert docs.changed() == []
+    assert docs.redo() and mass(docs) == [5.0, 2.0, 5.0]
+    assert not docs.redo()
+
+
+def test_set_skips_documents_without_the_scalar(docs):
+    assert docs.set_value(('Design', 'RigidBody', 'Missing'), 1, [0, 1]) == (0, 2)
+    assert docs.set_value(('Design', 'Tags'), 1, [0]) == (0, 1)
+    assert docs.set_value(MASS, 1.0, [0]) == (0, 0)
+    assert not docs.history.can_undo()
+
+
+def test_loading_more_files_keeps_history(docs, tmp_path):
+    docs.set_value(MASS, 9, [0])
+    assert docs.load([write(tmp_path, 'four', gismo(4.0)), docs.paths[0]]) == []
+    assert len(docs) == 4
+    docs.set_value(MASS, 7, [3])
+    assert docs.undo() and mass(docs) == [9.0, 2.0, 1.0, 4.0]
+    assert docs.undo() and mass(docs) == [1.0, 2.0, 1.0, 4.0]
+
+
+def test_load_rejects_overlays_and_bad_json(tmp_path):
+    overlay = write(tmp_path, 'layer', {"$base": "default"})
+    broken = tmp_path / f"broken{GISMO_SUFFIX}"
+    broken.write_text("{")
+    docs = DocumentSet()
+    errors = dict(docs.load([overlay, broken]))
+    assert set(errors) == {overlay, broken}
+    assert "layered template" in errors[overlay]
+    assert len(docs) == 0
+
+
+def test_save_writes_changed_files_and_pins_edits(docs, tmp_path):
+    before = docs.paths[1].read_bytes()
+    docs.set_value(MASS, 7.5, [0, 2])
+    docs.set_value(('Design', 'Tags', 1), 'c', [0])
+    assert docs.save(log=lambda m: None) == [docs.paths[0], docs.paths[2]]
+    assert json.loads(docs.paths[0].read_text()) == {
+        "Design": {"RigidBody": {"Type": "Static", "PhysicsParam": {"Mass": 7.5}}, "Tags": ["a", "c"]}}
+    assert docs.paths[1].read_bytes() == before
+    assert docs.changed() == []
+    manifest = BuildManifest(tmp_path)
+    assert manifest.pinned('one') == {'Design.RigidBody.PhysicsParam.Mass': 7.5, 'Design.Tags.1': 'c'}
+    assert manifest.pinned('three') == {'Design.RigidBody.PhysicsParam.Mass': 7.5}
+    assert manifest.pinned('two') == {}
+
+
+def test_save_refuses_invalid_documents(docs):
+    originals = [p.read_bytes() for p in docs.paths]
+    docs.set_value(('Design', 'RigidBody', 'Type'), 'Wobbly', [0])
+    validator = Validator([gismo(1.0)], [])
+    with pytest.raises(BulkEditError):
+        docs.save(validator, log=lambda m: None)
+    assert [p.read_bytes() for p in docs.paths] == originals
+    assert docs.changed() == [0]
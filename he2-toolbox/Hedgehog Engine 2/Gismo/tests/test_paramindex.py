@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from gismo.buildcache import BuildManifest
+from gismo.core import GISMO_SUFFIX
+from gismo.paramindex import ParamIndex, QueryError, parse_condition
+from gismo.schema import Validator
+
+
+def gismo(mass, kind="Static", note=None):
+    return {"Design": {"RigidBody": {"Type": kind, "PhysicsParam": {"Mass": mass}}, "Note": note}}
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / 'mod'
+    files = {'a/light': gismo(5.0), 'a/heavy': gismo(100.0, "Dynamic"), 'b/text': gismo("heavy", note="x"),
+             'b/int': gismo(60, "dynamic")}
+    for rel, document in files.items():
+        path = root / f"{rel}{GISMO_SUFFIX}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(document, indent=2))
+    (root / '.git').mkdir()
+    (root / '.git' / f"ignored{GISMO_SUFFIX}").write_text(json.dumps(gismo(1000.0)))
+    return root
+
+
+@pytest.fixture
+def index(root, tmp_path):
+    with ParamIndex(root, tmp_path / 'index.sqlite') as index:
+        index.refresh()
+        yield index
+
+
+def rel(name):
+    return f"{name}{GISMO_SUFFIX}"
+
+
+def test_numeric_compares_skip_strings(index):
+    assert index.query(['Mass>50']) == [rel('a/heavy'), rel('b/int')]
+    assert index.query(['PhysicsParam.Mass<=5']) == [rel('a/light')]
+    assert index.query(['Mass=heavy']) == [rel('b/text')]
+
+
+def test_string_compares_ignore_case_and_conditions_intersect(index):
+    assert index.query(['RigidBody.Type=DYNAMIC']) == [rel('a/heavy'), rel('b/int')]
+    assert index.query(['Type=dynamic', 'Mass>80']) == [rel('a/heavy')]
+    assert index.query(['Design.*.Type!=static']) == [rel('a/heavy'), rel('b/int')]
+    assert index.query(['NoSuch.Path=1']) == []
+
+
+def test_nulls_are_not_indexed(index):
+    assert index.query(['Note=x']) == [rel('b/text')]
+    assert index.stats()['files'] == 4
+
+
+def test_parse_condition_rejects_garbage():
+    with pytest.raises(QueryError):
+        parse_condition('Mass')
+
+
+def test_refresh_is_incremental(root, index):
+    assert index.refresh() == (0, 0, [])
+    (root / rel('a/light')).write_text(json.dumps(gismo(75.0), indent=2))
+    (root / rel('b/text')).unlink()
+    assert index.refresh()[:2] == (1, 1)
+    assert index.query(['Mass>50']) == [rel('a/heavy'), rel('a/light'), rel('b/int')]
+
+
+def test_set_writes_reindexes_and_pins(root, index):
+    files = index.query(['Type=dynamic'])
+    written = index.update(files, {'PhysicsParam.Mass': 450}, log=lambda m: None)
+    assert written == files
+    document = json.loads((root / rel('a/heavy')).read_text())
+    assert document['Design']['RigidBody']['PhysicsParam']['Mass'] == 450.0
+    assert index.query(['Mass=450']) == files
+    assert index.pinned(files) == {f: {'PhysicsParam.Mass': 450} for f in files}
+    assert BuildManifest(root / 'a').pinned('heavy') == {'PhysicsParam.Mass': 450}
+
+    assert index.unpin(files, ['Other.Path']) == []
+    assert index.unpin(files) == files
+    assert index.pinned(files) == {}
+
+
+def test_set_writes_nothing_if_any_file_fails(root, index):
+    before = {p: p.read_bytes() for p in root.rglob(f"*{GISMO_SUFFIX}")}
+    validator = Validator([gismo(1.0, note="n")], [])
+    messages = []
+    with pytest.raises(QueryError):
+        index.update(index.query([]), {'RigidBody.Type': 'Wobbly'}, validator=validator, log=messages.append)
+    assert messages
+    assert {p: p.read_bytes() for p in root.rglob(f"*{GISMO_SUFFIX}")} == before
+    assert index.pinned(index.query([])) == {}
@@ -0,0 +1,148 @@
+import json
+import threading
+
+from gismo import core, pipeline
+from gismo.bench import STUB_CONVERTER, make_model_set
+from gismo.buildcache import BuildManifest
+from gismo.core import GISMO_SUFFIX, SKELETON_SUFFIX
+from gismo.registry import TEMPLATES
+
+
+def build(model_paths, template=None, **kwargs):
+    messages = []
+    template = template or TEMPLATES.load(core.resolve_template_path('default'))
+    failures = pipeline.generate(template, model_paths, STUB_CONVERTER, workers=1, log=messages.append, **kwargs)
+    return failures, messages
+
+
+def node_names(path):
+    return [n['NodeName'] for n in json.loads(path.read_text())]
+
+
+def test_stub_converter_builds_everything(tmp_path):
+    paths = make_model_set(tmp_path, plain=3, groups=1, fragments=3)
+    failures, messages = build(paths)
+    assert failures == []
+    folder = tmp_path / 'area00'
+    for ext in ('gismod', 'gismop'):
+        assert (folder / f"obj_00000.{ext}").is_file()
+    assert (folder / f"obj_00000{GISMO_SUFFIX}").read_bytes() == (folder / 'obj_00000.gismod').read_bytes()
+    assert node_names(folder / f"brk_0000_brk{SKELETON_SUFFIX}") == [
+        'brk_0000_brk', 'brk_0000_brkA__01', 'brk_0000_brkB__01', 'brk_0000_brkC__01']
+    assert (folder / 'brk_0000_brk.pxd').is_file()
+
+
+def test_same_named_breakables_in_two_folders(tmp_path):
+    paths = []
+    for folder, fragments in (('a', 'AB'), ('b', 'C')):
+        (tmp_path / folder).mkdir()
+        for fragment in fragments:
+            path = tmp_path / folder / f"rock_brk{fragment}.model"
+            path.touch()
+            paths.append(path)
+    _, groups = core.split_models(paths)
+    assert {key: group['fragments'] for key, group in groups.items()} == {
+        (tmp_path / 'a', 'rock'): {'A', 'B'}, (tmp_path / 'b', 'rock'): {'C'}}
+
+    failures, _ = build(paths)
+    assert failures == []
+    assert node_names(tmp_path / 'a' / f"rock_brk{SKELETON_SUFFIX}") == [
+        'rock_brk', 'rock_brkA__01', 'rock_brkB__01']
+    assert node_names(tmp_path / 'b' / f"rock_brk{SKELETON_SUFFIX}") == ['rock_brk', 'rock_brkC__01']
+    assert (tmp_path / 'b' / 'rock_brk.pxd').is_file()
+
+
+def test_output_dir_mirrors_the_model_tree(tmp_path):
+    paths = make_model_set(tmp_path / 'models', plain=2, groups=0)
+    failures, _ = build(paths, models_root=tmp_path / 'models', output_dir=tmp_path / 'out')
+    assert failures == []
+    assert (tmp_path / 'out' / 'area01' / 'obj_00001.gismod').is_file()
+    assert not (tmp_path / 'models' / 'area01' / 'obj_00001.gismod').exists()
+
+
+def test_unchanged_inputs_are_skipped(tmp_path):
+    paths = make_model_set(tmp_path, plain=3, groups=1)
+    build(paths)
+    failures, messages = build(paths)
+    assert failures == []
+    assert "Skipped 4 up-to-date item(s)." in messages
+    assert not any(m.startswith('Wrote') for m in messages)
+
+
+def test_template_change_and_force_rebuild(tmp_path):
+    paths = make_model_set(tmp_path, plain=2, groups=0)
+    template = TEMPLATES.load(core.resolve_template_path('default'))
+    build(paths, template)
+    template['Design']['RangeIn'] = 500.0
+    failures, messages = build(paths, template)
+    assert failures == [] and not any(m.startswith('Skipped') for m in messages)
+    document = json.loads((tmp_path / 'area00' / f"obj_00000{GISMO_SUFFIX}").read_text())
+    assert document['Design']['RangeIn'] == 500.0
+
+    failures, messages = build(paths, template, force=True)
+    assert not any(m.startswith('Skipped') for m in messages)
+    assert "Unchanged obj_00000" + GISMO_SUFFIX in messages
+
+
+def test_changed_or_deleted_output_is_rebuilt(tmp_path):
+    paths = make_model_set(tmp_path, plain=3, groups=0)
+    build(paths)
+    (tmp_path / 'area01' / 'obj_00001.gismop').unlink()
+    (tmp_path / 'area02' / 'obj_00002.gismod').write_text('edited by hand')
+    failures, messages = build(paths)
+    assert "Skipped 1 up-to-date item(s)." in messages
+    assert (tmp_path / 'area01' / 'obj_00001.gismop').is_file()
+    assert (tmp_path / 'area02' / 'obj_00002.gismod').read_text() != 'edited by hand'
+
+
+def test_failed_jobs_are_not_recorded(tmp_path, monkeypatch):
+    paths = make_model_set(tmp_path, plain=1, groups=0)
+    monkeypatch.setenv('GISMO_STUB_FAIL', '1')
+    failures, messages = build(paths)
+    assert failures == ['obj_00000']
+    assert 'obj_00000' not in BuildManifest(tmp_path / 'area00').entries
+
+    monkeypatch.delenv('GISMO_STUB_FAIL')
+    failures, messages = build(paths)
+    assert failures == [] and not any(m.startswith('Skipped') for m in messages)
+
+
+def test_pinned_edits_survive_a_rebuild(tmp_path):
+    paths = make_model_set(tmp_path, plain=1, groups=0)
+    build(paths)
+    manifest = BuildManifest(tmp_path / 'area00')
+    manifest.pin('obj_00000', {'PhysicsParam.Mass': 7.5})
+    manifest.save()
+
+    build(paths)
+    document = json.loads((tmp_path / 'area00' / f"obj_00000{GISMO_SUFFIX}").read_text())
+    assert document['Design']['RigidBody']['PhysicsParam']['Mass'] == 7.5
+    failures, messages = build(paths)
+    assert "Skipped 1 up-to-date item(s)." in messages
+
+    manifest = BuildManifest(tmp_path / 'area00')
+    assert manifest.unpin('obj_00000') == ['PhysicsParam.Mass']
+    manifest.save()
+    build(paths)
+    document = json.loads((tmp_path / 'area00' / f"obj_00000{GISMO_SUFFIX}").read_text())
+    assert document['Design']['RigidBody']['PhysicsParam']['Mass'] == 1.0
+
+
+def test_cancel_stops_between_models_without_a_converter(tmp_path):
+    paths = make_model_set(tmp_path, plain=5, groups=0)
+    cancel = threading.Event()
+    messages = []
+    template = TEMPLATES.load(core.resolve_template_path('default'))
+    pipeline.generate(template, paths, None, log=messages.append, cancel=cancel,
+                      progress=lambda done, total, name, ok: cancel.set())
+    assert len(list(tmp_path.rglob(f"*{GISMO_SUFFIX}"))) == 1
+    assert "Cancelled: 4 item(s) not processed." in messages
+
+
+def test_cancel_before_the_converter_phase_launches_nothing(tmp_path):
+    paths = make_model_set(tmp_path, plain=2, groups=0)
+    cancel = threading.Event()
+    cancel.set()
+    failures, messages = build(paths, cancel=cancel)
+    assert list(tmp_path.rglob('*.gismod')) == []
+    assert "Cancelled: 2 item(s) not processed." in messages
@@ -0,0 +1,41 @@
+import json
+import string
+
+import pytest
+
+from gismo import core
+from gismo.core import TEMPLATES_DIR, BRK_TEMPLATE_NAME
+from gismo.plan import SkeletonPlan, SubstitutionPlan
+from gismo.registry import TEMPLATES
+
+NAMES = ['obj_00001', 'door "quoted"', 'back\\slash', 'ünïcode_名', '{model_name}', '']
+
+
+def gismo_templates():
+    return TEMPLATES.list_templates(TEMPLATES_DIR)
+
+
+@pytest.mark.parametrize('path', gismo_templates(), ids=lambda p: p.name.split('.')[0])
+def test_render_matches_generator(path):
+    template = TEMPLATES.load(path)
+    plan = SubstitutionPlan(template)
+    for name in NAMES:
+        expected = json.dumps(core.model_name_generator(template, name), indent=2)
+        assert plan.render(name) == expected
+        assert plan.apply(name) == core.model_name_generator(template, name)
+
+
+def test_render_with_marker_lookalike_in_template():
+    template = {"Name": "{model_name}", "Note": "__GISMO_SLOT_0_0__", "Mesh": "{model_name}"}
+    plan = SubstitutionPlan(template)
+    assert plan.render('a') == json.dumps(core.model_name_generator(template, 'a'), indent=2)
+
+
+@pytest.mark.parametrize('fragments', [set('A'), set('ABD'), set(string.ascii_uppercase)],
+                         ids=['one', 'gap', 'all'])
+def test_skeleton_render_matches_filter(fragments):
+    skeleton = core.load_template(TEMPLATES_DIR / BRK_TEMPLATE_NAME)
+    expected = json.dumps([core.model_name_generator(node, 'brk_0001')
+                           for node in core.filter_bulletskeleton(skeleton, fragments)], indent=2)
+    assert SkeletonPlan(skeleton).render('brk_0001', fragments) == expected
+
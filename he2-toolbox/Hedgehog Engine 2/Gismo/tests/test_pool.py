@@ -0,0 +1,42 @@
+from gismo.bench import STUB_CONVERTER
+from gismo.core import GISMO_OUTPUT_EXTS, GISMO_SUFFIX
+from gismo.pool import ConverterJob, ConverterPool
+
+
+def jobs(tmp_path, folders=('a', 'b')):
+    made = []
+    for folder in folders:
+        dest = tmp_path / folder
+        dest.mkdir()
+        json_path = dest / f"rock{GISMO_SUFFIX}"
+        json_path.write_text(f'{{"folder": "{folder}"}}')
+        made.append(ConverterJob('rock', json_path, dest, expected=GISMO_OUTPUT_EXTS))
+    return made
+
+
+def test_jobs_sharing_a_name_do_not_collide(tmp_path):
+    scratch = tmp_path / 'scratch'
+    scratch.mkdir()
+    pool = ConverterPool(STUB_CONVERTER, workers=2, scratch_root=scratch)
+    results = list(pool.run(jobs(tmp_path)))
+    assert all(r.ok and r.returncode == 0 for r in results)
+    for folder in ('a', 'b'):
+        assert (tmp_path / folder / 'rock.gismod').read_text() == f'{{"folder": "{folder}"}}'
+    assert list(scratch.iterdir()) == []
+
+
+def test_nonzero_exit_fails_without_moving_outputs(tmp_path, monkeypatch):
+    monkeypatch.setenv('GISMO_STUB_FAIL', '1')
+    [result] = ConverterPool(STUB_CONVERTER, workers=1).run(jobs(tmp_path, ('a',)))
+    assert not result.ok
+    assert result.returncode == 1
+    assert result.error == "converter exited with code 1"
+    assert not (tmp_path / 'a' / 'rock.gismod').exists()
+
+
+def test_cancelled_pool_launches_nothing(tmp_path):
+    pool = ConverterPool(STUB_CONVERTER, workers=1)
+    pool.cancel()
+    results = list(pool.run(jobs(tmp_path)))
+    assert all(r.cancelled and not r.ok and r.returncode is None for r in results)
+    assert not (tmp_path / 'a' / 'rock.gismod').exists()
@@ -0,0 +1,52 @@
+from gismo import core, pipeline
+from gismo.bench import STUB_CONVERTER, make_model_set
+from gismo.core import BRK_TEMPLATE_NAME, TEMPLATES_DIR
+from gismo.registry import TEMPLATES
+from gismo.scan import plan_batch, scan_models
+
+
+def templates():
+    return (TEMPLATES.get(core.resolve_template_path('default')),
+            TEMPLATES.get(TEMPLATES_DIR / BRK_TEMPLATE_NAME))
+
+
+def statuses(plan):
+    return {(item.kind, item.name, item.dest_dir): item.status for item in plan.items}
+
+
+def test_scan_honours_ignores(tmp_path):
+    make_model_set(tmp_path, plain=3, groups=0)
+    (tmp_path / '.gismoignore').write_text("# comment\narea01\n")
+    (tmp_path / '.git').mkdir()
+    (tmp_path / '.git' / 'x.model').touch()
+    scan = scan_models(tmp_path, ignore=['obj_00002.model'])
+    assert scan.models == [tmp_path / 'area00' / 'obj_00000.model']
+    assert scan.has_file(str(tmp_path / 'area00'), 'obj_00000.model')
+
+
+def test_same_named_breakables_plan_one_skeleton_per_folder(tmp_path):
+    for folder, fragments in (('a', 'AB'), ('b', 'C')):
+        (tmp_path / folder).mkdir()
+        for fragment in fragments:
+            (tmp_path / folder / f"rock_brk{fragment}.model").touch()
+    plan = plan_batch(scan_models(tmp_path), *templates())
+    skeletons = sorted((item.dest_dir, sorted(item.fragments)) for item in plan.items)
+    assert skeletons == [(str(tmp_path / 'a'), ['A', 'B']), (str(tmp_path / 'b'), ['C'])]
+
+
+def test_plan_tracks_the_build_manifest(tmp_path):
+    paths = make_model_set(tmp_path, plain=2, groups=1)
+    template, brk_template = templates()
+    plan = plan_batch(scan_models(tmp_path), template, brk_template, STUB_CONVERTER)
+    assert set(statuses(plan).values()) == {'missing'}
+
+    pipeline.generate(TEMPLATES.load(core.resolve_template_path('default')), paths, STUB_CONVERTER,
+                      workers=1, log=lambda m: None)
+    plan = plan_batch(scan_models(tmp_path), template, brk_template, STUB_CONVERTER)
+    assert set(statuses(plan).values()) == {'current'}
+    assert plan.pending() == []
+
+    changed = dict(template, Extra=1)
+    plan = plan_batch(scan_models(tmp_path), changed, brk_template, STUB_CONVERTER)
+    assert {kind: status for (kind, _, _), status in statuses(plan).items()} == {
+        'gismo': 'stale', 'bulletskeleton': 'current'}
@@ -0,0 +1,99 @@
+import json
+
+from gismo import pipeline
+from gismo.bench import STUB_CONVERTER
+from gismo.core import GISMO_SUFFIX, SKELETON_SUFFIX, TEMPLATES_DIR
+from gismo.schema import GISMO, SKELETON, Validator, default_validator, validate_files
+
+GISMO_EXAMPLE = {"Design": {"RigidBody": {"Type": "Static", "Mass": 1.0}, "Name": "{model_name}", "Note": None},
+                 "Tags": ["a"]}
+SKELETON_EXAMPLE = [{"NodeName": "{model_name}_brk", "ParentNodeIndex": -1},
+                    {"NodeName": "{model_name}_brkA__01", "ParentNodeIndex": 0}]
+
+
+def validator():
+    return Validator([GISMO_EXAMPLE], [SKELETON_EXAMPLE])
+
+
+def check(document, kind=GISMO, **kwargs):
+    warnings = []
+    problems = validator().check(document, kind, warnings=warnings, **kwargs)
+    return sorted(problems), sorted(warnings)
+
+
+def document(**design):
+    doc = json.loads(json.dumps(GISMO_EXAMPLE))
+    doc["Design"].update(design)
+    return doc
+
+
+def test_example_is_valid():
+    assert check(GISMO_EXAMPLE) == ([], [])
+    assert check(SKELETON_EXAMPLE, SKELETON) == ([], [])
+
+
+def test_wrong_kind_and_enum_are_errors():
+    doc = document(RigidBody={"Type": "Floaty", "Mass": "heavy"})
+    problems, warnings = check(doc)
+    assert problems == [(('Design', 'RigidBody', 'Mass'), 'expected number, got "heavy"'),
+                        (('Design', 'RigidBody', 'Type'), "'Floaty' is not one of Dynamic, None, Static")]
+    assert warnings == []
+
+
+def test_null_in_every_example_takes_any_scalar():
+    assert check(document(Note=3))[0] == []
+    assert check(document(Note="text"))[0] == []
+    assert check(document(Note={"x": 1}))[0] != []
+
+
+def test_missing_and_unknown_keys_are_warnings():
+    doc = document(Extra=1)
+    del doc["Design"]["RigidBody"]["Mass"]
+    problems, warnings = check(doc)
+    assert problems == []
+    assert warnings == [(('Design', 'Extra'), "unknown key 'Extra'"),
+                        (('Design', 'RigidBody', 'Mass'), 'missing')]
+
+
+def test_placeholders_flagged_only_when_asked():
+    assert check(GISMO_EXAMPLE)[0] == []
+    assert check(GISMO_EXAMPLE, placeholders=False)[0] == [(('Design', 'Name'), 'unsubstituted {model_name}')]
+
+
+def test_skeleton_node_rules():
+    nodes = [{"NodeName": "a", "ParentNodeIndex": 1}, {"NodeName": "a", "ParentNodeIndex": 0},
+             {"NodeName": "c", "ParentNodeIndex": 7}]
+    messages = [m for _, m in check(nodes, SKELETON)[0]]
+    assert "no root node (ParentNodeIndex -1)" in messages
+    assert "duplicate of node 0 ('a')" in messages
+    assert "7 is not -1 or another node's index (0-2)" in messages
+    assert messages.count("parent chain loops back to this node") == 2
+
+
+def test_bundled_templates_are_valid():
+    paths = sorted(TEMPLATES_DIR.glob(f"*{GISMO_SUFFIX}")) + sorted(TEMPLATES_DIR.glob(f"*{SKELETON_SUFFIX}"))
+    assert paths
+    assert [str(p) for p in validate_files(paths, workers=1) if not p.warning] == []
+
+
+def test_check_file_reports_bad_json(tmp_path):
+    path = tmp_path / f"broken{GISMO_SUFFIX}"
+    path.write_text("{")
+    problems = default_validator().check_file(path)
+    assert len(problems) == 1 and "invalid JSON" in problems[0].message
+
+
+def test_pipeline_logs_warnings_and_fails_on_errors(tmp_path):
+    model = tmp_path / 'obj.model'
+    model.touch()
+    messages = []
+    failures = pipeline.generate(document(Renamed=1), [model], STUB_CONVERTER, workers=1,
+                                 log=messages.append, validator=validator())
+    assert failures == []
+    assert "WARNING template: Design.Renamed: unknown key 'Renamed'" in messages
+
+    messages.clear()
+    failures = pipeline.generate(document(RigidBody={"Type": "Floaty", "Mass": 1.0}), [model], STUB_CONVERTER,
+                                 workers=1, log=messages.append, validator=validator())
+    assert failures == ['obj']
+    assert any(m.startswith("INVALID template: Design.RigidBody.Type:") for m in messages)
@@ -0,0 +1,70 @@
+import json
+import math
+
+import pytest
+
+from gismo import core, pipeline, transforms
+from gismo.bench import STUB_CONVERTER, fragment_names
+from gismo.core import BRK_TEMPLATE_NAME, SKELETON_SUFFIX, TEMPLATES_DIR
+from gismo.plan import SkeletonPlan
+from gismo.registry import TEMPLATES
+from gismo.transforms import IDENTITY, TransformError, load_transforms
+
+TABLE = """fragment,x,y,z,rx,ry,rz,qx,qy,qz,qw,s
+# comment rows and blank lines are skipped
+
+A,1,2,3,,90,,,,,,
+B,,,,,,,0,0,2,0,2
+C,,,,,,,,,,,
+"""
+
+
+def skeleton_plan():
+    return SkeletonPlan(core.load_template(TEMPLATES_DIR / BRK_TEMPLATE_NAME))
+
+
+def test_numbered_fragments_parent_the_root():
+    nodes = skeleton_plan().apply('rock', fragment_names(30))
+    assert [n['NodeName'] for n in nodes[:3]] == ['rock_brk', 'rock_brk01__01', 'rock_brk02__01']
+    assert len(nodes) == 31
+    assert all(n['ParentNodeIndex'] == 0 for n in nodes[1:])
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'math'])
+def test_table_rows(tmp_path, monkeypatch, backend):
+    if backend == 'math':
+        monkeypatch.setattr(transforms, 'numpy', None)
+    elif transforms.numpy is None:
+        pytest.skip("NumPy not installed")
+    table = tmp_path / 'rock_brk.transforms.csv'
+    table.write_text(TABLE)
+    loaded = load_transforms(table, {'A', 'B', 'C'}, lambda fragment: IDENTITY)
+    half = math.sqrt(0.5)
+    assert loaded['A'] == pytest.approx((1, 2, 3, 0, half, 0, half, 1, 1, 1))
+    assert loaded['B'] == (0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 2.0, 2.0, 2.0)
+    assert loaded['C'] == IDENTITY
+
+
+@pytest.mark.parametrize('row, message', [
+    ("A,1,,,90,,,0,0,0,1,", "not both"),
+    ("A,,,,,,,0,0,0,0,", "zero-length"),
+    ("A,,,,,,,,,,,0", "scale of 0"),
+])
+def test_bad_rows_name_the_fragment(tmp_path, row, message):
+    table = tmp_path / 'rock_brk.transforms.csv'
+    table.write_text(TABLE.splitlines()[0] + "\n" + row + "\n")
+    with pytest.raises(TransformError, match=f"fragment A: .*{message}"):
+        load_transforms(table, {'A'}, lambda fragment: IDENTITY)
+
+
+def test_pipeline_applies_the_table(tmp_path):
+    for fragment in fragment_names(30)[:3]:
+        (tmp_path / f"rock_brk{fragment}.model").touch()
+    (tmp_path / 'rock_brk.transforms.csv').write_text("fragment,x,s\n02,5,3\n99,1,1\n")
+    failures = pipeline.generate(TEMPLATES.load(core.resolve_template_path('default')),
+                                 sorted(tmp_path.glob('*.model')), STUB_CONVERTER, workers=1, log=lambda m: None)
+    assert failures == []
+    nodes = json.loads((tmp_path / f"rock_brk{SKELETON_SUFFIX}").read_text())
+    assert [n['NodeName'] for n in nodes] == ['rock_brk', 'rock_brk01__01', 'rock_brk02__01', 'rock_brk03__01']
+    assert nodes[2]['Position']['X'] == 5.0 and nodes[2]['Scale'] == {'X': 3.0, 'Y': 3.0, 'Z': 3.0}
+    assert nodes[1]['Position']['X'] == 0.0
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+from gismo.bench import make_model_set
+from gismo.transforms import TRANSFORMS_SUFFIX
+from gismo.watch import InotifyWatcher, PollingWatcher, affected_models, iter_models
+
+WATCHERS = [PollingWatcher]
+if sys.platform.startswith('linux'):
+    WATCHERS.append(InotifyWatcher)
+
+
+def drain(watcher, reads=6):
+    changed, removed = set(), set()
+    for _ in range(reads):
+        c, r = watcher.read(0.1)
+        changed |= c
+        removed |= r
+    return changed, removed
+
+
+def test_affected_models_pulls_in_whole_groups(tmp_path):
+    paths = make_model_set(tmp_path, plain=1, groups=1, fragments=3)
+    folder = tmp_path / 'area00'
+    plain = folder / 'obj_00000.model'
+    fragment = folder / 'brk_0000_brkB.model'
+    group = sorted(p for p in paths if 'brk' in p.name)
+    assert affected_models({plain}, set()) == [plain]
+    assert affected_models({fragment}, set()) == group
+    assert affected_models(set(), {folder / 'brk_0000_brkD.model'}) == group
+    assert affected_models({folder / f"brk_0000_brk{TRANSFORMS_SUFFIX}"}, set()) == group
+
+
+def test_iter_models_honours_ignores(tmp_path):
+    make_model_set(tmp_path, plain=2, groups=0)
+    (tmp_path / '.gismoignore').write_text("area01\n")
+    (tmp_path / '.git').mkdir()
+    (tmp_path / '.git' / 'x.model').touch()
+    assert list(iter_models(tmp_path)) == [tmp_path / 'area00' / 'obj_00000.model']
+
+
+@pytest.mark.parametrize('cls', WATCHERS)
+def test_watcher_reports_changes_outside_ignored_folders(tmp_path, cls):
+    (tmp_path / '.gismoignore').write_text("wip\n")
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'wip').mkdir()
+    model = tmp_path / 'a' / 'x.model'
+    model.write_text('1')
+    watcher = cls([tmp_path], interval=0.05, sweep=0.2) if cls is PollingWatcher else cls([tmp_path])
+    try:
+        (tmp_path / 'wip' / 'w.model').write_text('1')
+        (tmp_path / 'a' / 'b').mkdir()
+        (tmp_path / 'a' / 'b' / 'new.model').write_text('1')
+        (tmp_path / 'a' / 'tmp').write_text('2')
+        os.replace(tmp_path / 'a' / 'tmp', model)
+        assert drain(watcher) == ({model, tmp_path / 'a' / 'b' / 'new.model'}, set())
+
+        model.write_text('33')
+        assert drain(watcher) == ({model}, set())
+
+        model.unlink()
+        assert drain(watcher) == (set(), {model})
+    finally:
+        watcher.close()
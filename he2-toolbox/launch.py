@@ -4,20 +4,51 @@ import subprocess
 import functools
 import re
 import ast
+import json
 import logging
-from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QTextEdit, QGroupBox, QHBoxLayout, QGridLayout, QLabel, QLineEdit
-from PyQt6.QtCore import QThread, pyqtSignal, Qt
+import signal
+import threading
+import time
+import argparse
+import importlib
+import io
+import runpy
+import select
+import shutil
+import socket
+import tempfile
+import traceback
+from collections import deque
+from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QTextEdit, QGroupBox, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QCheckBox, QTabWidget, QSpinBox
+from PyQt6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal, Qt
+from PyQt6.QtGui import QTextCursor
 from PyQt6.QtWidgets import QSizePolicy
 from pathlib import Path
 
 logging.basicConfig(level=logging.INFO)
 
+LOG_DIR = Path(__file__).resolve().parent / "logs"
+SCROLLBACK_LINES = 5000
+FLUSH_INTERVAL_MS = 100
+METADATA_CACHE_FILE = Path(os.environ.get("LOCALAPPDATA") or Path.home() / ".cache") / "he2-toolbox" / "metadata_cache.json"
+METADATA_HEADER_BYTES = 8192
+RESCAN_DELAY_MS = 1000
+SCAN_BATCH = 20
+DEFAULT_MAX_RUNS = 4
+KILL_GRACE_SECONDS = 3
+# Imported once by the warm interpreter so forked tools start with them loaded.
+WARM_MODULES = ("PyQt6.QtCore", "PyQt6.QtGui", "PyQt6.QtWidgets", "json", "subprocess", "concurrent.futures")
+ZYGOTE_START_TIMEOUT = 15
+FAST_LAUNCH_OPT_OUT_RE = re.compile(r'__fast_launch__\s*=\s*False')
+
 def extract_metadata(script_path):
-    default_metadata = {"Author": "Unknown", "Version": "Unknown", "Description": "No description available", "Contributors": "Not specified"}
+    default_metadata = {"Author": "Unknown", "Version": "Unknown", "Description": "No description available", "Contributors": "Not specified", "FastLaunch": True}
     metadata = default_metadata.copy()
     try:
-        with open(script_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        # Metadata lives at the top of a script; reading only the header keeps
+        # this cheap for large files on network drives.
+        with open(script_path, "r", encoding="utf-8", errors="replace") as f:
+            content = f.read(METADATA_HEADER_BYTES)
         docstring_match = re.search(r'"""(.*?)"""', content, re.DOTALL) or re.search(r"'''(.*?)'''", content, re.DOTALL)
         if docstring_match:
             metadata["Description"] = docstring_match.group(1).strip().split("\n")[0]
@@ -25,6 +56,9 @@ def extract_metadata(script_path):
         version_match = re.search(r'__version__\s*=\s*["\'](.*?)["\']', content)
         Contributors_match = re.search(r'__contributors__\s*=\s*(\[.*?\])', content, re.DOTALL)
 
+        # Tools that cannot share a forked interpreter opt out with `__fast_launch__ = False`.
+        metadata["FastLaunch"] = not FAST_LAUNCH_OPT_OUT_RE.search(content)
+
         if author_match:
             metadata["Author"] = author_match.group(1)
         if version_match:
@@ -41,11 +75,44 @@ def extract_metadata(script_path):
 
     return metadata
 
-def iter_python_scripts(directory):
+def load_metadata_cache(directory, cache_file=METADATA_CACHE_FILE):
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("roots", {}).get(str(Path(directory).resolve()), {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def save_metadata_cache(directory, entries, cache_file=METADATA_CACHE_FILE):
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data.setdefault("roots", {})[str(Path(directory).resolve())] = entries
+    try:
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(str(cache_file) + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        logging.error(f"Error writing metadata cache {cache_file}: {e}")
+
+def format_tooltip(metadata):
+    return f"Author: {metadata['Author']}\n Version: {metadata['Version']}\n {metadata['Description']}\n Contributors: {metadata['Contributors']}"
+
+def iter_python_scripts(directory, walked_dirs=None):
     directory = Path(directory)
     grouped_scripts = {}
 
-    for root, _, files in os.walk(directory):
+    for root, dirs, files in os.walk(directory):
+        if walked_dirs is not None:
+            walked_dirs.append(root)
+        # Packages are support code imported by tools, not tools themselves.
+        # The log folder is skipped so saving a log does not trigger a rescan.
+        dirs[:] = [d for d in dirs if d != "__pycache__" and not (Path(root) / d / "__init__.py").is_file()
+                   and (Path(root) / d).resolve() != LOG_DIR]
         py_files = [f for f in files if f.endswith(".py") and f != Path(__file__).name]
         if not py_files:
             continue
@@ -61,20 +128,462 @@ def iter_python_scripts(directory):
     for folder, scripts in grouped_scripts.items():
         yield folder, sorted(scripts)
 
+def kill_process_tree(pid, force=False):
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    try:
+        # Children are started in their own session, so the group id is the pid.
+        os.killpg(pid, signal.SIGKILL if force else signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def fast_launch_supported():
+    return hasattr(os, "fork") and hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds")
+
+def recv_line(conn, buffer=b""):
+    while b"\n" not in buffer:
+        chunk = conn.recv(4096)
+        if not chunk:
+            raise ConnectionError("warm interpreter closed the connection")
+        buffer += chunk
+    line, _, rest = buffer.partition(b"\n")
+    return line.decode("utf-8"), rest
+
+def run_forked_script(request, out_fd):
+    """Child side of the warm interpreter: become a fresh-looking `python script.py` and never return."""
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(out_fd, 1)
+    os.dup2(out_fd, 2)
+    os.close(devnull)
+    os.close(out_fd)
+    # Unbuffered UTF-8, as PYTHONUNBUFFERED/PYTHONIOENCODING give a normal run.
+    sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False), encoding="utf-8", errors="replace")
+    sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), encoding="utf-8", errors="replace",
+                                  line_buffering=True, write_through=True)
+    sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), encoding="utf-8", errors="backslashreplace",
+                                  line_buffering=True, write_through=True)
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    # The launcher's own logging setup is not the tool's.
+    logging.root.handlers.clear()
+    logging.root.setLevel(logging.WARNING)
+    script = request["script"]
+    sys.argv = [script]
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    code = 0
+    try:
+        os.chdir(request["cwd"])
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Start the traceback at the script, as a normal run would, not in the launcher.
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        code = 1
+    try:
+        logging.shutdown()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(code)
+
+def serve_zygote(socket_path):
+    """Warm interpreter: import the heavy modules once, then fork a child per request.
+
+    Each request carries the script path, the working directory and the
+    write end of the output pipe. The reply is the child's pid, then its
+    exit code once it has been reaped. The server exits when its stdin
+    closes, i.e. when the launcher goes away.
+    """
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    children = {}
+    print("ready", flush=True)
+    while True:
+        try:
+            readable, _, _ = select.select([server, sys.stdin, wake_r], [], [])
+        except InterruptedError:
+            continue
+        if sys.stdin in readable and not sys.stdin.buffer.read1(1):
+            break
+        if wake_r in readable:
+            os.read(wake_r, 512)
+        if server in readable:
+            conn, _ = server.accept()
+            try:
+                message, fds, _, _ = socket.recv_fds(conn, 4096, 1)
+                line, _ = recv_line(conn, message)
+                request = json.loads(line)
+                if not fds:
+                    raise ValueError("no output pipe")
+            except (OSError, ValueError) as e:
+                logging.error(f"Bad fast-launch request: {e}")
+                conn.close()
+            else:
+                pid = os.fork()
+                if pid == 0:
+                    server.close()
+                    conn.close()
+                    for other in children.values():
+                        other.close()
+                    run_forked_script(request, fds[0])
+                os.close(fds[0])
+                conn.sendall(f"{pid}\n".encode())
+                children[pid] = conn
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = children.pop(pid, None)
+            if conn is not None:
+                try:
+                    conn.sendall(f"{os.waitstatus_to_exitcode(status)}\n".encode())
+                except OSError:
+                    pass
+                conn.close()
+    server.close()
+
+class WarmProcess:
+    """A tool forked by the warm interpreter, with the parts of Popen that ScriptRunner uses."""
+
+    def __init__(self, conn, pid, stdout, buffer=b""):
+        self.conn = conn
+        self.pid = pid
+        self.stdout = stdout
+        self.returncode = None
+        self._buffer = buffer
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        if self.returncode is None:
+            try:
+                line, self._buffer = recv_line(self.conn, self._buffer)
+                self.returncode = int(line)
+            except (OSError, ValueError):
+                self.returncode = -1
+            finally:
+                self.conn.close()
+        return self.returncode
+
+class WarmPool:
+    """A forkserver-style warm interpreter that tools are forked from (POSIX only).
+
+    The server is `launch.py --zygote`, so it starts with the launcher's own
+    imports (PyQt6 included) already done, and never creates a QApplication,
+    which keeps forking it safe.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.socket_dir = None
+        self.socket_path = None
+        self.ready = threading.Event()
+
+    def start(self):
+        if self.process is not None:
+            return
+        self.socket_dir = tempfile.mkdtemp(prefix="he2-warm-")
+        self.socket_path = os.path.join(self.socket_dir, "zygote.sock")
+        env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+        self.process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--zygote", self.socket_path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, start_new_session=True
+        )
+        threading.Thread(target=self._wait_ready, args=(self.process,), daemon=True).start()
+
+    def _wait_ready(self, process):
+        if process.stdout.readline().strip() == b"ready":
+            self.ready.set()
+
+    def spawn(self, script_path, cwd=None):
+        """Fork `script_path` from the warm interpreter; raises OSError if it is not usable."""
+        if self.process is None or not self.ready.wait(ZYGOTE_START_TIMEOUT) or self.process.poll() is not None:
+            raise OSError("warm interpreter is not running")
+        read_fd, write_fd = os.pipe()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(self.socket_path)
+            request = json.dumps({"script": str(script_path), "cwd": cwd or os.getcwd()}) + "\n"
+            socket.send_fds(conn, [request.encode("utf-8")], [write_fd])
+            os.close(write_fd)
+            write_fd = None
+            line, rest = recv_line(conn)
+            pid = int(line)
+        except (OSError, ValueError) as e:
+            conn.close()
+            os.close(read_fd)
+            if write_fd is not None:
+                os.close(write_fd)
+            raise OSError(f"warm interpreter did not start the script: {e}") from e
+        stdout = open(read_fd, "r", encoding="utf-8", errors="replace")
+        return WarmProcess(conn, pid, stdout, rest)
+
+    def close(self):
+        process, self.process = self.process, None
+        self.ready.clear()
+        if process is not None:
+            try:
+                process.stdin.close()
+                process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+        if self.socket_dir:
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
+            self.socket_dir = None
+
+def start_script_process(script_path, env):
+    if os.name == "nt":
+        group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group = {"start_new_session": True}
+    return subprocess.Popen(
+        [sys.executable, script_path],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding="utf-8", errors="replace", bufsize=1, env=env, **group
+    )
+
 class ScriptRunner(QThread):
     output_signal = pyqtSignal(str)
 
-    def __init__(self, script_path):
+    def __init__(self, script_path, log_path=None, flush_interval=FLUSH_INTERVAL_MS, pool=None):
         super().__init__()
         self.script_path = script_path
+        self.log_path = log_path
+        self.pool = pool
+        self.process = None
+        self.exit_code = None
+        self.cancelled = False
+        self._pending = []
+        self._lock = threading.Lock()
+        # The timer lives on the GUI thread, so output reaches the widget in a
+        # few batches per second instead of one signal per line.
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(flush_interval)
+        self.flush_timer.timeout.connect(self.flush)
+        self.started.connect(self.flush_timer.start)
+        self.finished.connect(self._on_finished)
+
+    def run(self):
+        env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+        log_file = None
+        try:
+            if self.log_path:
+                Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+                log_file = open(self.log_path, "w", encoding="utf-8")
+            process = None
+            if self.pool is not None:
+                try:
+                    process = self.pool.spawn(self.script_path)
+                except OSError as e:
+                    with self._lock:
+                        self._pending.append(f"Fast launch unavailable ({e}); starting a fresh interpreter.")
+            if process is None:
+                process = start_script_process(self.script_path, env)
+            self.process = process
+            if self.cancelled:
+                kill_process_tree(process.pid, force=True)
+            for line in process.stdout:
+                line = line.rstrip("\r\n")
+                with self._lock:
+                    self._pending.append(line)
+                if log_file:
+                    log_file.write(line + "\n")
+            self.exit_code = process.wait()
+        except Exception as e:
+            with self._lock:
+                self._pending.append(f"Failed to run {self.script_path}: {e}")
+        finally:
+            if log_file:
+                log_file.close()
+
+    def cancel(self):
+        """Terminate the child and everything it started; force-kill after a grace period."""
+        self.cancelled = True
+        process = self.process
+        if process is None or process.poll() is not None:
+            return
+        kill_process_tree(process.pid)
+        if os.name != "nt":
+            def force_kill():
+                if process.poll() is None:
+                    kill_process_tree(process.pid, force=True)
+            threading.Timer(KILL_GRACE_SECONDS, force_kill).start()
+
+    def flush(self):
+        with self._lock:
+            lines, self._pending = self._pending, []
+        if lines:
+            self.output_signal.emit("\n".join(lines))
+
+    def _on_finished(self):
+        self.flush_timer.stop()
+        self.flush()
+        if self.log_path:
+            self.output_signal.emit(f"Full log written to {self.log_path}")
+
+class ScriptScanner(QThread):
+    """Walks the tool tree off the GUI thread.
+
+    Scripts whose path, mtime and size match the metadata cache reuse their
+    cached metadata; others get their header read. New or changed scripts are
+    reported in small batches so buttons appear while the walk continues.
+    """
+    scripts_found = pyqtSignal(list)
+    scan_finished = pyqtSignal(list, list)
+
+    def __init__(self, directory, entries, known):
+        super().__init__()
+        self.directory = directory
+        self.entries = dict(entries)
+        self.known = dict(known)
 
     def run(self):
-        process = subprocess.Popen([sys.executable, self.script_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        stdout, stderr = process.communicate()
-        for line in stdout.splitlines():
-            self.output_signal.emit(line.strip())
-        for line in stderr.splitlines():
-            self.output_signal.emit(line.strip())
+        fresh = {}
+        batch = []
+        walked_dirs = []
+        for _, script_paths in iter_python_scripts(self.directory, walked_dirs):
+            for script_path in script_paths:
+                try:
+                    st = os.stat(script_path)
+                except OSError:
+                    continue
+                entry = self.entries.get(script_path)
+                if not entry or entry.get("mtime_ns") != st.st_mtime_ns or entry.get("size") != st.st_size:
+                    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "metadata": extract_metadata(script_path)}
+                fresh[script_path] = entry
+                if self.known.get(script_path) != entry["metadata"]:
+                    batch.append((script_path, entry["metadata"]))
+                    if len(batch) >= SCAN_BATCH:
+                        self.scripts_found.emit(batch)
+                        batch = []
+        if batch:
+            self.scripts_found.emit(batch)
+        if fresh != self.entries:
+            save_metadata_cache(self.directory, fresh)
+        self.scan_finished.emit(list(fresh), walked_dirs)
+
+class Job:
+    QUEUED, RUNNING, FINISHED, FAILED, CANCELLED = "Queued", "Running", "Finished", "Failed", "Cancelled"
+
+    def __init__(self, script_path, log_path=None, fast_launch=False):
+        self.script_path = script_path
+        self.log_path = log_path
+        self.fast_launch = fast_launch
+        self.name = Path(script_path).stem
+        self.state = Job.QUEUED
+        self.runner = None
+        self.started_at = None
+        self.ended_at = None
+        self.exit_code = None
+        self.widget = None
+
+    def runtime(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.ended_at or time.monotonic()) - self.started_at
+
+    def status_text(self):
+        if self.state == Job.RUNNING:
+            return f"{self.state} for {self.runtime():.0f}s"
+        if self.state in (Job.FINISHED, Job.FAILED):
+            return f"{self.state}: exit code {self.exit_code} after {self.runtime():.1f}s"
+        return self.state
+
+class JobManager(QObject):
+    """Runs scripts side by side, at most `max_running` at a time; the rest wait in a queue."""
+    job_changed = pyqtSignal(object)
+
+    def __init__(self, max_running=DEFAULT_MAX_RUNS, parent=None):
+        super().__init__(parent)
+        self.max_running = max_running
+        self.queue = deque()
+        self.running = []
+        self.pool = None
+
+    def submit(self, job):
+        self.queue.append(job)
+        self.job_changed.emit(job)
+        self._start_queued()
+        return job
+
+    def set_max_running(self, value):
+        self.max_running = max(1, value)
+        self._start_queued()
+
+    def cancel(self, job):
+        if job in self.queue:
+            self.queue.remove(job)
+            job.state = Job.CANCELLED
+            self.job_changed.emit(job)
+        elif job.state == Job.RUNNING:
+            job.runner.cancel()
+
+    def cancel_all(self):
+        for job in list(self.queue) + list(self.running):
+            self.cancel(job)
+
+    def shutdown(self):
+        """Cancel everything and wait for the runner threads, which must not be destroyed while running."""
+        self.cancel_all()
+        deadline = time.monotonic() + KILL_GRACE_SECONDS + 1
+        for job in list(self.running):
+            if not job.runner.wait(max(0, int((deadline - time.monotonic()) * 1000))):
+                process = job.runner.process
+                if process is not None:
+                    kill_process_tree(process.pid, force=True)
+                job.runner.wait()
+
+    def _start_queued(self):
+        while self.queue and len(self.running) < self.max_running:
+            job = self.queue.popleft()
+            pool = self.pool if job.fast_launch else None
+            job.runner = ScriptRunner(job.script_path, job.log_path, pool=pool)
+            job.runner.finished.connect(functools.partial(self._on_finished, job))
+            job.state = Job.RUNNING
+            job.started_at = time.monotonic()
+            self.running.append(job)
+            self.job_changed.emit(job)
+            job.runner.start()
+
+    def _on_finished(self, job):
+        job.ended_at = time.monotonic()
+        job.exit_code = job.runner.exit_code
+        if job.runner.cancelled:
+            job.state = Job.CANCELLED
+        else:
+            job.state = Job.FINISHED if job.exit_code == 0 else Job.FAILED
+        if job in self.running:
+            self.running.remove(job)
+        self.job_changed.emit(job)
+        self._start_queued()
 
 class ScriptLauncher(QWidget):
     def __init__(self, script_dir="./"):
@@ -87,76 +596,286 @@ class ScriptLauncher(QWidget):
 
         self.main_layout = QHBoxLayout()
 
+        self.script_dir = script_dir
         self.script_layout = QVBoxLayout()
         self.script_groups = {}
+        self.script_buttons = {}
+        self.script_metadata = {}
+        self.scanner = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_rescan)
+        self.watcher.fileChanged.connect(self.schedule_rescan)
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(RESCAN_DELAY_MS)
+        self.rescan_timer.timeout.connect(self.rescan)
         self.load_scripts(script_dir)
         self.main_layout.addLayout(self.script_layout, 1)
 
-        self.output_box = QTextEdit()
-        self.output_box.setReadOnly(True)
-        self.output_box.setMinimumWidth(300)
-        self.main_layout.addWidget(self.output_box, 1)
+        self.jobs = JobManager(DEFAULT_MAX_RUNS, self)
+        self.jobs.job_changed.connect(self.update_job)
+
+        output_layout = QVBoxLayout()
+        self.output_tabs = QTabWidget()
+        self.output_tabs.setMinimumWidth(300)
+        self.output_tabs.setTabsClosable(True)
+        self.output_tabs.tabCloseRequested.connect(self.close_job_tab)
+        output_layout.addWidget(self.output_tabs, 1)
+        options_layout = QHBoxLayout()
+        self.save_log_checkbox = QCheckBox("Save full log to file")
+        self.save_log_checkbox.setToolTip(f"Write every line of output to {LOG_DIR}")
+        options_layout.addWidget(self.save_log_checkbox)
+        self.fast_launch_checkbox = QCheckBox("Fast launch")
+        self.fast_launch_checkbox.setToolTip("Fork tools from a warm interpreter that has PyQt6 already imported.\n"
+                                             "Tools with __fast_launch__ = False still start normally.")
+        self.fast_launch_checkbox.setEnabled(fast_launch_supported())
+        self.fast_launch_checkbox.toggled.connect(self.set_fast_launch)
+        options_layout.addWidget(self.fast_launch_checkbox)
+        options_layout.addStretch()
+        options_layout.addWidget(QLabel("Max parallel runs:"))
+        self.max_runs_spin = QSpinBox()
+        self.max_runs_spin.setRange(1, 64)
+        self.max_runs_spin.setValue(DEFAULT_MAX_RUNS)
+        self.max_runs_spin.valueChanged.connect(self.jobs.set_max_running)
+        options_layout.addWidget(self.max_runs_spin)
+        output_layout.addLayout(options_layout)
+        self.main_layout.addLayout(output_layout, 1)
+
+        self.runtime_timer = QTimer(self)
+        self.runtime_timer.setInterval(1000)
+        self.runtime_timer.timeout.connect(self.refresh_running_jobs)
+        self.runtime_timer.start()
 
         self.layout.addLayout(self.main_layout)
         self.setLayout(self.layout)
 
     def load_scripts(self, directory):
-        for folder, script_paths in iter_python_scripts(directory):
+        # Buttons come straight from the cache; the scanner then fills in new
+        # scripts, refreshed tooltips and removals in the background.
+        for script_path, entry in load_metadata_cache(directory).items():
+            self.add_script_button(script_path, entry["metadata"])
+        self.rescan()
+
+    def add_script_button(self, script_path, metadata):
+        self.script_metadata[script_path] = metadata
+        button = self.script_buttons.get(script_path)
+        if button is not None:
+            button.setToolTip(format_tooltip(metadata))
+            return
+
+        relative_path = Path(script_path).relative_to(self.script_dir)
+        folder = relative_path.parts[0] if len(relative_path.parts) > 1 else "Root"
+        subcategory = relative_path.parts[1] if len(relative_path.parts) > 1 else "Root"
+
+        group = self.script_groups.get(folder)
+        if group is None:
             group_box = QGroupBox(folder.upper())
             font = group_box.font()
             group_box.setFont(font)
             group_layout = QVBoxLayout()
-            subcategories = {}
-            for script_path in script_paths:
-                relative_path = Path(script_path).relative_to(directory)
-                subcategory = relative_path.parts[1] if len(relative_path.parts) > 1 else "Root"
-
-                if subcategory not in subcategories:
-                    subcategories[subcategory] = []
-
-                subcategories[subcategory].append(script_path)
-
-            for subcategory, scripts in subcategories.items():
-                subcategory_group = QGroupBox(subcategory)
-                subcategory_layout = QGridLayout()
-
-                row, col = 0, 0
-                for script_path in scripts:
-                    button_text = os.path.splitext(os.path.basename(script_path))[0]
-                    metadata = extract_metadata(script_path)
-                    tooltip_text = f"Author: {metadata['Author']}\n Version: {metadata['Version']}\n {metadata['Description']}\n Contributors: {metadata['Contributors']}"
-
-                    button = QPushButton(button_text)
-                    font_metrics = button.fontMetrics()
-                    text_width = font_metrics.horizontalAdvance(button_text) + 20
-                    text_height = font_metrics.height() + 20
-                    button.setMinimumSize(text_width, text_height)
-                    button.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-                    button.setToolTip(tooltip_text)
-                    button.clicked.connect(functools.partial(self.run_script, script_path))
-                    subcategory_layout.addWidget(button, row, col)
-                    col += 1
-                    if col >= 3:
-                        col = 0
-                        row += 1
-                subcategory_group.setLayout(subcategory_layout)
-                group_layout.addWidget(subcategory_group)
-
             group_box.setLayout(group_layout)
             self.script_layout.addWidget(group_box)
+            group = self.script_groups[folder] = {"box": group_box, "layout": group_layout, "subcategories": {}}
+
+        subcategory_entry = group["subcategories"].get(subcategory)
+        if subcategory_entry is None:
+            subcategory_group = QGroupBox(subcategory)
+            subcategory_layout = QGridLayout()
+            subcategory_group.setLayout(subcategory_layout)
+            group["layout"].addWidget(subcategory_group)
+            subcategory_entry = group["subcategories"][subcategory] = [subcategory_layout, 0]
+
+        button_text = os.path.splitext(os.path.basename(script_path))[0]
+        button = QPushButton(button_text)
+        font_metrics = button.fontMetrics()
+        text_width = font_metrics.horizontalAdvance(button_text) + 20
+        text_height = font_metrics.height() + 20
+        button.setMinimumSize(text_width, text_height)
+        button.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        button.setToolTip(format_tooltip(metadata))
+        button.clicked.connect(functools.partial(self.run_script, script_path))
+        row, col = divmod(subcategory_entry[1], 3)
+        subcategory_entry[0].addWidget(button, row, col)
+        subcategory_entry[1] += 1
+        self.script_buttons[script_path] = button
+
+    def clear_scripts(self):
+        for group in self.script_groups.values():
+            group["box"].deleteLater()
+        self.script_groups = {}
+        self.script_buttons = {}
+
+    def schedule_rescan(self, *_):
+        self.rescan_timer.start()
+
+    def rescan(self):
+        if self.scanner is not None and self.scanner.isRunning():
+            self.rescan_timer.start()
+            return
+        self.scanner = ScriptScanner(self.script_dir, load_metadata_cache(self.script_dir), self.script_metadata)
+        self.scanner.scripts_found.connect(self.on_scripts_found)
+        self.scanner.scan_finished.connect(self.on_scan_finished)
+        self.scanner.start()
+
+    def on_scripts_found(self, batch):
+        for script_path, metadata in batch:
+            self.add_script_button(script_path, metadata)
+
+    def on_scan_finished(self, script_paths, walked_dirs):
+        current = set(script_paths)
+        if set(self.script_buttons) - current:
+            # Something was deleted or moved: rebuild so the grids stay compact.
+            remaining = {p: self.script_metadata[p] for p in script_paths if p in self.script_metadata}
+            self.clear_scripts()
+            self.script_metadata = {}
+            for script_path, metadata in remaining.items():
+                self.add_script_button(script_path, metadata)
+        watched = set(self.watcher.directories()) | set(self.watcher.files())
+        new_paths = [p for p in list(walked_dirs) + list(script_paths) if p not in watched]
+        if new_paths:
+            self.watcher.addPaths(new_paths)
 
     def run_script(self, script_path):
-        self.output_box.clear()
-        if hasattr(self, 'runner') and self.runner.isRunning():
-            self.runner.terminate()
-        self.runner = ScriptRunner(script_path)
-        self.runner.output_signal.connect(self.update_output)
-        self.runner.start()
+        log_path = None
+        if self.save_log_checkbox.isChecked():
+            log_path = LOG_DIR / f"{Path(script_path).stem}-{time.strftime('%Y%m%d-%H%M%S')}.log"
+        fast_launch = self.jobs.pool is not None and self.script_metadata.get(script_path, {}).get("FastLaunch", True)
+        job = Job(script_path, log_path, fast_launch)
+        self.add_job_tab(job)
+        self.jobs.submit(job)
+
+    def add_job_tab(self, job):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        header = QHBoxLayout()
+        widget.status_label = QLabel(job.status_text())
+        header.addWidget(widget.status_label, 1)
+        widget.cancel_button = QPushButton("Cancel")
+        widget.cancel_button.clicked.connect(functools.partial(self.jobs.cancel, job))
+        header.addWidget(widget.cancel_button)
+        layout.addLayout(header)
+        widget.output_box = QTextEdit()
+        widget.output_box.setReadOnly(True)
+        # Oldest lines are dropped once the scrollback is full.
+        widget.output_box.document().setMaximumBlockCount(SCROLLBACK_LINES)
+        layout.addWidget(widget.output_box, 1)
+        widget.job = job
+        job.widget = widget
+        index = self.output_tabs.addTab(widget, job.name)
+        self.output_tabs.setCurrentIndex(index)
+
+    def update_job(self, job):
+        widget = job.widget
+        if widget is None:
+            return
+        if job.state == Job.RUNNING and job.runner is not None and not getattr(widget, "connected", False):
+            job.runner.output_signal.connect(functools.partial(self.update_output, widget.output_box))
+            widget.connected = True
+        widget.status_label.setText(job.status_text())
+        widget.cancel_button.setEnabled(job.state in (Job.QUEUED, Job.RUNNING))
+        index = self.output_tabs.indexOf(widget)
+        if index >= 0:
+            self.output_tabs.setTabText(index, f"{job.name} ({job.state.lower()})" if job.state != Job.RUNNING else job.name)
+
+    def refresh_running_jobs(self):
+        for job in self.jobs.running:
+            if job.widget is not None:
+                job.widget.status_label.setText(job.status_text())
+
+    def close_job_tab(self, index):
+        widget = self.output_tabs.widget(index)
+        job = widget.job
+        self.jobs.cancel(job)
+        if job.runner is not None and getattr(widget, "connected", False):
+            job.runner.output_signal.disconnect()
+        self.output_tabs.removeTab(index)
+        job.widget = None
+        widget.deleteLater()
 
-    def update_output(self, text):
-        self.output_box.append(text)
+    def set_fast_launch(self, enabled):
+        if enabled:
+            self.jobs.pool = WarmPool()
+            self.jobs.pool.start()
+        elif self.jobs.pool is not None:
+            # Tools already forked keep running; only new launches go back to normal.
+            self.jobs.pool.close()
+            self.jobs.pool = None
+
+    def closeEvent(self, event):
+        self.jobs.shutdown()
+        if self.scanner is not None:
+            self.scanner.wait()
+        if self.jobs.pool is not None:
+            self.jobs.pool.close()
+        super().closeEvent(event)
+
+    def update_output(self, output_box, text):
+        cursor = output_box.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        if not output_box.document().isEmpty():
+            cursor.insertBlock()
+        cursor.insertText(text)
+        output_box.setTextCursor(cursor)
+        output_box.ensureCursorVisible()
+
+BENCH_PROBE = """import sys, time
+from PyQt6.QtWidgets import QApplication
+print("ready", flush=True)
+"""
+
+def bench_startup(argv=None):
+    """Time from launch to a tool's first output line, fresh interpreter versus warm fork."""
+    parser = argparse.ArgumentParser(prog="launch.py --bench-startup", description=bench_startup.__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--script", default=None, help="tool to time instead of a probe that imports PyQt6")
+    args = parser.parse_args(argv)
+    work = tempfile.mkdtemp(prefix="he2-bench-")
+    script = args.script
+    if script is None:
+        script = os.path.join(work, "probe.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(BENCH_PROBE)
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    modes = {"fresh": lambda: start_script_process(script, env)}
+    pool = None
+    if fast_launch_supported():
+        pool = WarmPool()
+        start = time.perf_counter()
+        pool.start()
+        pool.ready.wait(ZYGOTE_START_TIMEOUT)
+        print(f"warm interpreter ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+        modes["warm"] = lambda: pool.spawn(script)
+    else:
+        print("warm interpreter not supported on this platform; timing fresh launches only")
+    try:
+        for mode, launch in modes.items():
+            first, total = [], []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                process = launch()
+                process.stdout.readline()
+                first.append(time.perf_counter() - start)
+                process.stdout.read()
+                process.wait()
+                process.stdout.close()
+                total.append(time.perf_counter() - start)
+            first.sort()
+            total.sort()
+            print(f"{mode:>6}: first output median {first[len(first) // 2] * 1000:7.1f} ms "
+                  f"(min {first[0] * 1000:.1f}), exit median {total[len(total) // 2] * 1000:7.1f} ms")
+    finally:
+        if pool is not None:
+            pool.close()
+        shutil.rmtree(work, ignore_errors=True)
+    return 0
 
 if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--zygote":
+        serve_zygote(sys.argv[2])
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench-startup":
+        sys.exit(bench_startup(sys.argv[2:]))
     app = QApplication(sys.argv)
     launcher = ScriptLauncher()
     launcher.show()